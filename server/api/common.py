@@ -1,11 +1,12 @@
 import asyncio
-from copy import deepcopy
+import time
 from datetime import datetime
-from typing import Iterable, List, Any, Optional, Callable, Coroutine, Tuple, AsyncGenerator
+from typing import Iterable, List, Any, Optional, Callable, Coroutine, Tuple, AsyncGenerator, Dict
 from uuid import UUID
 
 from aioredis.client import Pipeline, Redis, PubSub
 from fastapi import HTTPException
+from redis.asyncio.cluster import RedisCluster
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload, selectinload
 from starlette import status
@@ -13,20 +14,23 @@ from starlette.websockets import WebSocket, WebSocketDisconnect, WebSocketState
 from websockets.exceptions import ConnectionClosedOK
 
 from server.core.authentications import COOKIE_NAME, cookie, backend
-from server.core.enums import ResponseCode, ChatType
+from server.core.enums import ResponseCode, ChatType, ChatHistoryType
 from server.core.exceptions import ExceptionHandler
-from server.core.externals.redis import AioRedis
+from server.core.externals.redis import AioRedis, ShardedPubSub
+from server.core.externals.redis.lock import Redlock
+from server.core.externals.redis.mixin import SchemaView
 from server.core.externals.redis.schemas import (
     RedisChatRoomByUserProfileS, RedisChatRoomsByUserProfileS, RedisUserProfilesByRoomS,
     RedisChatHistoriesByRoomS, RedisChatHistoriesToSyncS, RedisUserImageFileS,
     RedisUserProfileByRoomS, RedisChatHistoryByRoomS, RedisInfoByRoomS,
-    RedisChatRoomInfoS, RedisChatHistoryPatchS, RedisChatHistoryToSyncS, RedisChatRoomPubSubS
+    RedisChatRoomInfoS, RedisChatHistoryPatchS, RedisChatHistoryToSyncS, RedisChatRoomPubSubS,
+    RedisChatRoomsByAccessS
 )
 from server.core.utils import async_iter
-from server.crud.service import ChatRoomCRUD, ChatRoomUserAssociationCRUD
-from server.db.databases import settings
+from server.crud.service import ChatRoomCRUD, ChatRoomUserAssociationCRUD, ChatHistoryCRUD, ChatRoomReadCursorCRUD
+from server.db.databases import settings, async_session
 from server.models import (
-    User, ChatRoomUserAssociation, UserProfile, UserSession, ChatRoom
+    User, ChatRoomUserAssociation, UserProfile, UserSession, ChatRoom, ChatHistory, ChatRoomReadCursor
 )
 from server.schemas.chat import ChatSendFormS, ChatSendDataS
 
@@ -60,7 +64,10 @@ class AuthValidator:
                 return_timestamp=False,
             )
         )
-        user_session = await backend.read(session_id, self.session)
+        # 동일 연결 내 세션 재조회 방지
+        user_session = getattr(websocket.state, 'user_session', None)
+        if user_session is None or user_session.session_id != str(session_id):
+            user_session = websocket.state.user_session = await backend.read(session_id, self.session)
         return user_session
 
     async def validate_profile_by_websocket(
@@ -79,18 +86,11 @@ class AuthValidator:
 
 class AsyncRedisHandler:
 
-    RETRY_COUNT = 5
-    RETRY_DELAY = 0.2
-
     _redis = None
     _init_dict = None
-
-    @classmethod
-    async def generate_primary_redis(cls, connections: List[Redis]):
-        async for conn in async_iter(connections):
-            info = await conn.info()
-            if info.get('role') == 'master':
-                return conn
+    _shared = False  # 연결 관리자가 공유하는 클라이언트인 경우, 핸들러 종료 시 닫지 않음
+    _lock_nodes = None
+    unsync_page_size = 100  # 읽음 처리 동기화 대상 내역 조회 단위
 
     @staticmethod
     def get_redis_module(**kwargs):
@@ -98,7 +98,7 @@ class AsyncRedisHandler:
 
     async def _connect_redis(self, **kwargs):
         module = self.get_redis_module(**kwargs)
-        return await self.generate_primary_redis(module.get_connections())
+        return await module.connect()
 
     def __init__(self, redis: Optional[Redis] = None, **kwargs):
         self._init_dict = kwargs
@@ -116,22 +116,26 @@ class AsyncRedisHandler:
     async def redis(self):
         if not self._redis:
             self._redis = await self._connect_redis(**self._init_dict)
+            self._shared = True
         return self._redis
 
     async def pipeline(self):
         redis = await self.redis
         return redis.pipeline()
 
-    async def lock(self, key: str, timeout: int = 5):
-        redis = await self.redis
-        return redis.lock(name=key, timeout=timeout)
+    async def lock(self, key: str, timeout: int = 5) -> Redlock:
+        if self._lock_nodes is None:
+            self._lock_nodes = await self.get_redis_module(**self._init_dict).connect_lock_nodes()
+        return Redlock(self._lock_nodes, name=key, timeout=timeout)
 
     async def pubsub(self):
         redis = await self.redis
+        if isinstance(redis, RedisCluster):
+            return ShardedPubSub(redis)
         return redis.pubsub()
 
     async def close(self):
-        if self._redis:
+        if self._redis and not self._shared:
             await self._redis.close()
 
     async def _flushall(self):
@@ -144,16 +148,19 @@ class AsyncRedisHandler:
         room_id: int,
         crud: Optional[ChatRoomCRUD] = None,
         pipe: Optional[Pipeline] = None,
-        lock=True, raise_exception=False
+        lock=True, raise_exception=False, stale_ok=False
     ) -> Tuple[RedisChatRoomInfoS, Pipeline | None]:
 
-        async def _get_redis():
-            room_redis: RedisChatRoomInfoS = await RedisInfoByRoomS.hgetall(await self.redis, room_id)
+        async def _get_redis(_stale_ok: bool = False):
+            room_redis: RedisChatRoomInfoS = await RedisInfoByRoomS.hgetall(
+                await self.redis, room_id, stale_ok=_stale_ok
+            )
             return room_redis
 
         async def _action():
             callback_pipe = None
-            room_redis: RedisChatRoomInfoS = await _get_redis()
+            # stale_ok 인 경우 복제 노드에서 조회 (없는 경우 DB 에서 생성 후 주 노드에서 다시 조회)
+            room_redis: RedisChatRoomInfoS = await _get_redis(stale_ok)
             if not room_redis:
                 room_db: ChatRoom = await crud.get(
                     conditions=(ChatRoom.id == room_id,),
@@ -442,6 +449,174 @@ class AsyncRedisHandler:
         else:
             return await _transaction(pipe)
 
+    async def add_histories_by_room(
+        self,
+        room_id: int,
+        histories: RedisChatHistoryByRoomS | List[RedisChatHistoryByRoomS],
+        session: AsyncSession
+    ):
+        """
+        대화 내역 추가 후, 최근 내역 유지 범위(redis_history_max_count, redis_history_max_days) 적용
+        - Redis 에서 삭제된 대화방인 경우, DB 에서 최근 내역을 먼저 복원
+        - 유지 범위를 넘은 내역이 redis_history_trim_slack 보다 많아진 경우에만 모아서 삭제 (메시지마다 삭제하지 않음)
+        """
+        await self.sync_histories_by_room(room_id, session)
+        cutoff: Optional[float] = RedisChatHistoriesByRoomS.get_cutoff()
+        async with await self.pipeline() as pipe:
+            pipe = await RedisChatHistoriesByRoomS.zadd(pipe, room_id, histories)
+            pipe = await RedisChatHistoriesByRoomS.zcard(pipe, room_id)
+            if cutoff:
+                pipe = await RedisChatHistoriesByRoomS.zcount(pipe, room_id, '-inf', f'({cutoff}')
+            _, count, *expired = await pipe.execute()
+        if self.get_history_excess(count, expired[0] if expired else 0) > settings.redis_history_trim_slack:
+            await self.trim_histories_by_room(room_id)
+
+    @staticmethod
+    def get_history_excess(count: int, expired: int = 0) -> int:
+        # 유지 범위를 넘어, 오래된 순으로 삭제할 내역 수
+        excess = count - settings.redis_history_max_count if settings.redis_history_max_count else 0
+        return max(excess, expired)
+
+    async def trim_histories_by_room(self, room_id: int):
+        """유지 범위를 넘은 내역은 DB 저장을 확인한 뒤 ZREMRANGEBYRANK 로 삭제"""
+        redis = await self.redis
+        async with await self.lock(key=RedisChatHistoriesByRoomS.get_lock_key(room_id)):
+            cutoff: Optional[float] = RedisChatHistoriesByRoomS.get_cutoff()
+            excess: int = self.get_history_excess(
+                await RedisChatHistoriesByRoomS.zcard(redis, room_id),
+                await RedisChatHistoriesByRoomS.zcount(redis, room_id, '-inf', f'({cutoff}') if cutoff else 0
+            )
+            if excess <= 0:
+                return
+            # 새 내역은 가장 높은 순위로 추가되므로, 조회한 낮은 순위 범위는 삭제 전까지 유지
+            histories: List[RedisChatHistoryByRoomS] = await RedisChatHistoriesByRoomS.zrange(
+                redis, room_id, 0, excess - 1
+            )
+            await self.persist_histories_by_room(room_id, histories)
+            await RedisChatHistoriesByRoomS.zremrangebyrank(redis, room_id, 0, excess - 1)
+
+    @staticmethod
+    async def persist_histories_by_room(room_id: int, histories: List[RedisChatHistoryByRoomS]):
+        """
+        Redis 에만 있는 대화 내역 DB 저장 및 활성화 여부 반영
+        - 요청 처리 중인 세션을 커밋하지 않도록, 전용 세션에서 저장
+        - 저장 후 다시 조회해 모든 내역이 DB 에 있는지 확인 (확인되지 않는 경우 RuntimeError)
+        """
+        if not histories:
+            return
+        redis_ids = {h.redis_id for h in histories}
+
+        async with async_session() as session:
+            crud = ChatHistoryCRUD(session)
+
+            async def _saved_redis_ids():
+                rows = await crud.list(
+                    conditions=(ChatHistory.room_id == room_id, ChatHistory.redis_id.in_(redis_ids)),
+                    with_only_columns=(ChatHistory.redis_id,),
+                    read_only=False,
+                    use_cache=False
+                )
+                return {r.redis_id for r in rows}
+
+            saved = await _saved_redis_ids()
+            unsaved = [h for h in histories if h.redis_id not in saved]
+            if unsaved:
+                await crud.bulk_create([
+                    dict(
+                        redis_id=h.redis_id,
+                        room_id=room_id,
+                        user_profile_id=h.user_profile_id,
+                        contents=h.contents,
+                        type=ChatHistoryType.get_by_name(h.type),
+                        is_active=h.is_active,
+                        created=datetime.fromtimestamp(h.timestamp).astimezone()
+                    ) for h in unsaved
+                ])
+            # Redis 에서만 변경된 활성화 여부 (대화 내역 patch)
+            for is_active in (True, False):
+                changed = [h.redis_id for h in histories if h.redis_id in saved and h.is_active is is_active]
+                if changed:
+                    await crud.update(
+                        conditions=(ChatHistory.redis_id.in_(changed), ChatHistory.is_active != is_active),
+                        is_active=is_active
+                    )
+            await session.commit()
+
+            if await _saved_redis_ids() != redis_ids:
+                raise RuntimeError(f'Failed to persist chat histories. room_id: {room_id}')
+
+    async def sync_histories_by_room(self, room_id: int, session: AsyncSession):
+        """
+        대화방 최근 사용 시각 갱신 및, Redis 에서 삭제된 대화방인 경우 DB 에서 최근 내역 복원
+        - 복원 여부는 최근 사용 대화방 목록(rooms:last_access)으로 확인
+        """
+        redis = await self.redis
+        if await RedisChatRoomsByAccessS.zadd(redis, None, {room_id: time.time()}, xx=True, ch=True):
+            return
+
+        async with await self.lock(key=RedisChatHistoriesByRoomS.get_lock_key(room_id)):
+            # 다른 요청이 먼저 복원했거나, 삭제 중 추가된 내역이 있는 경우 복원하지 않음
+            if not await RedisChatHistoriesByRoomS.zcard(redis, room_id):
+                conditions = (ChatHistory.room_id == room_id,)
+                if cutoff := RedisChatHistoriesByRoomS.get_cutoff():
+                    conditions += (ChatHistory.created >= datetime.fromtimestamp(cutoff).astimezone(),)
+                histories_db: List[ChatHistory] = await ChatHistoryCRUD(session).list(
+                    conditions=conditions,
+                    limit=settings.redis_history_max_count,
+                    order_by=(ChatHistory.created.desc(), ChatHistory.id.desc()),
+                    options=[selectinload(ChatHistory.files)],
+                    read_only=True
+                )
+                if histories_db:
+                    read_cursors = await ChatRoomReadCursorCRUD(session).list(
+                        conditions=(ChatRoomReadCursor.room_id == room_id,)
+                    )
+                    await RedisChatHistoriesByRoomS.zadd(redis, room_id, [
+                        await RedisChatHistoryByRoomS.from_model(m, read_cursors) for m in histories_db
+                    ])
+            await RedisChatRoomsByAccessS.zadd(redis, None, {room_id: time.time()})
+
+    async def evict_histories_by_room(self, room_id: int, last_access: float) -> bool:
+        """
+        유휴 대화방의 대화 내역을 DB 저장 확인 후 Redis 에서 삭제
+        - 삭제 중 추가된 내역이 있는 경우, 사용 중인 대화방으로 유지
+        """
+        redis = await self.redis
+        async with await self.lock(key=RedisChatHistoriesByRoomS.get_lock_key(room_id)):
+            # 삭제 중 추가되는 내역은 먼저 대화방 복원을 시도하므로, 잠금 해제 이후 처리
+            await RedisChatRoomsByAccessS.zrem(redis, None, room_id)
+            try:
+                views: List[SchemaView] = await RedisChatHistoriesByRoomS.zrange(redis, room_id, lazy=True)
+                await self.persist_histories_by_room(room_id, [v.to_schema() for v in views])
+            except Exception:
+                await RedisChatRoomsByAccessS.zadd(redis, None, {room_id: last_access})
+                raise
+            if views:
+                await RedisChatHistoriesByRoomS.zrem(redis, room_id, *[v.raw for v in views])
+            if await RedisChatHistoriesByRoomS.zcard(redis, room_id):
+                await RedisChatRoomsByAccessS.zadd(redis, None, {room_id: time.time()})
+                return False
+        return True
+
+    async def get_last_history_by_room(self, room_id: int, session: AsyncSession) -> Optional[Dict[str, Any]]:
+        """대화방 목록 미리보기용 최근 내역 (Redis 에서 삭제된 대화방은 DB 조회)"""
+        views: List[SchemaView] = await RedisChatHistoriesByRoomS.zrevrange(
+            await self.redis, room_id, 0, 0, stale_ok=True, fields=RedisChatHistoriesByRoomS.preview_fields
+        )
+        if views:
+            return views[0].dict()
+        histories_db: List[ChatHistory] = await ChatHistoryCRUD(session).list(
+            conditions=(ChatHistory.room_id == room_id,),
+            limit=1,
+            order_by=(ChatHistory.created.desc(), ChatHistory.id.desc()),
+            options=[selectinload(ChatHistory.files)],
+            read_only=True
+        )
+        if histories_db:
+            history: RedisChatHistoryByRoomS = await RedisChatHistoryByRoomS.from_model(histories_db[0])
+            return history.dict(include=set(RedisChatHistoriesByRoomS.preview_fields))
+        return None
+
     # 유저 채팅방 unread_msg_cnt 업데이트
     async def update_unread_msg_cnt(
         self,
@@ -526,9 +701,9 @@ class AsyncRedisHandler:
         async with await self.lock(key=RedisChatHistoriesByRoomS.get_lock_key(room_id)):
             patch_histories_redis = await self.patch_unsync_read_by_room(room_id, room_redis)
             if patch_histories_redis:
-                redis = await self.redis
-                await redis.publish(
-                    RedisChatRoomPubSubS.get_key(room_id),
+                await RedisChatRoomPubSubS.publish(
+                    await self.redis,
+                    room_id,
                     ChatSendFormS(
                         type=ChatType.PATCH,
                         data=ChatSendDataS(patch_histories=patch_histories_redis)
@@ -543,21 +718,28 @@ class AsyncRedisHandler:
         self,
         room_id: int,
         room: RedisChatRoomInfoS
-    ) -> List[Tuple[RedisChatHistoryByRoomS, List[int]]]:
-        # 최근 읽음 처리 동기화 안된 채팅 내역 추출
-        chat_histories_redis: List[RedisChatHistoryByRoomS] = (
-            await RedisChatHistoriesByRoomS.zrevrange(await self.redis, room_id)
-        )
-        unsync: List[Tuple[RedisChatHistoryByRoomS, List[int]]] = []
-        for h in chat_histories_redis:
-            if (
-                len(set(h.read_user_ids) & set(room.connected_profile_ids))
-                != len(room.connected_profile_ids)
-            ):
-                sync_read_user_ids = list(set(h.read_user_ids) | set(room.connected_profile_ids))
-                unsync.append((h, sync_read_user_ids))
-            else:
+    ) -> List[Tuple[SchemaView, List[int]]]:
+        # 최근 읽음 처리 동기화 안된 채팅 내역 추출 (읽은 유저 목록만 생성, 최근 내역부터 페이지 단위 조회)
+        unsync: List[Tuple[SchemaView, List[int]]] = []
+        end: int = RedisChatHistoriesByRoomS.get_window_end()
+        start = 0
+        while end < 0 or start <= end:
+            stop = start + self.unsync_page_size - 1
+            chat_histories_redis: List[SchemaView] = await RedisChatHistoriesByRoomS.zrevrange(
+                await self.redis, room_id, start, stop if end < 0 else min(stop, end), lazy=True
+            )
+            for h in chat_histories_redis:
+                if (
+                    len(set(h.read_user_ids) & set(room.connected_profile_ids))
+                    != len(room.connected_profile_ids)
+                ):
+                    sync_read_user_ids = list(set(h.read_user_ids) | set(room.connected_profile_ids))
+                    unsync.append((h, sync_read_user_ids))
+                else:
+                    return unsync
+            if len(chat_histories_redis) < self.unsync_page_size:
                 break
+            start += self.unsync_page_size
         return unsync
 
     async def patch_unsync_read_by_room(
@@ -570,8 +752,10 @@ class AsyncRedisHandler:
         if unsync_histories:
             async with await self.pipeline() as pipe:
                 unsync, sync = [], []
-                async for history, read_user_ids in async_iter(unsync_histories):
-                    unsync.append(deepcopy(history))
+                async for view, read_user_ids in async_iter(unsync_histories):
+                    # 저장된 값 그대로 삭제
+                    unsync.append(view.raw)
+                    history: RedisChatHistoryByRoomS = view.to_schema()
                     history.read_user_ids = read_user_ids
                     sync.append(history)
                     patch_histories_redis.append(RedisChatHistoryPatchS(
@@ -0,0 +1,145 @@
+import json
+import math
+import zipfile
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator, Deque, List, Optional, Set, Tuple
+
+from sqlalchemy import select, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, sessionmaker
+
+from server.api.common import AsyncRedisHandler
+from server.core.externals.redis.schemas import RedisChatHistoryByRoomS, RedisChatHistoriesByRoomS
+from server.crud.service import ChatRoomReadCursorCRUD
+from server.db.databases import settings, get_replica_session
+from server.models import ChatHistory, ChatRoomReadCursor
+
+
+class ZipStream:
+    """
+    쓰는 즉시 꺼내갈 수 있는 zip 출력 버퍼
+    - seek/tell 이 없으면 zipfile 은 data descriptor 방식으로 기록하므로, 전체 압축 파일을 메모리에 두지 않음
+    """
+
+    def __init__(self):
+        self._chunks: Deque[bytes] = deque()
+
+    def write(self, b: bytes) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ChatHistoryExporter:
+    """
+    대화방 전체 대화 내역 내보내기
+    - MySQL 내역은 (created, id) 키셋 페이지네이션으로 batch_size 단위 조회 후, Redis 최근 내역과 시간순 병합
+    - 배치 단위로 직렬화해 전송하므로, 대화 수와 관계없이 메모리 사용량 일정
+    """
+
+    batch_size = settings.chat_export_batch_size
+
+    def __init__(self, redis_handler: AsyncRedisHandler, session: AsyncSession, room_id: int):
+        self.redis_handler = redis_handler
+        self.session = session
+        self.room_id = room_id
+
+    async def histories(self) -> AsyncIterator[List[RedisChatHistoryByRoomS]]:
+        # Redis 최근 내역 (DB 에도 저장된 내역은 Redis 기준)
+        hot: Deque[RedisChatHistoryByRoomS] = deque(
+            await RedisChatHistoriesByRoomS.zrange(
+                await self.redis_handler.redis, self.room_id, stale_ok=True
+            ) or []
+        )
+        hot_redis_ids: Set[str] = {h.redis_id for h in hot}
+
+        # 내보내기는 오래 걸리므로, 복제 DB 가 있으면 복제 DB 에서 조회
+        replica_session: Optional[sessionmaker] = get_replica_session(self.session, read_only=True)
+        if replica_session is None:
+            async for batch in self._histories(self.session, hot, hot_redis_ids):
+                yield batch
+        else:
+            async with replica_session() as session:
+                async for batch in self._histories(session, hot, hot_redis_ids):
+                    yield batch
+
+        while hot:
+            yield [hot.popleft() for _ in range(min(self.batch_size, len(hot)))]
+
+    async def _histories(
+        self, session: AsyncSession, hot: Deque[RedisChatHistoryByRoomS], hot_redis_ids: Set[str]
+    ) -> AsyncIterator[List[RedisChatHistoryByRoomS]]:
+        read_cursors: List[ChatRoomReadCursor] = await ChatRoomReadCursorCRUD(session).list(
+            conditions=(ChatRoomReadCursor.room_id == self.room_id,)
+        )
+        last: Optional[ChatHistory] = None
+        while True:
+            # 한 연결에서 서버 측 커서를 연 채로 파일을 조회할 수 없으므로, 배치마다 조회를 끝낸 뒤 파일 IN 조회
+            stmt = (
+                select(ChatHistory)
+                .where(ChatHistory.room_id == self.room_id)
+                .order_by(ChatHistory.created, ChatHistory.id)
+                .limit(self.batch_size)
+                .options(selectinload(ChatHistory.files))
+            )
+            if last is not None:
+                stmt = stmt.where(or_(
+                    ChatHistory.created > last.created,
+                    and_(ChatHistory.created == last.created, ChatHistory.id > last.id)
+                ))
+            partition: List[ChatHistory] = (await session.scalars(stmt)).all()
+            if not partition:
+                break
+            last = partition[-1]
+
+            batch: List[RedisChatHistoryByRoomS] = []
+            for m in partition:
+                if m.redis_id in hot_redis_ids:
+                    continue
+                key: Tuple[float, float] = (m.created.timestamp(), m.id)
+                while hot and self.merge_key(hot[0]) <= key:
+                    batch.append(hot.popleft())
+                batch.append(await RedisChatHistoryByRoomS.from_model(m, read_cursors))
+            if batch:
+                yield batch
+            # 이미 전송한 객체는 세션에서 제거 (요청 세션의 다른 객체는 유지)
+            for m in partition:
+                for f in m.files:
+                    session.expunge(f)
+                session.expunge(m)
+
+    @classmethod
+    def merge_key(cls, history: RedisChatHistoryByRoomS) -> Tuple[float, float]:
+        """
+        DB 내역과 같은 기준의 (created, id) 정렬 키
+        - DB 의 created 는 초 단위이므로, 같은 초의 내역은 id 순 (DB 에 저장되지 않은 내역은 마지막)
+        """
+        return math.floor(history.timestamp), history.id if history.id is not None else math.inf
+
+    async def ndjson(self) -> AsyncIterator[bytes]:
+        async for batch in self.histories():
+            yield ''.join(h.json() + '\n' for h in batch).encode()
+
+    async def zip(self) -> AsyncIterator[bytes]:
+        stream = ZipStream()
+        count = 0
+        with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            with archive.open(f'room_{self.room_id}/histories.ndjson', 'w', force_zip64=True) as f:
+                async for batch in self.histories():
+                    f.write(''.join(h.json() + '\n' for h in batch).encode())
+                    count += len(batch)
+                    yield stream.drain()
+            archive.writestr(f'room_{self.room_id}/manifest.json', json.dumps({
+                'room_id': self.room_id,
+                'count': count,
+                'exported_at': datetime.now().astimezone().isoformat()
+            }))
+        yield stream.drain()
@@ -1,43 +1,52 @@
 import asyncio
 import json
 import logging
+import uuid
 from datetime import datetime
 from itertools import groupby
-from typing import List, Set, Dict, Any
+from typing import List, Set, Dict, Any, Optional
 
 from aioredis import Redis
 from aioredis.client import PubSub
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
 from fastapi import WebSocket, WebSocketDisconnect
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload, selectinload
 from starlette import status
-from starlette.responses import HTMLResponse
+from starlette.responses import HTMLResponse, StreamingResponse
 from websockets.exceptions import WebSocketException
 
 from server.api import ExceptionHandlerRoute, templates
 from server.api.common import AuthValidator, AsyncRedisHandler, WebSocketHandler, get_async_redis_handler
+from server.api.export import ChatHistoryExporter
 from server.api.websocket.chat.decorator import ChatHandlerDecorator
-from server.core.authentications import cookie, RoleChecker
-from server.core.enums import UserType, ChatType
+from server.api.websocket.chat.file import FileHandler
+from server.core.authentications import cookie, RoleChecker, verifier
+from server.core.enums import UserType, ChatType, ChatHistoryType
 from server.core.exceptions import ExceptionHandler
 from server.core.externals.redis.schemas import (
     RedisUserProfilesByRoomS,
-    RedisChatHistoriesByRoomS, RedisUserProfileByRoomS, RedisChatHistoryByRoomS,
+    RedisUserProfileByRoomS, RedisChatHistoryByRoomS,
     RedisChatRoomsByUserProfileS, RedisFollowingsByUserProfileS,
     RedisFollowingByUserProfileS, RedisUserImageFileS, RedisChatRoomByUserProfileS, RedisInfoByRoomS,
-    RedisChatRoomInfoS, RedisChatRoomPubSubS, RedisChatRoomListS
+    RedisChatRoomInfoS, RedisChatRoomPubSubS, RedisChatRoomListS, RedisDirectRoomS, RedisDirectRoomByMemberKeyS
 )
 from server.crud.service import (
-    ChatRoomUserAssociationCRUD, ChatRoomCRUD
+    ChatRoomUserAssociationCRUD, ChatRoomCRUD, ChatHistoryCRUD
 )
 from server.crud.user import UserProfileCRUD
-from server.db.databases import get_async_session, async_session
+from server.db.databases import get_async_session, async_session, settings
 from server.models import (
-    User, UserProfile, ChatRoom, ChatRoomUserAssociation, UserRelationship
+    User, UserProfile, ChatRoom, ChatRoomUserAssociation, UserRelationship, UserSession, ChatHistory,
+    ChatHistoryFile
+)
+from server.schemas.base import S3MediaPresignedPostS
+from server.schemas.chat import (
+    ChatSendFormS, ChatSendDataS, ChatReceiveFormS, ChatRoomCreateParamS, ChatFilePresignedCreateS,
+    ChatFilePresignedS, ChatFileConfirmS
 )
-from server.schemas.chat import ChatSendFormS, ChatSendDataS, ChatReceiveFormS, ChatRoomCreateParamS
 from server.schemas.service import ChatRoomS
 
 router = APIRouter(route_class=ExceptionHandlerRoute)
@@ -73,7 +82,7 @@ async def chat_room_by_profile(
         raise_exception=True
     )
     profiles_by_room_redis: List[RedisUserProfileByRoomS] = await RedisUserProfilesByRoomS.smembers(
-        await redis_handler.redis, (room_id, user_profile_id)
+        await redis_handler.redis, (room_id, user_profile_id), stale_ok=True
     )
     room_name: str | None = (
         room_by_profile_redis.name
@@ -131,15 +140,16 @@ async def chat_rooms(
 
                         crud_room = ChatRoomCRUD(session)
                         for room_by_profile_redis in rooms_by_profile_redis:
+                            # 대화방 목록은 주기적으로 다시 전송하므로, 복제 노드에서 조회
                             room, _ = await redis_handler.sync_room(
-                                room_by_profile_redis.id, crud_room, lock=False
+                                room_by_profile_redis.id, crud_room, lock=False, stale_ok=True
                             )
                             if not room:
                                 continue
 
                             profiles_by_room_redis: List[RedisUserProfileByRoomS] = (
                                 await RedisUserProfilesByRoomS.smembers(
-                                    await redis_handler.redis, (room.id, user_profile_id)
+                                    await redis_handler.redis, (room.id, user_profile_id), stale_ok=True
                                 )
                             )
                             room_name: str = (
@@ -149,14 +159,9 @@ async def chat_rooms(
                                 )
                             )
 
-                            chat_histories: List[RedisChatHistoryByRoomS] = (
-                                await RedisChatHistoriesByRoomS.zrevrange(
-                                    await redis_handler.redis, room_by_profile_redis.id, 0, 1
-                                )
+                            last_chat_history: Optional[Dict[str, Any]] = (
+                                await redis_handler.get_last_history_by_room(room_by_profile_redis.id, session)
                             )
-                            last_chat_history = None
-                            if chat_histories:
-                                last_chat_history = chat_histories[0]
 
                             obj: Dict[str, Any] = room_by_profile_redis.dict()
                             obj.update(dict(
@@ -165,7 +170,7 @@ async def chat_rooms(
                                 user_profiles=profiles_by_room_redis,
                                 user_profile_files=room and room.user_profile_files,
                                 last_chat_history=last_chat_history,
-                                last_chat_timestamp=last_chat_history and last_chat_history.timestamp
+                                last_chat_timestamp=last_chat_history and last_chat_history['timestamp']
                             ))
                             result.append(RedisChatRoomListS(**obj))
                 await ws_handler.send_json(jsonable_encoder(ChatSendFormS(
@@ -204,6 +209,49 @@ async def chat_rooms(
             task.cancel()
 
 
+async def get_direct_room(
+    member_key: str,
+    crud_room: ChatRoomCRUD,
+    redis_handler: AsyncRedisHandler
+) -> ChatRoom | None:
+    """구성원 키로 1:1 혹은 나와의 대화방 조회 (Redis → DB)"""
+    redis: Redis = await redis_handler.redis
+    conditions = (ChatRoom.member_key == member_key, ChatRoom.is_active == 1)
+    direct_room_redis: RedisDirectRoomS | None = await RedisDirectRoomByMemberKeyS.get(redis, member_key)
+    if direct_room_redis:
+        conditions += (ChatRoom.id == direct_room_redis.id,)
+    try:
+        room: ChatRoom = await crud_room.get(conditions=conditions)
+    except HTTPException:
+        if direct_room_redis:
+            await RedisDirectRoomByMemberKeyS.delete(redis, member_key)
+            return await get_direct_room(member_key, crud_room, redis_handler)
+        return None
+
+    if not direct_room_redis:
+        await RedisDirectRoomByMemberKeyS.set(redis, member_key, RedisDirectRoomS(id=room.id))
+    return room
+
+
+async def sync_direct_room(
+    room: ChatRoom,
+    profile_ids: Set[int],
+    crud_room_user_mapping: ChatRoomUserAssociationCRUD,
+    redis_handler: AsyncRedisHandler
+) -> ChatRoomS:
+    async with await redis_handler.pipeline() as pipe:
+        for profile_id in profile_ids:
+            _, pipe = await redis_handler.sync_room_by_user_profile(
+                room.id, profile_id, crud_room_user_mapping, pipe=pipe
+            )
+            _, pipe = await redis_handler.sync_user_profiles_in_room(
+                room.id, profile_id, crud_room_user_mapping, pipe=pipe
+            )
+        if pipe:
+            await pipe.execute()
+    return ChatRoomS.from_orm(room)
+
+
 @router.post(
     '/rooms/create',
     dependencies=[Depends(cookie), Depends(RoleChecker([UserType.USER]))],
@@ -247,38 +295,25 @@ async def chat_room_create(
     mapping_profile_ids: Set[int] = set(data.target_profile_ids + [data.user_profile_id])
 
     # 1:1 방 혹은 나와의 채팅방 생성 시, 기존 방 있다면 리턴
+    member_key: str | None = None
     if len(mapping_profile_ids) <= 2:
-        active_rooms: List[ChatRoom] = await crud_room.list(
-            conditions=(ChatRoom.is_active == 1,),
-            options=[selectinload(ChatRoom.user_profiles).load_only('user_profile_id')],
-            order_by=(ChatRoom.created.desc(),)
-        )
-        room: ChatRoom | None = None
-        for r in active_rooms:
-            if r.user_profiles:
-                profile_ids: Set[int] = {m.user_profile_id for m in r.user_profiles}
-                if (
-                    len(profile_ids) == len(mapping_profile_ids)
-                    and len(profile_ids - mapping_profile_ids) == 0
-                ):
-                    room = r
-                    break
+        member_key = ChatRoom.generate_member_key(mapping_profile_ids)
+        room: ChatRoom | None = await get_direct_room(member_key, crud_room, redis_handler)
         if room:
-            async with await redis_handler.pipeline() as pipe:
-                for profile_id in mapping_profile_ids:
-                    _, pipe = await redis_handler.sync_room_by_user_profile(
-                        room.id, profile_id, crud_room_user_mapping, pipe=pipe
-                    )
-                    _, pipe = await redis_handler.sync_user_profiles_in_room(
-                        room.id, profile_id, crud_room_user_mapping, pipe=pipe
-                    )
-                if pipe:
-                    await pipe.execute()
-            return ChatRoomS.from_orm(room)
+            return await sync_direct_room(room, mapping_profile_ids, crud_room_user_mapping, redis_handler)
 
     # 채팅방 생성 이후 유저와 채팅방 연결
-    room: ChatRoom = await crud_room.create(type=data.type)
-    await session.flush()
+    room: ChatRoom = await crud_room.create(type=data.type, member_key=member_key)
+    try:
+        await session.flush()
+    except IntegrityError:
+        # 동시에 같은 구성원의 1:1 방이 생성된 경우, 먼저 생성된 방 리턴
+        await session.rollback()
+        room: ChatRoom | None = await get_direct_room(member_key, crud_room, redis_handler)
+        if room is None:
+            # 같은 구성원 키의 방이 비활성화 되어 있는 경우
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail='Direct room is not available.')
+        return await sync_direct_room(room, mapping_profile_ids, crud_room_user_mapping, redis_handler)
     room: ChatRoom = await crud_room.get(
         conditions=(ChatRoom.id == room.id,),
         options=[
@@ -381,6 +416,132 @@ async def chat_room_create(
     return ChatRoomS.from_orm(room)
 
 
+@router.post(
+    '/files/presigned/{room_id}',
+    dependencies=[Depends(cookie)],
+    response_model=ChatFilePresignedS,
+    status_code=status.HTTP_201_CREATED
+)
+async def chat_file_presigned(
+    room_id: int,
+    data: ChatFilePresignedCreateS,
+    user_session: UserSession = Depends(verifier),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    대화방 파일 S3 직접 업로드 URL 발급
+    1) 비활성화 상태의 대화 내역 및 파일 생성
+    2) 파일 별 presigned POST 발급
+    3) 업로드 완료 후, 확인 요청 (/files/confirm)
+    """
+    # 권한 검증
+    AuthValidator.get_user_profile(user_session, data.user_profile_id)
+    await ChatRoomUserAssociationCRUD(session).get(
+        conditions=(
+            ChatRoomUserAssociation.room_id == room_id,
+            ChatRoomUserAssociation.user_profile_id == data.user_profile_id
+        )
+    )
+    if not data.files:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Empty files.')
+
+    chat_history_db: ChatHistory = await ChatHistoryCRUD(session).create(
+        redis_id=uuid.uuid4().hex,
+        room_id=room_id,
+        user_profile_id=data.user_profile_id,
+        type=ChatHistoryType.FILE,
+        is_active=False
+    )
+    await session.flush()
+    await session.refresh(chat_history_db)
+
+    chat_files_db: List[ChatHistoryFile] = []
+    for idx, f in enumerate(data.files, 1):
+        chat_files_db.append(await ChatHistoryFile.new_presigned(
+            session,
+            f.filename,
+            f.content_type,
+            root='chat_upload/',
+            uploaded_by_id=data.user_profile_id,
+            bucket_name=settings.aws_storage_bucket_name,
+            chat_history_id=chat_history_db.id,
+            order=idx
+        ))
+    session.add_all(chat_files_db)
+    await session.commit()
+    for o in chat_files_db:
+        await session.refresh(o)
+
+    return ChatFilePresignedS(
+        chat_history_id=chat_history_db.id,
+        files=[S3MediaPresignedPostS(id=o.id, **o.presigned_post()) for o in chat_files_db]
+    )
+
+
+@router.post('/files/confirm/{room_id}/{chat_history_id}', dependencies=[Depends(cookie)])
+async def chat_file_confirm(
+    room_id: int,
+    chat_history_id: int,
+    data: ChatFileConfirmS,
+    user_session: UserSession = Depends(verifier),
+    session: AsyncSession = Depends(get_async_session),
+    redis_handler: AsyncRedisHandler = Depends(get_async_redis_handler)
+):
+    """
+    대화방 파일 S3 직접 업로드 완료 확인
+    - 대화 내역 활성화 후, 대화방에 파일 전송
+    """
+    # 권한 검증
+    AuthValidator.get_user_profile(user_session, data.user_profile_id)
+    try:
+        chat_history_redis: RedisChatHistoryByRoomS = await FileHandler.confirm_presigned(
+            redis_handler, session, room_id, chat_history_id, data.user_profile_id
+        )
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+    await RedisChatRoomPubSubS.publish(
+        await redis_handler.redis,
+        room_id,
+        ChatSendFormS(
+            type=ChatType.FILE,
+            data=ChatSendDataS(history=chat_history_redis)
+        ).json()
+    )
+    return chat_history_redis
+
+
+@router.get('/export/{user_profile_id}/{room_id}', dependencies=[Depends(cookie)])
+async def chat_history_export(
+    user_profile_id: int,
+    room_id: int,
+    export_format: str = Query('ndjson', alias='format', regex='^(ndjson|zip)$'),
+    user_session: UserSession = Depends(verifier),
+    session: AsyncSession = Depends(get_async_session),
+    redis_handler: AsyncRedisHandler = Depends(get_async_redis_handler)
+):
+    """
+    대화방 전체 대화 내역 내보내기 (NDJSON 혹은 zip, 첨부 파일은 링크로 포함)
+    """
+    # 권한 검증
+    AuthValidator.get_user_profile(user_session, user_profile_id)
+    await ChatRoomUserAssociationCRUD(session).get(
+        conditions=(
+            ChatRoomUserAssociation.room_id == room_id,
+            ChatRoomUserAssociation.user_profile_id == user_profile_id
+        )
+    )
+
+    exporter = ChatHistoryExporter(redis_handler, session, room_id)
+    if export_format == 'zip':
+        return StreamingResponse(exporter.zip(), media_type='application/zip', headers={
+            'Content-Disposition': f'attachment; filename="room_{room_id}.zip"'
+        })
+    return StreamingResponse(exporter.ndjson(), media_type='application/x-ndjson', headers={
+        'Content-Disposition': f'attachment; filename="room_{room_id}.ndjson"'
+    })
+
+
 @router.websocket('/conversation/{user_profile_id}/{room_id}')
 async def chat(
     websocket: WebSocket,
@@ -582,8 +743,11 @@ async def chat_followings(
     async def producer_handler():
         while True:
             try:
+                # 주기적으로 다시 조회하므로, 복제 지연 허용
                 duplicated_followings: List[RedisFollowingByUserProfileS] = (
-                    await RedisFollowingsByUserProfileS.smembers(await redis_handler.redis, user_profile_id)
+                    await RedisFollowingsByUserProfileS.smembers(
+                        await redis_handler.redis, user_profile_id, stale_ok=True
+                    )
                 )
                 followings: List[RedisFollowingByUserProfileS] = []
                 if duplicated_followings:
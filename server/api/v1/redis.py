@@ -1,9 +1,13 @@
-from typing import List, Optional
+from typing import Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from starlette.responses import StreamingResponse
 
 from server.api import ExceptionHandlerRoute
 from server.api.common import AsyncRedisHandler, get_async_redis_handler
+from server.core.authentications import cookie, RoleChecker
+from server.core.enums import UserType
+from server.core.externals.redis.keyspace import KeyspaceReport
 from server.core.externals.redis.schemas import (
     RedisUserProfilesByRoomS, RedisChatRoomsByUserProfileS, RedisChatHistoriesByRoomS,
     RedisFollowingsByUserProfileS, RedisInfoByRoomS
@@ -14,10 +18,30 @@ router = APIRouter(route_class=ExceptionHandlerRoute)
 
 @router.get('/rooms')
 async def chat_rooms(redis_handler: AsyncRedisHandler = Depends(get_async_redis_handler)):
-    room_keys: List[str] = (await RedisInfoByRoomS.scan(await redis_handler.redis))[1]
-    if not room_keys:
-        return []
-    return [await RedisInfoByRoomS.hgetall(await redis_handler.redis, key, raw_key=True) for key in room_keys]
+    redis = await redis_handler.redis
+    return [
+        await RedisInfoByRoomS.hgetall(redis, key, raw_key=True, stale_ok=True)
+        async for room_keys in RedisInfoByRoomS.scan_batches(redis, stale_ok=True)
+        for key in room_keys
+    ]
+
+
+@router.get('/keyspace', dependencies=[Depends(cookie), Depends(RoleChecker([UserType.ADMIN]))])
+async def keyspace(
+    match: Optional[str] = None,
+    count: Optional[int] = Query(default=None, gt=0),
+    sample_rate: float = Query(default=1.0, gt=0, le=1),
+    samples: int = Query(default=5, ge=0),
+    top: int = Query(default=10, gt=0),
+    redis_handler: AsyncRedisHandler = Depends(get_async_redis_handler)
+):
+    # 키 종류별 키 수, 메모리 사용량, 큰 키 (복제 노드가 있으면 복제 노드에서 조회)
+    redis = await redis_handler.redis
+    report = KeyspaceReport(
+        redis.replica() if hasattr(redis, 'replica') else redis,
+        match=match, count=count, sample_rate=sample_rate, samples=samples, top=top
+    )
+    return StreamingResponse(report.ndjson(), media_type='application/x-ndjson')
 
 
 @router.get('/rooms/{room_id}')
@@ -25,7 +49,7 @@ async def chat_room(
     room_id: int,
     redis_handler: AsyncRedisHandler = Depends(get_async_redis_handler)
 ):
-    return await RedisInfoByRoomS.hgetall(await redis_handler.redis, room_id)
+    return await RedisInfoByRoomS.hgetall(await redis_handler.redis, room_id, stale_ok=True)
 
 
 @router.get('/rooms/user_profile/{user_profile_id}')
@@ -33,7 +57,7 @@ async def chat_rooms_by_user_profile(
     user_profile_id: int,
     redis_handler: AsyncRedisHandler = Depends(get_async_redis_handler)
 ):
-    return await RedisChatRoomsByUserProfileS.zrange(await redis_handler.redis, user_profile_id)
+    return await RedisChatRoomsByUserProfileS.zrange(await redis_handler.redis, user_profile_id, stale_ok=True)
 
 
 @router.get('/user_profiles/{room_id}/{user_profile_id}')
@@ -42,7 +66,9 @@ async def user_profiles_by_room(
     user_profile_id: int,
     redis_handler: AsyncRedisHandler = Depends(get_async_redis_handler)
 ):
-    return await RedisUserProfilesByRoomS.smembers(await redis_handler.redis, (room_id, user_profile_id))
+    return await RedisUserProfilesByRoomS.smembers(
+        await redis_handler.redis, (room_id, user_profile_id), stale_ok=True
+    )
 
 
 @router.get('/chats/{room_id}')
@@ -50,7 +76,7 @@ async def chat_histories_by_room(
     room_id: int,
     redis_handler: AsyncRedisHandler = Depends(get_async_redis_handler)
 ):
-    return await RedisChatHistoriesByRoomS.zrange(await redis_handler.redis, room_id)
+    return await RedisChatHistoriesByRoomS.zrange(await redis_handler.redis, room_id, stale_ok=True)
 
 
 @router.get('/followings/{user_profile_id}')
@@ -58,7 +84,7 @@ async def followings_by_user_profile(
     user_profile_id: int,
     redis_handler: AsyncRedisHandler = Depends(get_async_redis_handler)
 ):
-    return await RedisFollowingsByUserProfileS.smembers(await redis_handler.redis, user_profile_id)
+    return await RedisFollowingsByUserProfileS.smembers(await redis_handler.redis, user_profile_id, stale_ok=True)
 
 
 @router.delete('/followings/{user_profile_id}')
@@ -1,10 +1,22 @@
-from fastapi import APIRouter, Depends
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from starlette.responses import RedirectResponse
 
 from server.api import ExceptionHandlerRoute
-from server.crud.service import ChatRoomUserAssociationCRUD
+from server.core.authentications import cookie, backend, verifier, RoleChecker
+from server.core.enums import UserType
+from server.core.externals.redis import AioRedis
+from server.core.metrics import metrics
+from server.crud import CRUDBase
+from server.crud.service import ChatRoomUserAssociationCRUD, ChatHistoryFileCRUD
+from server.crud.user import UserProfileImageCRUD
 from server.db.databases import get_async_session
-from server.models import ChatRoomUserAssociation
+from server.models import (
+    ChatRoomUserAssociation, S3Media, ChatHistory, ChatHistoryFile, UserProfileImage, UserSession
+)
 from server.schemas.service import ChatRoomUserAssociationS
 
 router = APIRouter(route_class=ExceptionHandlerRoute)
@@ -26,3 +38,62 @@ async def get_room_user_mapping(
             ChatRoomUserAssociation.room_id == chat_room_id))
 
     return ChatRoomUserAssociationS.from_orm(room_user_mapping)
+
+
+# 이미지 크기 별 변형본 (최초 요청 시 생성 후 S3 에 저장)
+@router.get('/media/{media_id}/variants/{name}', dependencies=[Depends(cookie)])
+async def get_media_variant(
+    media_id: int,
+    name: str,
+    request: Request,
+    user_session: UserSession = Depends(verifier),
+    session: AsyncSession = Depends(get_async_session),
+):
+    # 대화방 파일은 대화방 참여자, 프로필 이미지는 본인만 조회 가능
+    user_profile_ids: List[int] = [p.id for p in user_session.user.profiles if p.is_active]
+    media: List[S3Media] = await ChatHistoryFileCRUD(session).list(
+        join=[
+            (ChatHistory, ChatHistory.id == ChatHistoryFile.chat_history_id),
+            (ChatRoomUserAssociation, ChatRoomUserAssociation.room_id == ChatHistory.room_id)
+        ],
+        conditions=(
+            ChatHistoryFile.id == media_id,
+            ChatHistoryFile.is_active == 1,
+            ChatRoomUserAssociation.user_profile_id.in_(user_profile_ids)
+        ),
+        limit=1,
+        use_cache=False
+    ) or await UserProfileImageCRUD(session).list(
+        conditions=(
+            UserProfileImage.id == media_id,
+            UserProfileImage.is_active == 1,
+            UserProfileImage.user_profile_id.in_(user_profile_ids)
+        ),
+        limit=1,
+        use_cache=False
+    )
+    # 다른 대화방 파일 존재 여부가 드러나지 않도록 권한이 없는 경우도 404
+    if not media:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Not found S3Media.')
+    if name not in media[0].variant_sizes or not media[0].content_type.startswith('image/'):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f'Not found variant. {name}')
+
+    webp = 'image/webp' in request.headers.get('accept', '')
+    url: str = await media[0].get_variant_url(name, webp=webp)
+    return RedirectResponse(url, headers={
+        'Cache-Control': f'private, max-age={S3Media.presigned_url_margin}',
+        'Vary': 'Accept'
+    })
+
+
+@router.get('/metrics', dependencies=[Depends(cookie), Depends(RoleChecker([UserType.ADMIN]))])
+async def get_metrics():
+    snapshot = metrics.snapshot()
+    snapshot.update({
+        'caches': [
+            S3Media.presigned_url_cache.info(), S3Media.variant_cache.info(), backend.cache.info(),
+            *CRUDBase.cache_info()
+        ],
+        'redis': AioRedis.topology_info()
+    })
+    return snapshot
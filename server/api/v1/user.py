@@ -1,8 +1,8 @@
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from uuid import uuid4, UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status, UploadFile, Body, Form
+from fastapi import APIRouter, Depends, HTTPException, Response, status, UploadFile, Body, Form, Query
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy import or_
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -15,15 +15,19 @@ from server.core.enums import ProfileImageType, RelationshipType, ResponseCode,
 from server.core.exceptions import ClassifiableException
 from server.core.externals.redis.schemas import RedisFollowingsByUserProfileS, RedisFollowingByUserProfileS, \
     RedisUserImageFileS
-from server.core.utils import verify_password, generate_random_string
-from server.crud.user import UserCRUD, UserProfileCRUD, UserRelationshipCRUD
+from server.core.utils import async_verify_password, generate_random_string
+from server.crud.user import (
+    UserCRUD, UserProfileCRUD, UserRelationshipCRUD, UserProfileImageCRUD, nickname_search_condition
+)
 from server.db.databases import get_async_session, settings
 from server.models import UserSession, UserProfileImage, User, UserProfile, UserRelationship
 from server.schemas.user import (
     UserS, UserSessionS, UserCreateS, UserProfileImageS, UserProfileS, UserRelationshipS,
     LoginUserS, UserRelationshipUpdateS, UserProfileSearchS, UserProfileSearchImageS, UserProfileSearchResponseS,
-    UserRelationshipSearchS, UserRelationshipSearchResponseS
+    UserRelationshipSearchS, UserRelationshipSearchResponseS, UserProfileImagePresignedCreateS,
+    UserProfileImageConfirmS
 )
+from server.schemas.base import S3MediaPresignedPostS
 
 router = APIRouter(route_class=ExceptionHandlerRoute)
 
@@ -141,7 +145,7 @@ async def login(data: SessionData, response: Response, session: AsyncSession = D
             ])
     except HTTPException:
         raise ClassifiableException(code=ResponseCode.INVALID_UID)
-    if not verify_password(data.password, user.password):
+    if not await async_verify_password(data.password, user.password):
         raise ClassifiableException(code=ResponseCode.INVALID_PASSWORD)
 
     await backend.create(session_id, data, session)
@@ -254,11 +258,78 @@ async def user_profile_image_upload(
     return [UserProfileImageS.from_orm(o) for o in objects]
 
 
+# 유저 프로필, 배경 이미지 S3 직접 업로드 URL 발급
+@router.post(
+    '/profile/image/upload/presigned',
+    dependencies=[Depends(cookie)],
+    response_model=S3MediaPresignedPostS,
+    status_code=status.HTTP_201_CREATED
+)
+async def user_profile_image_presigned(
+    data: UserProfileImagePresignedCreateS,
+    user_session: UserSession = Depends(verifier),
+    session=Depends(get_async_session)
+):
+    # 권한 검증
+    AuthValidator.get_user_profile(user_session, data.user_profile_id)
+
+    # 업로드 확인 되지 않고 만료된 이미지 정리
+    await UserProfileImage.delete_expired_presigned(
+        session, UserProfileImage.user_profile_id == data.user_profile_id
+    )
+    image: UserProfileImage = await UserProfileImage.new_presigned(
+        session,
+        data.filename,
+        data.content_type,
+        root='user_profile/',
+        uploaded_by_id=data.user_profile_id,
+        user_profile_id=data.user_profile_id,
+        type=ProfileImageType.get_by_name(data.image_type),
+        is_default=data.is_default,
+        bucket_name=settings.aws_storage_bucket_name
+    )
+    session.add(image)
+    await session.commit()
+    await session.refresh(image)
+
+    return S3MediaPresignedPostS(id=image.id, **image.presigned_post())
+
+
+# 유저 프로필, 배경 이미지 S3 직접 업로드 완료 확인
+@router.post('/profile/image/upload/confirm/{image_id}', dependencies=[Depends(cookie)])
+async def user_profile_image_confirm(
+    image_id: int,
+    data: UserProfileImageConfirmS,
+    user_session: UserSession = Depends(verifier),
+    session=Depends(get_async_session)
+):
+    # 권한 검증
+    AuthValidator.get_user_profile(user_session, data.user_profile_id)
+
+    crud = UserProfileImageCRUD(session)
+    image: UserProfileImage = await crud.get(
+        conditions=(
+            UserProfileImage.id == image_id,
+            UserProfileImage.user_profile_id == data.user_profile_id
+        )
+    )
+    try:
+        await image.confirm_upload()
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    await session.commit()
+    await session.refresh(image)
+
+    return UserProfileImageS.from_orm(image)
+
+
 @router.get('/profiles', dependencies=[Depends(cookie)],)
 async def search_user_profiles(
     user_profile_id: Optional[int] = None,
     identity_id: Optional[str] = None,
     nickname: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(settings.search_limit, ge=1, le=settings.search_max_limit),
     session: AsyncSession = Depends(get_async_session),
 ):
     crud_profile = UserProfileCRUD(session)
@@ -275,13 +346,17 @@ async def search_user_profiles(
     conditions = [UserProfile.is_active == 1]
     for k, v in request_s.values_except_null().items():
         if k == 'nickname':
-            conditions.append(getattr(UserProfile, k).ilike(f'%{v}%'))
+            conditions.append(nickname_search_condition(UserProfile.nickname, v))
         else:
             conditions.append(getattr(UserProfile, k) == v)
 
     user_profiles: List[UserProfile] = await crud_profile.list(
+        offset=offset,
+        limit=limit,
+        order_by=(UserProfile.id,),
         conditions=tuple(conditions),
-        options=[selectinload(UserProfile.images)]
+        options=[selectinload(UserProfile.images)],
+        read_only=True
     )
 
     result: List[UserProfileSearchResponseS] = []
@@ -502,6 +577,8 @@ async def search_relationship(
     favorites: Optional[bool] = None,
     is_hidden: Optional[bool] = False,
     is_forbidden: Optional[bool] = False,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(settings.search_limit, ge=1, le=settings.search_max_limit),
     user_session: UserSession = Depends(verifier),
     session: AsyncSession = Depends(get_async_session)
 ):
@@ -545,72 +622,83 @@ async def search_relationship(
         ))
 
     if request_s.nickname:
+        other_nickname = nickname_search_condition(UserRelationship.other_profile_nickname, request_s.nickname)
+        my_nickname = UserRelationship.my_profile.has(
+            nickname_search_condition(UserProfile.nickname, request_s.nickname)
+        )
         if request_s.follow_type == FollowType.FOLLOWING:
-            conditions.append(
-                UserRelationship.other_profile_nickname.ilike(f'%{request_s.nickname}%'),
-            )
+            conditions.append(other_nickname)
         elif request_s.follow_type == FollowType.FOLLOWER:
-            conditions.append(
-                UserRelationship.my_profile.has(UserProfile.nickname.ilike(f'%{request_s.nickname}%')),
-            )
+            conditions.append(my_nickname)
         else:
-            conditions.append(or_(
-                UserRelationship.other_profile_nickname.ilike(f'%{request_s.nickname}%'),
-                UserRelationship.my_profile.has(UserProfile.nickname.ilike(f'%{request_s.nickname}%'))
-            ))
+            conditions.append(or_(other_nickname, my_nickname))
+
+    # 결과에 필요한 쪽의 프로필 이미지만 로드
+    options = []
+    if request_s.follow_type != FollowType.FOLLOWING:
+        options.append(joinedload(UserRelationship.my_profile).selectinload(UserProfile.images))
+    if request_s.follow_type != FollowType.FOLLOWER:
+        options.append(joinedload(UserRelationship.other_profile).selectinload(UserProfile.images))
 
     relationships: List[UserRelationship] = await crud_relationship.list(
+        offset=offset,
+        limit=limit,
+        order_by=(UserRelationship.id,),
         conditions=tuple(conditions),
-        options=[
-            joinedload(UserRelationship.my_profile)
-            .selectinload(UserProfile.images),
-            joinedload(UserRelationship.my_profile)
-            .selectinload(UserProfile.followers),
-            joinedload(UserRelationship.other_profile)
-            .selectinload(UserProfile.images),
-            joinedload(UserRelationship.other_profile)
-            .selectinload(UserProfile.followers)
-        ]
+        options=options,
+        read_only=True
     )
 
-    result: List[UserRelationshipSearchResponseS] = []
+    rows: List[Tuple[UserRelationship, UserProfile]] = []
     for r in relationships:
         if request_s.follow_type:
-            profiles: List[UserProfile] = [
-                r.my_profile if request_s.follow_type == FollowType.FOLLOWER
-                else r.other_profile
-            ]
+            rows.append((r, r.my_profile if request_s.follow_type == FollowType.FOLLOWER else r.other_profile))
         else:
-            profiles: List[UserProfile] = [r.my_profile, r.other_profile]
-
-        for p in profiles:
-            image_urls = UserProfileImage.get_file_urls(*p.images)
-            images = [
-                UserProfileSearchImageS(
-                    id=im.id,
-                    url=next((u['url'] for u in image_urls if u['id'] == im.id), None),
-                    type=im.type,
-                    is_default=im.is_default,
-                    is_active=im.is_active
-                ) for im in p.images
-            ]
-            result.append(
-                UserRelationshipSearchResponseS(
-                    id=r.id,
-                    profile=UserProfileSearchResponseS(
-                        id=p.id,
-                        user_id=p.user_id,
-                        identity_id=p.identity_id,
-                        nickname=p.get_nickname_by_other(profile.id),
-                        status_message=p.status_message,
-                        images=images,
-                        is_default=p.is_default,
-                        is_active=p.is_active
-                    ),
-                    type=r.type,
-                    favorites=r.favorites,
-                    is_hidden=r.is_hidden,
-                    is_forbidden=r.is_forbidden
-                )
+            rows.extend([(r, r.my_profile), (r, r.other_profile)])
+
+    # 상대방에게 보여지는 닉네임은, 프로필 전체 팔로워 대신 내가 지정한 닉네임만 한 번에 조회
+    nicknames: Dict[int, str] = {}
+    other_profile_ids = {p.id for _, p in rows if p.id != profile.id}
+    if other_profile_ids:
+        followings: List[UserRelationship] = await crud_relationship.list(
+            conditions=(
+                UserRelationship.my_profile_id == profile.id,
+                UserRelationship.other_profile_id.in_(other_profile_ids),
+                UserRelationship.other_profile_nickname.isnot(None)
+            ),
+            read_only=True
+        )
+        nicknames = {f.other_profile_id: f.other_profile_nickname for f in followings}
+
+    result: List[UserRelationshipSearchResponseS] = []
+    for r, p in rows:
+        image_urls = UserProfileImage.get_file_urls(*p.images)
+        images = [
+            UserProfileSearchImageS(
+                id=im.id,
+                url=next((u['url'] for u in image_urls if u['id'] == im.id), None),
+                type=im.type,
+                is_default=im.is_default,
+                is_active=im.is_active
+            ) for im in p.images
+        ]
+        result.append(
+            UserRelationshipSearchResponseS(
+                id=r.id,
+                profile=UserProfileSearchResponseS(
+                    id=p.id,
+                    user_id=p.user_id,
+                    identity_id=p.identity_id,
+                    nickname=nicknames.get(p.id) or p.nickname,
+                    status_message=p.status_message,
+                    images=images,
+                    is_default=p.is_default,
+                    is_active=p.is_active
+                ),
+                type=r.type,
+                favorites=r.favorites,
+                is_hidden=r.is_hidden,
+                is_forbidden=r.is_forbidden
             )
+        )
     return result
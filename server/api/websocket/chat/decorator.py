@@ -55,8 +55,7 @@ class ChatHandlerDecorator(ChatHandler):
         if send_type == SendMessageType.UNICAST:
             await ws_handler.send_json(jsonable_encoder(response_s))
         elif send_type == SendMessageType.MULTICAST:
-            redis = await redis_handler.redis
-            await redis.publish(RedisChatRoomPubSubS.get_key(room_id), response_s.json())
+            await RedisChatRoomPubSubS.publish(await redis_handler.redis, room_id, response_s.json())
         else:
             self.handler.logger.warning(f'Invalid send type. {send_type}')
 
@@ -1,18 +1,20 @@
-import base64
 import uuid
 from datetime import datetime
-from io import BytesIO
-from typing import List
+from typing import List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from starlette import status
 
 from server.api.common import AsyncRedisHandler
 from server.api.websocket.chat import ChatHandler
-from server.core.enums import SendMessageType, ChatHistoryType
+from server.api.websocket.chat.media import MediaJobWorker
+from server.core.enums import SendMessageType, ChatHistoryType, MediaJobStatus
 from server.core.externals.redis.schemas import RedisChatHistoryFileS, RedisChatHistoryByRoomS, \
-    RedisChatHistoriesByRoomS, RedisChatRoomInfoS, RedisUserProfileByRoomS
-from server.crud.service import ChatHistoryCRUD, ChatRoomUserAssociationCRUD
-from server.db.databases import settings
+    RedisChatRoomInfoS, RedisUserProfileByRoomS, RedisMediaJobS, RedisMediaJobFileS
+from server.crud.service import ChatHistoryCRUD, ChatRoomUserAssociationCRUD, ChatRoomCRUD
 from server.models import ChatHistory, ChatHistoryFile
-from server.schemas.base import WebSocketFileS
 
 
 class FileHandler(ChatHandler):
@@ -21,14 +23,16 @@ class FileHandler(ChatHandler):
 
     async def handle(self, **kwargs):
         crud_chat_history = ChatHistoryCRUD(self.session)
-        crud_room_user_mapping = ChatRoomUserAssociationCRUD(self.session)
 
         redis_handler: AsyncRedisHandler = kwargs.get('redis_handler')
         user_profile_id: int = kwargs.get('user_profile_id')
         user_profiles_redis: List[RedisUserProfileByRoomS] = kwargs.get('user_profiles_redis')
         room_id: int = kwargs.get('room_id')
         room_redis: RedisChatRoomInfoS = kwargs.get('room_redis')
-        now: datetime = datetime.now().astimezone()
+
+        # 파일은 S3 임시 경로에 저장하고, 작업에는 S3 키만 전달
+        job_id = uuid.uuid4().hex
+        files_s: List[RedisMediaJobFileS] = await MediaJobWorker.stage(job_id, self.receive.data.files)
 
         redis_id = uuid.uuid4().hex
         chat_history_db: ChatHistory = await crud_chat_history.create(
@@ -37,62 +41,55 @@ class FileHandler(ChatHandler):
             user_profile_id=user_profile_id,
             type=ChatHistoryType.FILE
         )
-        await self.session.flush()
+        await self.session.commit()
         await self.session.refresh(chat_history_db)
 
-        chat_files_db: List[ChatHistoryFile] = []
-        _idx = 1
-        converted_files = [
-            WebSocketFileS(
-                content=BytesIO(base64.b64decode(f.content)),
-                filename=f.filename,
-                content_type=f.content_type
-            ) for f in self.receive.data.files
-        ]
-        async for o in ChatHistoryFile.files_to_models(
-            self.session,
-            converted_files,
-            root='chat_upload/',
-            uploaded_by_id=user_profile_id,
-            bucket_name=settings.aws_storage_bucket_name,
-        ):
-            o.chat_history_id = chat_history_db.id
-            o.order = _idx
-            chat_files_db.append(o)
-            _idx += 1
-
-        try:
-            if len(chat_files_db) == 1:
-                await chat_files_db[0].upload()
-            else:
-                await ChatHistoryFile.asynchronous_upload(*chat_files_db)
-        except Exception as exc:
-            self.logger.error(f'Failed to upload files: {exc}')
-            return
-        finally:
-            for o in chat_files_db:
-                o.close()
-
-        self.session.add_all(chat_files_db)
-        await self.session.commit()
-        for o in chat_files_db:
-            await self.session.refresh(o)
+        # 업로드는 워커에서 처리하고, 대화방에는 대기 상태의 내역을 먼저 전송
+        self._result = await self.add_history_redis(
+            redis_handler, self.session, chat_history_db, [],
+            room_id=room_id, room_redis=room_redis, user_profiles_redis=user_profiles_redis,
+            job_status=MediaJobStatus.PENDING
+        )
+        await MediaJobWorker.enqueue(redis_handler, RedisMediaJobS(
+            id=job_id,
+            room_id=room_id,
+            history=self._result,
+            files=files_s
+        ))
+        return self._result
+
+    @classmethod
+    async def add_history_redis(
+        cls,
+        redis_handler: AsyncRedisHandler,
+        session: AsyncSession,
+        chat_history_db: ChatHistory,
+        chat_files_db: List[ChatHistoryFile],
+        room_id: int,
+        room_redis: RedisChatRoomInfoS,
+        user_profiles_redis: List[RedisUserProfileByRoomS],
+        job_status: Optional[MediaJobStatus] = None
+    ) -> RedisChatHistoryByRoomS:
+        crud_room_user_mapping = ChatRoomUserAssociationCRUD(session)
+        now: datetime = datetime.now().astimezone()
+        user_profile_id: int = chat_history_db.user_profile_id
 
         files_s: List[RedisChatHistoryFileS] = await RedisChatHistoryFileS.generate_files_schema(
             chat_files_db, presigned=True
         )
         chat_history_redis: RedisChatHistoryByRoomS = RedisChatHistoryByRoomS(
             id=chat_history_db.id,
-            redis_id=redis_id,
+            redis_id=chat_history_db.redis_id,
             user_profile_id=user_profile_id,
             files=files_s,
             read_user_ids=list({user_profile_id} | set(room_redis.connected_profile_ids)),
             type=chat_history_db.type.name.lower(),
             timestamp=now.timestamp(),
             date=now.date().isoformat(),
-            is_active=chat_history_db.is_active
+            is_active=chat_history_db.is_active,
+            status=job_status and job_status.name.lower()
         )
-        await RedisChatHistoriesByRoomS.zadd(await redis_handler.redis, room_id, chat_history_redis)
+        await redis_handler.add_histories_by_room(room_id, chat_history_redis, session)
 
         # 각 유저 별 해당 방의 unread_msg_cnt 업데이트
         for p in user_profiles_redis:
@@ -102,9 +99,58 @@ class FileHandler(ChatHandler):
                     p.id,
                     crud_room_user_mapping
                 )
+        return chat_history_redis
 
-        self._result = chat_history_redis
-        return self._result
+    @classmethod
+    async def confirm_presigned(
+        cls,
+        redis_handler: AsyncRedisHandler,
+        session: AsyncSession,
+        room_id: int,
+        chat_history_id: int,
+        user_profile_id: int
+    ) -> RedisChatHistoryByRoomS:
+        """
+        클라이언트 S3 직접 업로드 완료 처리
+        - 업로드 된 파일 활성화 및 썸네일 생성
+        - Redis 대화 내역 추가
+        """
+        crud_chat_history = ChatHistoryCRUD(session)
+        conditions = (
+            ChatHistory.id == chat_history_id,
+            ChatHistory.room_id == room_id,
+            ChatHistory.user_profile_id == user_profile_id
+        )
+        chat_history_db: ChatHistory = await crud_chat_history.get(
+            conditions=conditions,
+            options=[selectinload(ChatHistory.files)]
+        )
+        if chat_history_db.is_active:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Already confirmed.')
+
+        chat_files_db: List[ChatHistoryFile] = sorted(chat_history_db.files, key=lambda x: x.order)
+        _idx = len(chat_files_db) + 1
+        for o in list(chat_files_db):
+            thumbnail: ChatHistoryFile | None = await o.confirm_upload(
+                thumbnail=True, chat_history_id=chat_history_db.id, order=_idx
+            )
+            if thumbnail is not None:
+                session.add(thumbnail)
+                chat_files_db.append(thumbnail)
+                _idx += 1
+        chat_history_db.is_active = True
+        await session.commit()
+        for o in chat_files_db:
+            await session.refresh(o)
+
+        room_redis, _ = await redis_handler.sync_room(room_id, ChatRoomCRUD(session), raise_exception=True)
+        user_profiles_redis, _ = await redis_handler.sync_user_profiles_in_room(
+            room_id, user_profile_id, ChatRoomUserAssociationCRUD(session), raise_exception=True
+        )
+        return await cls.add_history_redis(
+            redis_handler, session, chat_history_db, chat_files_db,
+            room_id=room_id, room_redis=room_redis, user_profiles_redis=user_profiles_redis
+        )
 
     @property
     def send_kwargs(self):
@@ -7,12 +7,12 @@ from sqlalchemy.orm import selectinload, joinedload
 from server.api.common import AsyncRedisHandler
 from server.api.websocket.chat import ChatHandler
 from server.core.enums import SendMessageType, ChatHistoryType
-from server.core.externals.redis.schemas import RedisChatHistoriesByRoomS, RedisChatHistoryByRoomS, \
+from server.core.externals.redis.schemas import RedisChatHistoryByRoomS, \
     RedisChatRoomsByUserProfileS, RedisChatRoomByUserProfileS, RedisUserProfilesByRoomS, RedisInfoByRoomS, \
-    RedisUserImageFileS, RedisUserProfileByRoomS, RedisChatRoomInfoS
+    RedisUserImageFileS, RedisUserProfileByRoomS, RedisChatRoomInfoS, RedisDirectRoomByMemberKeyS
 from server.crud.service import ChatRoomUserAssociationCRUD
 from server.crud.user import UserProfileCRUD
-from server.models import UserProfile, ChatRoomUserAssociation
+from server.models import UserProfile, ChatRoomUserAssociation, ChatRoom
 
 
 class InviteHandler(ChatHandler):
@@ -101,6 +101,11 @@ class InviteHandler(ChatHandler):
         await crud_room_user_mapping.bulk_create([
             dict(room_id=room_id, user_profile_id=p.id) for p in invited_profiles
         ])
+        # 구성원이 달라지므로, 1:1 방 구성원 키 해제
+        room_db: ChatRoom | None = _room_user_mapping[0].room if _room_user_mapping else None
+        if room_db and room_db.member_key:
+            await RedisDirectRoomByMemberKeyS.delete(await redis_handler.redis, room_db.member_key)
+            room_db.member_key = None
         await self.session.commit()
 
         total_profiles: List[UserProfile] = current_profiles + invited_profiles
@@ -171,7 +176,7 @@ class InviteHandler(ChatHandler):
             date=now.date().isoformat(),
             is_active=True
         )
-        await RedisChatHistoriesByRoomS.zadd(await redis_handler.redis, room_id, chat_history_redis)
+        await redis_handler.add_histories_by_room(room_id, chat_history_redis, self.session)
 
         self._result = chat_history_redis
         return self._result
@@ -1,5 +1,8 @@
-from typing import List
+import math
+from datetime import datetime
+from typing import List, Tuple, Optional
 
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import selectinload, joinedload
 
 from server.api.common import AsyncRedisHandler
@@ -7,8 +10,8 @@ from server.api.websocket.chat import ChatHandler
 from server.core.enums import SendMessageType
 from server.core.externals.redis.schemas import RedisChatHistoryByRoomS, RedisChatHistoriesByRoomS, \
     RedisChatRoomInfoS, RedisChatRoomByUserProfileS
-from server.crud.service import ChatHistoryCRUD, ChatHistoryUserAssociationCRUD
-from server.models import ChatHistory, UserProfile, ChatHistoryUserAssociation
+from server.crud.service import ChatHistoryCRUD, ChatRoomReadCursorCRUD
+from server.models import ChatHistory, UserProfile, ChatRoomReadCursor
 
 
 class LookUpHandler(ChatHandler):
@@ -17,7 +20,7 @@ class LookUpHandler(ChatHandler):
 
     async def handle(self, **kwargs):
         crud_chat_history = ChatHistoryCRUD(self.session)
-        crud_history_user_mapping = ChatHistoryUserAssociationCRUD(self.session)
+        crud_read_cursor = ChatRoomReadCursorCRUD(self.session)
 
         redis_handler: AsyncRedisHandler = kwargs.get('redis_handler')
         user_profile_id: int = kwargs.get('user_profile_id')
@@ -28,6 +31,12 @@ class LookUpHandler(ChatHandler):
         redis = await redis_handler.redis
 
         if self.receive.data.exit:
+            # 접속 중 수신한 내역은 모두 읽은 것으로 보고, 최근 내역까지 읽음 위치 갱신
+            await self.update_read_cursor(room_id, user_profile_id, [
+                (h.timestamp, h.id) for h in await RedisChatHistoriesByRoomS.zrevrange(
+                    redis, room_id, start=0, end=0, fields=('timestamp', 'id')
+                )
+            ])
             await redis_handler.exit_room(room_id, user_profile_id)
             return
 
@@ -35,74 +44,79 @@ class LookUpHandler(ChatHandler):
             self.logger.warning("Not exists offset or limit for page.")
             return
 
+        # Redis 에서 삭제된 대화방인 경우, DB 에서 최근 내역 복원
+        await redis_handler.sync_histories_by_room(room_id, self.session)
+
         if self.receive.data.offset == 0:
             await redis_handler.enter_room(room_id, user_profile_id, room_redis, room_by_profile_redis)
 
-        # Redis 대화 내용 조회
+        # Redis 대화 내용 조회 (이전 페이지는 복제 노드에서 조회, 첫 페이지는 복원 직후일 수 있으므로 주 노드에서 조회)
         chat_histories_redis: List[RedisChatHistoryByRoomS] = (
             await RedisChatHistoriesByRoomS.zrevrange(
                 redis, room_id,
                 start=self.receive.data.offset,
-                end=self.receive.data.offset + self.receive.data.limit - 1
+                end=self.receive.data.offset + self.receive.data.limit - 1,
+                stale_ok=self.receive.data.offset > 0
             )
         )
         # Redis 데이터 없는 경우 DB 조회
         lack_cnt: int = self.receive.data.limit - len(chat_histories_redis)
+        chat_histories_db: List[ChatHistory] = []
         migrated_chat_histories_redis: List[RedisChatHistoryByRoomS] = []
         if lack_cnt > 0:
-            if chat_histories_redis:
-                next_offset: int = self.receive.data.offset + len(chat_histories_redis)
-            else:
-                next_offset: int = self.receive.data.offset
-
-            chat_histories_db: List[ChatHistory] = await crud_chat_history.list(
-                conditions=(ChatHistory.room_id == room_id,),
-                offset=next_offset,
+            # Redis 에 있는 가장 오래된 내역 이전의 내역은 모두 DB 에 저장되어 있으므로, 그 이전 내역부터 조회
+            conditions = (ChatHistory.room_id == room_id,)
+            next_offset: int = self.receive.data.offset + len(chat_histories_redis)
+            oldest_redis = await RedisChatHistoriesByRoomS.zrange(redis, room_id, 0, 0, fields=('timestamp', 'id'))
+            if oldest_redis:
+                # DB 생성 시각은 초 단위로 저장되므로, (생성 시각, ID) 키셋으로 가장 오래된 내역 이전부터 조회
+                second: int = math.floor(oldest_redis[0].timestamp)
+                created: datetime = datetime.fromtimestamp(second).astimezone()
+                if oldest_redis[0].id is not None:
+                    same_second = ChatHistory.id < oldest_redis[0].id
+                else:
+                    # DB 에 저장되지 않은 내역인 경우, 같은 초의 내역 중 Redis 에 있는 내역만 제외
+                    redis_ids: List[int] = [
+                        h.id for h in await RedisChatHistoriesByRoomS.zrangebyscore(
+                            redis, room_id, second, f'({second + 1}', fields=('id',)
+                        ) if h.id is not None
+                    ]
+                    same_second = ChatHistory.id.notin_(redis_ids)
+                conditions += (or_(ChatHistory.created < created, and_(ChatHistory.created == created, same_second)),)
+                next_offset -= await RedisChatHistoriesByRoomS.zcard(redis, room_id)
+
+            chat_histories_db = await crud_chat_history.list(
+                conditions=conditions,
+                offset=max(next_offset, 0),
                 limit=lack_cnt,
-                order_by=(ChatHistory.created.desc(),),
+                order_by=(ChatHistory.created.desc(), ChatHistory.id.desc()),
                 options=[
-                    selectinload(ChatHistory.user_profile_mapping),
                     selectinload(ChatHistory.files),
                     joinedload(ChatHistory.user_profile)
                     .selectinload(UserProfile.images),
                     joinedload(ChatHistory.user_profile)
                     .selectinload(UserProfile.followers)
-                ]
+                ],
+                read_only=True
+            )
+
+        # 대화방 입장 시, 가장 최근 내역까지 읽음 위치 갱신 (이전 페이지 조회는 쓰기 없음)
+        if self.receive.data.offset == 0:
+            await self.update_read_cursor(room_id, user_profile_id, [
+                (h.timestamp, h.id) for h in chat_histories_redis
+            ] + [
+                (h.created.timestamp(), h.id) for h in chat_histories_db
+            ])
+
+        # 읽은 유저는 대화방 구성원별 읽음 위치로 계산
+        if chat_histories_db:
+            read_cursors: List[ChatRoomReadCursor] = await crud_read_cursor.list(
+                conditions=(ChatRoomReadCursor.room_id == room_id,)
             )
-            # 채팅 읽은 유저의 DB 정보 업데이트 및 생성
-            if chat_histories_db:
-                create_target_db: List[ChatHistory] = []
-                update_target_db: List[ChatHistoryUserAssociation] = []
-                for h in chat_histories_db:
-                    if not h.user_profile_mapping:
-                        create_target_db.append(h)
-                    else:
-                        m = next((
-                            m for m in h.user_profile_mapping
-                            if m.user_profile_id == user_profile_id), None)
-                        if m:
-                            if not m.is_read:
-                                update_target_db.append(m)
-                        else:
-                            create_target_db.append(h)
-                if create_target_db:
-                    await crud_history_user_mapping.bulk_create([
-                        dict(
-                            history_id=h.id,
-                            user_profile_id=user_profile_id
-                        ) for h in create_target_db
-                    ])
-                if update_target_db:
-                    await crud_history_user_mapping.bulk_update([
-                        dict(id=m.id, is_read=True) for m in update_target_db
-                    ])
-
-                await self.session.commit()
-
-                migrated_chat_histories_redis = [
-                    await RedisChatHistoryByRoomS.from_model(m)
-                    for m in chat_histories_db
-                ]
+            migrated_chat_histories_redis = [
+                await RedisChatHistoryByRoomS.from_model(m, read_cursors)
+                for m in chat_histories_db
+            ]
         if migrated_chat_histories_redis:
             chat_histories_redis.extend(migrated_chat_histories_redis)
 
@@ -111,6 +125,17 @@ class LookUpHandler(ChatHandler):
         self._result = chat_histories_redis
         return self._result
 
+    async def update_read_cursor(self, room_id: int, user_profile_id: int, histories: List[Tuple[float, Optional[int]]]):
+        """(timestamp, id) 목록 중 가장 최근 내역으로 읽음 위치 갱신"""
+        if not histories:
+            return
+        timestamp, _ = max(histories, key=lambda h: h[0])
+        last_read_id: Optional[int] = max((_id for _, _id in histories if _id), default=None)
+        await ChatRoomReadCursorCRUD(self.session).upsert(
+            room_id, user_profile_id, datetime.fromtimestamp(timestamp).astimezone(), last_read_id
+        )
+        await self.session.commit()
+
     @property
     def send_kwargs(self):
         assert self._result is not None, 'Run `handle()` first.'
@@ -0,0 +1,277 @@
+import asyncio
+import base64
+import functools
+import logging
+import time
+from copy import deepcopy
+from io import BytesIO
+from typing import List, Optional
+
+from server.api.common import AsyncRedisHandler
+from server.core.enums import MediaJobStatus, ChatType
+from server.core.externals.redis.schemas import (
+    RedisMediaJobS, RedisMediaJobsS, RedisMediaJobsInProgressS, RedisChatHistoryByRoomS,
+    RedisChatHistoriesByRoomS, RedisChatHistoryFileS, RedisChatHistoryPatchS, RedisChatRoomPubSubS,
+    RedisMediaJobFileS
+)
+from server.core.metrics import metrics
+from server.crud.service import ChatHistoryCRUD, ChatHistoryFileCRUD
+from server.db.databases import settings, async_session
+from server.models import ChatHistory, ChatHistoryFile
+from server.schemas.base import WebSocketFileS
+from server.schemas.chat import ChatSendFormS, ChatSendDataS, ChatReceiveFileS
+
+
+class MediaJobWorker:
+    """
+    대화방 파일 업로드 작업 처리
+    - Redis 작업 큐(queue:media_jobs)에서 작업을 가져와 S3 업로드 및 썸네일 생성
+    - 작업에는 파일 내용 대신 S3 임시 경로에 저장한 키만 저장
+    - 진행 상태(pending → uploading → ready/failed)를 대화방 채널에 patch 로 전송
+    """
+
+    logger = logging.getLogger('chat')
+
+    max_attempts = settings.media_job_max_attempts
+    block_timeout = 5
+    min_backoff = 1
+    max_backoff = 30
+    staging_root = 'media/media_jobs/'
+
+    def __init__(self, redis_handler: AsyncRedisHandler):
+        self.redis_handler = redis_handler
+
+    @classmethod
+    async def stage(cls, job_id: str, files: List[ChatReceiveFileS]) -> List[RedisMediaJobFileS]:
+        """업로드 할 파일을 S3 임시 경로에 저장"""
+        s3 = ChatHistoryFile.get_s3_client()
+        loop = asyncio.get_running_loop()
+        files_s: List[RedisMediaJobFileS] = []
+        for idx, f in enumerate(files):
+            key = f'{cls.staging_root}{job_id}/{idx}/{f.filename}'
+            await loop.run_in_executor(None, functools.partial(
+                s3.put_object,
+                Bucket=settings.aws_storage_bucket_name, Key=key, Body=base64.b64decode(f.content),
+                ContentType=f.content_type
+            ))
+            files_s.append(RedisMediaJobFileS(key=key, filename=f.filename, content_type=f.content_type))
+        return files_s
+
+    @classmethod
+    async def unstage(cls, job: RedisMediaJobS):
+        """S3 임시 경로에 저장한 파일 삭제"""
+        s3 = ChatHistoryFile.get_s3_client()
+        loop = asyncio.get_running_loop()
+        for f in job.files:
+            await loop.run_in_executor(
+                None, functools.partial(s3.delete_object, Bucket=settings.aws_storage_bucket_name, Key=f.key)
+            )
+
+    @classmethod
+    async def enqueue(cls, redis_handler: AsyncRedisHandler, job: RedisMediaJobS):
+        await RedisMediaJobsS.lpush(await redis_handler.redis, None, job)
+        metrics.incr('media_job', status=MediaJobStatus.PENDING.name.lower())
+
+    @classmethod
+    async def recover(cls) -> int:
+        """
+        프로세스 종료 등으로 진행 중 목록에 남은 작업을 대기 큐로 이동
+        - 다른 프로세스에서 처리 중인 작업이 다시 처리될 수 있으므로, 업로드는 이미 저장된 파일이 있으면 생략
+        """
+        recovered = 0
+        try:
+            async with AsyncRedisHandler() as redis_handler:
+                redis = await redis_handler.redis
+                while await RedisMediaJobsInProgressS.rpoplpush(redis, None, RedisMediaJobsS.get_key()):
+                    recovered += 1
+        except Exception as exc:
+            cls.logger.exception(f'Failed to recover media jobs: {exc}')
+        if recovered:
+            cls.logger.warning(f'Recovered media jobs in progress. count: {recovered}')
+            metrics.incr('media_job', recovered, status='recovered')
+        return recovered
+
+    @classmethod
+    async def serve(cls, recovered: Optional[asyncio.Task] = None):
+        # 진행 중 작업 복구 후 작업 처리 (복구 전에 가져온 작업이 다시 대기 큐로 이동되지 않도록)
+        if recovered is not None:
+            await recovered
+        async with AsyncRedisHandler() as redis_handler:
+            await cls(redis_handler).run()
+
+    @classmethod
+    def start(cls, count: int = settings.media_job_workers) -> List[asyncio.Task]:
+        if not count:
+            return []
+        recovered: asyncio.Task = asyncio.create_task(cls.recover())
+        return [recovered] + [asyncio.create_task(cls.serve(recovered)) for _ in range(count)]
+
+    async def run(self):
+        backoff = self.min_backoff
+        while True:
+            try:
+                job: Optional[RedisMediaJobS] = await self.fetch()
+            except Exception as exc:
+                self.logger.error(f'Failed to fetch media job. retry after {backoff}s, error: {exc}')
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+            backoff = self.min_backoff
+            if not job:
+                continue
+            try:
+                await self.process(job)
+            except Exception as exc:
+                self.logger.exception(f'Failed to process media job: {exc}')
+            try:
+                await RedisMediaJobsInProgressS.lrem(await self.redis_handler.redis, None, job, count=1)
+            except Exception as exc:
+                # 진행 중 목록에 남은 작업은 다음 시작 시 복구 (업로드 된 파일이 있으면 생략)
+                self.logger.error(f'Failed to remove media job in progress. id: {job.id}, error: {exc}')
+
+    async def fetch(self, timeout: int = block_timeout) -> Optional[RedisMediaJobS]:
+        redis = await self.redis_handler.redis
+        job: Optional[RedisMediaJobS] = await RedisMediaJobsS.brpoplpush(
+            redis, None, RedisMediaJobsInProgressS.get_key(), timeout=timeout
+        )
+        metrics.gauge('media_job_queue_depth', await RedisMediaJobsS.llen(redis, None))
+        return job
+
+    async def process(self, job: RedisMediaJobS) -> RedisChatHistoryByRoomS:
+        started = time.perf_counter()
+        await self.update_history(job, status=MediaJobStatus.UPLOADING)
+        try:
+            files_s: List[RedisChatHistoryFileS] = await self.upload(job)
+        except Exception as exc:
+            # 진행 중 목록에서 제거할 수 있도록 원본 작업은 변경하지 않음
+            attempts = job.attempts + 1
+            if attempts < self.max_attempts:
+                self.logger.warning(f'Retry media job. id: {job.id}, attempts: {attempts}, error: {exc}')
+                metrics.incr('media_job', status='retry')
+                await RedisMediaJobsS.lpush(
+                    await self.redis_handler.redis, None, job.copy(update={'attempts': attempts})
+                )
+                return job.history
+
+            self.logger.error(f'Failed to upload files: {exc}')
+            await self.unstage(job)
+            async with async_session() as session:
+                await ChatHistoryCRUD(session).update(
+                    conditions=(ChatHistory.id == job.history.id,),
+                    is_active=False
+                )
+                await session.commit()
+            history: RedisChatHistoryByRoomS = await self.update_history(
+                job, status=MediaJobStatus.FAILED, is_active=False
+            )
+        else:
+            history: RedisChatHistoryByRoomS = await self.update_history(
+                job, status=MediaJobStatus.READY, files=files_s
+            )
+        metrics.observe('media_job_duration', time.perf_counter() - started)
+        return history
+
+    async def download(self, f: RedisMediaJobFileS) -> WebSocketFileS:
+        s3 = ChatHistoryFile.get_s3_client()
+        obj = await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(s3.get_object, Bucket=settings.aws_storage_bucket_name, Key=f.key)
+        )
+        return WebSocketFileS(content=BytesIO(obj['Body'].read()), filename=f.filename, content_type=f.content_type)
+
+    async def upload(self, job: RedisMediaJobS) -> List[RedisChatHistoryFileS]:
+        async with async_session() as session:
+            # 복구 등으로 다시 처리되는 작업은 이미 저장된 파일 사용
+            chat_files_db: List[ChatHistoryFile] = await ChatHistoryFileCRUD(session).list(
+                conditions=(ChatHistoryFile.chat_history_id == job.history.id,),
+                order_by=(ChatHistoryFile.order,)
+            )
+            if chat_files_db:
+                return await RedisChatHistoryFileS.generate_files_schema(chat_files_db, presigned=True)
+
+            converted_files: List[WebSocketFileS] = [await self.download(f) for f in job.files]
+            _idx = 1
+            async for o in ChatHistoryFile.files_to_models(
+                session,
+                converted_files,
+                root='chat_upload/',
+                uploaded_by_id=job.history.user_profile_id,
+                bucket_name=settings.aws_storage_bucket_name,
+            ):
+                o.chat_history_id = job.history.id
+                o.order = _idx
+                chat_files_db.append(o)
+                _idx += 1
+
+            try:
+                if len(chat_files_db) == 1:
+                    await chat_files_db[0].upload()
+                else:
+                    await ChatHistoryFile.asynchronous_upload(*chat_files_db)
+            finally:
+                for o in chat_files_db:
+                    o.close()
+
+            session.add_all(chat_files_db)
+            await session.commit()
+            for o in chat_files_db:
+                await session.refresh(o)
+
+        await self.unstage(job)
+        return await RedisChatHistoryFileS.generate_files_schema(chat_files_db, presigned=True)
+
+    async def update_history(self, job: RedisMediaJobS, status: MediaJobStatus, **kwargs) -> RedisChatHistoryByRoomS:
+        """Redis 대화 내역 상태 변경 후, 대화방에 patch 전송"""
+        redis = await self.redis_handler.redis
+        room_id: int = job.room_id
+        timestamp = job.history.timestamp
+
+        async with await self.redis_handler.lock(key=RedisChatHistoriesByRoomS.get_lock_key(room_id)):
+            # 작업 중 읽음 처리 등으로 변경됐을 수 있으므로, 저장되어 있는 내역 기준으로 업데이트
+            histories_redis: List[RedisChatHistoryByRoomS] = await RedisChatHistoriesByRoomS.zrangebyscore(
+                redis, room_id, timestamp, timestamp
+            ) or []
+            duplicated_histories_redis: List[RedisChatHistoryByRoomS] = [
+                h for h in histories_redis if h.redis_id == job.history.redis_id
+            ]
+            history: RedisChatHistoryByRoomS = deepcopy(
+                duplicated_histories_redis[0] if duplicated_histories_redis else job.history
+            )
+            history.status = status.name.lower()
+            for k, v in kwargs.items():
+                setattr(history, k, v)
+
+            # 유지 범위를 넘어 Redis 에서 삭제된 내역은 다시 추가하지 않음 (파일, 활성화 여부는 DB 에 반영)
+            if duplicated_histories_redis:
+                async with await self.redis_handler.pipeline() as pipe:
+                    pipe = await RedisChatHistoriesByRoomS.zrem(pipe, room_id, *duplicated_histories_redis)
+                    pipe = await self.redis_handler.update_histories_by_room(room_id, [history], pipe)
+                    await pipe.execute()
+
+        await RedisChatRoomPubSubS.publish(
+            redis,
+            room_id,
+            ChatSendFormS(
+                type=ChatType.PATCH,
+                data=ChatSendDataS(patch_histories=[
+                    RedisChatHistoryPatchS(
+                        id=history.id,
+                        redis_id=history.redis_id,
+                        user_profile_id=history.user_profile_id,
+                        is_active=history.is_active,
+                        read_user_ids=history.read_user_ids,
+                        status=history.status,
+                        files=history.files
+                    )
+                ])
+            ).json()
+        )
+        metrics.incr('media_job', status=history.status)
+        return history
+
+
+if __name__ == '__main__':
+    # 웹 서버와 분리된 전용 워커 프로세스로 실행 (MEDIA_JOB_WORKERS=0 인 서버와 함께 사용)
+    async def main():
+        await asyncio.gather(*MediaJobWorker.start())
+
+    asyncio.run(main())
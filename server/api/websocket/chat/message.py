@@ -5,7 +5,7 @@ from typing import List
 from server.api.common import AsyncRedisHandler
 from server.api.websocket.chat import ChatHandler
 from server.core.enums import SendMessageType, ChatHistoryType
-from server.core.externals.redis.schemas import RedisChatHistoryByRoomS, RedisChatHistoriesByRoomS, RedisChatRoomInfoS, \
+from server.core.externals.redis.schemas import RedisChatHistoryByRoomS, RedisChatRoomInfoS, \
     RedisUserProfileByRoomS
 from server.crud.service import ChatRoomUserAssociationCRUD
 
@@ -35,7 +35,7 @@ class MessageHandler(ChatHandler):
             date=now.date().isoformat(),
             is_active=True
         )
-        await RedisChatHistoriesByRoomS.zadd(await redis_handler.redis, room_id, chat_history_redis)
+        await redis_handler.add_histories_by_room(room_id, chat_history_redis, self.session)
 
         # 각 유저 별 해당 방의 unread_msg_cnt 업데이트
         for p in user_profiles_redis:
@@ -1,15 +1,13 @@
 from copy import deepcopy
 from typing import List, Dict, Any
 
-from sqlalchemy.orm import selectinload
-
 from server.api.common import AsyncRedisHandler
 from server.api.websocket.chat import ChatHandler
 from server.core.enums import SendMessageType
 from server.core.externals.redis.schemas import RedisChatHistoryPatchS, RedisChatHistoryByRoomS, \
     RedisChatHistoriesByRoomS
-from server.crud.service import ChatHistoryCRUD
-from server.models import ChatHistory
+from server.crud.service import ChatHistoryCRUD, ChatRoomReadCursorCRUD
+from server.models import ChatHistory, ChatRoomReadCursor
 
 
 class PatchHandler(ChatHandler):
@@ -35,12 +33,12 @@ class PatchHandler(ChatHandler):
         update_target_db: List[str] = []
 
         async with await redis_handler.lock(key=RedisChatHistoriesByRoomS.get_lock_key(room_id)):
+            # 최근 내역 유지 범위만 조회 (Redis 에 없는 내역은 DB 업데이트)
             chat_histories_redis: List[RedisChatHistoryByRoomS] = (
-                await RedisChatHistoriesByRoomS.zrevrange(await redis_handler.redis, room_id)
+                await RedisChatHistoriesByRoomS.zrevrange(
+                    await redis_handler.redis, room_id, end=RedisChatHistoriesByRoomS.get_window_end()
+                )
             )
-            if not chat_histories_redis:
-                self.logger.warning("Not exists chat histories in the room. room_id: %s", room_id)
-                return
 
             async with await redis_handler.pipeline() as pipe:
                 for redis_id in self.receive.data.history_redis_ids:
@@ -91,13 +89,15 @@ class PatchHandler(ChatHandler):
         # Redis 에 저장되어 있지 않은 history_ids 에 한해 DB 업데이트
         if update_target_db:
             await crud_chat_history.update(
-                conditions=(ChatHistory.redis_id.in_(update_target_db),),
+                conditions=(ChatHistory.room_id == room_id, ChatHistory.redis_id.in_(update_target_db)),
                 **update_values
             )
             await self.session.commit()
             updated_histories_db: List[ChatHistory] = await crud_chat_history.list(
-                conditions=(ChatHistory.redis_id.in_(update_target_db),),
-                options=[selectinload(ChatHistory.user_profile_mapping)]
+                conditions=(ChatHistory.room_id == room_id, ChatHistory.redis_id.in_(update_target_db)),
+            )
+            read_cursors: List[ChatRoomReadCursor] = await ChatRoomReadCursorCRUD(self.session).list(
+                conditions=(ChatRoomReadCursor.room_id == room_id,)
             )
             for h in updated_histories_db:
                 patch_histories_redis.append(RedisChatHistoryPatchS(
@@ -105,9 +105,7 @@ class PatchHandler(ChatHandler):
                     redis_id=h.redis_id,
                     user_profile_id=h.user_profile_id,
                     is_active=h.is_active,
-                    read_user_ids=[
-                        m.user_profile_id for m in h.user_profile_mapping if m.is_read
-                    ]
+                    read_user_ids=h.get_read_user_ids(read_cursors)
                 ))
 
         self._result = patch_histories_redis
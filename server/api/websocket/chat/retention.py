@@ -0,0 +1,84 @@
+import asyncio
+import logging
+import time
+from typing import List, Tuple, Optional
+
+from server.api.common import AsyncRedisHandler
+from server.core.externals.redis.lock import Redlock
+from server.core.externals.redis.schemas import RedisChatRoomsByAccessS
+from server.core.metrics import metrics
+from server.db.databases import settings
+
+
+class ChatHistoryEvictionWorker:
+    """
+    유휴 대화방 대화 내역 Redis 삭제 (LRU)
+    - redis_history_idle_seconds 동안 사용하지 않은 대화방과, redis_history_max_rooms 를 넘은 대화방을
+      가장 오래 사용하지 않은 순으로 삭제
+    - 삭제한 대화방은 다시 사용할 때 DB 에서 최근 내역 복원
+    - 모든 웹 프로세스에서 시작하므로, 주기마다 잠금을 획득한 하나의 프로세스만 삭제
+    """
+
+    logger = logging.getLogger('chat')
+
+    interval = settings.redis_history_evict_interval
+    batch_size = 100
+
+    def __init__(self, redis_handler: AsyncRedisHandler):
+        self.redis_handler = redis_handler
+
+    @classmethod
+    async def serve(cls):
+        async with AsyncRedisHandler() as redis_handler:
+            await cls(redis_handler).run()
+
+    @classmethod
+    def start(cls) -> asyncio.Task:
+        return asyncio.create_task(cls.serve())
+
+    async def run(self):
+        while True:
+            try:
+                await self.evict_exclusive()
+            except Exception as exc:
+                self.logger.exception(f'Failed to evict chat histories: {exc}')
+            await asyncio.sleep(self.interval)
+
+    async def evict_exclusive(self) -> Optional[int]:
+        """다른 프로세스가 삭제 중인 경우 생략 (None 반환, 보유 중에는 잠금 만료 시간 연장)"""
+        lock: Redlock = await self.redis_handler.lock(key=RedisChatRoomsByAccessS.get_lock_key())
+        if not await lock.acquire(blocking=False):
+            return None
+        try:
+            return await self.evict()
+        finally:
+            await lock.release()
+
+    async def candidates(self) -> List[Tuple[int, float]]:
+        """삭제 대상 (대화방 ID, 최근 사용 시각) 목록"""
+        redis = await self.redis_handler.redis
+        key: str = RedisChatRoomsByAccessS.get_key()
+        rooms: List[Tuple[str, float]] = []
+        if settings.redis_history_idle_seconds:
+            rooms = await redis.zrangebyscore(
+                key, '-inf', time.time() - settings.redis_history_idle_seconds,
+                start=0, num=self.batch_size, withscores=True
+            )
+        if settings.redis_history_max_rooms:
+            excess: int = min(await redis.zcard(key) - settings.redis_history_max_rooms, self.batch_size)
+            if excess > len(rooms):
+                rooms = await redis.zrange(key, 0, excess - 1, withscores=True)
+        return [(int(room_id), last_access) for room_id, last_access in rooms]
+
+    async def evict(self) -> int:
+        evicted = 0
+        for room_id, last_access in await self.candidates():
+            try:
+                if await self.redis_handler.evict_histories_by_room(room_id, last_access):
+                    evicted += 1
+            except Exception as exc:
+                # DB 저장이 확인되지 않은 대화방은 Redis 에 유지하고 다음 주기에 재시도
+                self.logger.error(f'Failed to evict chat histories. room_id: {room_id}, error: {exc}')
+                metrics.incr('redis_history_evict', status='failed')
+        metrics.incr('redis_history_evict', evicted, status='evicted')
+        return evicted
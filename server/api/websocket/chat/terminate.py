@@ -11,7 +11,7 @@ from server.api.websocket.chat import ChatHandler
 from server.core.enums import SendMessageType, ChatHistoryType
 from server.core.externals.redis.schemas import RedisUserProfilesByRoomS, RedisChatRoomsByUserProfileS, \
     RedisChatRoomByUserProfileS, RedisUserProfileByRoomS, RedisInfoByRoomS, RedisChatHistoryByRoomS, \
-    RedisChatHistoriesByRoomS, RedisChatRoomInfoS
+    RedisChatRoomInfoS, RedisDirectRoomByMemberKeyS
 from server.crud.service import ChatRoomUserAssociationCRUD
 from server.models import ChatRoomUserAssociation, ChatRoom
 
@@ -55,6 +55,10 @@ class TerminateHandler(ChatHandler):
             )
             if room_user_mapping_db:
                 room_db = room_user_mapping_db.room
+                # 구성원이 달라지므로, 1:1 방 구성원 키 해제
+                if room_db.member_key:
+                    await RedisDirectRoomByMemberKeyS.delete(await redis_handler.redis, room_db.member_key)
+                    room_db.member_key = None
                 # 방에 아무도 연동되어 있지 않으면, 비활성화 처리
                 if len(room_user_mappings_db) == 1:
                     room_db.is_active = False
@@ -117,9 +121,7 @@ class TerminateHandler(ChatHandler):
                     date=now.date().isoformat(),
                     is_active=True
                 )
-                await RedisChatHistoriesByRoomS.zadd(
-                    await redis_handler.redis, room_id, chat_history_redis
-                )
+                await redis_handler.add_histories_by_room(room_id, chat_history_redis, self.session)
 
                 await self.session.commit()
                 await pipe.execute()
@@ -0,0 +1,16 @@
+import statistics
+from typing import List
+
+
+def summarize(name: str, samples: List[float]):
+    if not samples:
+        print(f'{name:>10}: no samples')
+        return
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(
+        f'{name:>10}: n={len(ordered)} '
+        f'p50={statistics.median(ordered) * 1000:.1f}ms '
+        f'p99={p99 * 1000:.1f}ms '
+        f'max={ordered[-1] * 1000:.1f}ms'
+    )
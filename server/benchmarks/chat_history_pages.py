@@ -0,0 +1,94 @@
+"""
+대화방 대화 내역 페이지 조회 시간 측정
+
+LookUpHandler 와 동일한 조회(room_id 조건, 최신순 정렬, offset/limit)를
+페이지 깊이(offset)별로 반복 실행해 p50/p99 조회 시간과 실행 계획을 비교한다.
+--seed 를 지정하면, 측정 전에 해당 대화방에 대화 내역을 생성한다.
+
+    python -m server.benchmarks.chat_history_pages \
+        --room-id 1 --user-profile-id 1 --seed 10000000 \
+        --depths 0 1000 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import select, insert
+
+from server.benchmarks import summarize
+from server.core.enums import ChatHistoryType
+from server.db.databases import engine
+from server.models import ChatHistory
+
+
+async def seed(room_id: int, user_profile_id: int, count: int, batch_size: int):
+    started = datetime.now()
+    for start in range(0, count, batch_size):
+        rows = [
+            {
+                'redis_id': uuid.uuid4().hex,
+                'room_id': room_id,
+                'user_profile_id': user_profile_id,
+                'contents': f'benchmark {i}',
+                'type': ChatHistoryType.MESSAGE,
+                'is_active': True,
+                'created': started - timedelta(seconds=count - i),
+                'updated': started - timedelta(seconds=count - i),
+            } for i in range(start, min(start + batch_size, count))
+        ]
+        async with engine.begin() as conn:
+            await conn.execute(insert(ChatHistory), rows)
+        print(f'seeded {min(start + batch_size, count)}/{count}', end='\r')
+    print()
+
+
+def page_stmt(room_id: int, offset: int, limit: int):
+    return (
+        select(ChatHistory)
+        .where(ChatHistory.room_id == room_id)
+        .order_by(ChatHistory.created.desc(), ChatHistory.id.desc())
+        .offset(offset)
+        .limit(limit)
+    )
+
+
+async def measure(room_id: int, offset: int, limit: int, repeat: int) -> List[float]:
+    samples = []
+    async with engine.connect() as conn:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            (await conn.execute(page_stmt(room_id, offset, limit))).all()
+            samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def explain(room_id: int, offset: int, limit: int):
+    stmt = page_stmt(room_id, offset, limit).compile(engine, compile_kwargs={'literal_binds': True})
+    async with engine.connect() as conn:
+        for row in (await conn.exec_driver_sql(f'EXPLAIN {stmt}')).mappings():
+            print(f"{'':>10}  key={row['key']} rows={row['rows']} extra={row['Extra']}")
+
+
+async def main(args):
+    if args.seed:
+        await seed(args.room_id, args.user_profile_id, args.seed, args.batch_size)
+
+    for depth in args.depths:
+        summarize(f'offset={depth}', await measure(args.room_id, depth, args.limit, args.repeat))
+        await explain(args.room_id, depth, args.limit)
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--room-id', type=int, required=True)
+    parser.add_argument('--user-profile-id', type=int, required=True)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--depths', type=int, nargs='+', default=[0, 1000, 10000, 100000, 1000000])
+    parser.add_argument('--limit', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
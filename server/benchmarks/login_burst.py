@@ -0,0 +1,77 @@
+"""
+로그인 요청이 몰리는 동안의 웹소켓 ping 응답 시간 측정
+
+실행 중인 서버에 대해, 대화방 웹소켓으로 ping 을 주기적으로 보내면서
+동시에 다수의 로그인 요청을 보내 ping 왕복 시간(RTT) 변화를 비교한다.
+
+    python -m server.benchmarks.login_burst \
+        --host localhost:8000 --email test@test.com --password test \
+        --profile-id 1 --room-id 1 --logins 100
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import List
+
+import httpx
+import websockets
+
+from server.benchmarks import summarize
+from server.core.authentications.constants import COOKIE_NAME
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> float:
+    started = time.perf_counter()
+    response = await client.post('/users/login', json={'uid': email, 'password': password})
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+
+async def ping(ws, count: int, interval: float) -> List[float]:
+    samples = []
+    for _ in range(count):
+        started = time.perf_counter()
+        await ws.send(json.dumps({'type': 'ping'}))
+        while True:
+            data = json.loads(await ws.recv())
+            if data.get('type') == 'ping':
+                break
+        samples.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+    return samples
+
+
+async def main(args):
+    base_url = f'http://{args.host}/api/v1'
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        await login(client, args.email, args.password)
+        session_id = client.cookies.get(COOKIE_NAME)
+
+        uri = f'ws://{args.host}/api/v1/chats/conversation/{args.profile_id}/{args.room_id}'
+        async with websockets.connect(uri, extra_headers={'Cookie': f'{COOKIE_NAME}={session_id}'}) as ws:
+            baseline = await ping(ws, args.pings, args.interval)
+
+            async with httpx.AsyncClient(base_url=base_url, timeout=None) as burst_client:
+                burst = asyncio.gather(*[
+                    login(burst_client, args.email, args.password) for _ in range(args.logins)
+                ])
+                during = await ping(ws, args.pings, args.interval)
+                logins = await burst
+
+    summarize('baseline', baseline)
+    summarize('burst', during)
+    summarize('login', logins)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='localhost:8000')
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--profile-id', type=int, required=True)
+    parser.add_argument('--room-id', type=int, required=True)
+    parser.add_argument('--logins', type=int, default=100)
+    parser.add_argument('--pings', type=int, default=50)
+    parser.add_argument('--interval', type=float, default=0.05)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,86 @@
+"""
+자동 파이프라인 사용 여부에 따른 Redis 처리량 비교
+
+웹소켓 연결 수만큼 코루틴을 동시에 실행하면서, 대화 메시지 한 건을 처리할 때와 같은
+명령(대화 내역 추가, 대화방 정보/참여자 조회, 발행)을 반복하고 초당 명령 수와 응답 시간을 비교한다.
+
+    python -m server.benchmarks.redis_auto_pipeline \
+        --endpoint redis://localhost:6379 --db 15 --sockets 1000 --messages 20
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime
+from typing import List, Tuple
+
+from server.benchmarks import summarize
+from server.core.enums import ChatHistoryType
+from server.core.externals.redis import AioRedis, FailoverRedis
+from server.core.externals.redis.schemas import (
+    RedisChatHistoriesByRoomS, RedisChatHistoryByRoomS, RedisChatRoomPubSubS, RedisInfoByRoomS,
+    RedisUserProfilesByRoomS
+)
+
+COMMANDS_PER_MESSAGE = 4
+
+
+async def socket(redis: FailoverRedis, room_id: int, user_profile_id: int, messages: int) -> List[float]:
+    samples = []
+    for _ in range(messages):
+        now = datetime.now().astimezone()
+        history = RedisChatHistoryByRoomS(
+            redis_id=uuid.uuid4().hex,
+            user_profile_id=user_profile_id,
+            contents='benchmark',
+            type=ChatHistoryType.MESSAGE.name.lower(),
+            timestamp=now.timestamp(),
+            date=now.date().isoformat(),
+            is_active=True
+        )
+        started = time.perf_counter()
+        await RedisInfoByRoomS.hgetall(redis, room_id)
+        await RedisUserProfilesByRoomS.smembers(redis, (room_id, user_profile_id))
+        await RedisChatHistoriesByRoomS.zadd(redis, room_id, history)
+        await RedisChatRoomPubSubS.publish(redis, room_id, history.json())
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def run(redis: FailoverRedis, args) -> Tuple[float, List[float]]:
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        socket(redis, i % args.rooms + 1, i + 1, args.messages) for i in range(args.sockets)
+    ])
+    elapsed = time.perf_counter() - started
+    return elapsed, [s for samples in results for s in samples]
+
+
+async def main(args):
+    redis: FailoverRedis = await AioRedis(
+        endpoint=[args.endpoint], db=args.db, max_connections=args.max_connections
+    ).connect()
+    commands = args.sockets * args.messages * COMMANDS_PER_MESSAGE
+    try:
+        for auto_pipeline in (False, True):
+            redis.auto_pipeline = auto_pipeline
+            redis.auto_pipeline_window = args.window
+            elapsed, samples = await run(redis, args)
+            name = 'pipeline' if auto_pipeline else 'default'
+            print(f'{name:>10}: {commands / elapsed:.0f} ops/sec ({commands} commands, {elapsed:.2f}s)')
+            summarize(name, samples)
+    finally:
+        await redis.flushdb()
+        await redis.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoint', default='redis://localhost:6379')
+    parser.add_argument('--db', type=int, default=15)
+    parser.add_argument('--sockets', type=int, default=1000)
+    parser.add_argument('--rooms', type=int, default=100)
+    parser.add_argument('--messages', type=int, default=20)
+    parser.add_argument('--window', type=float, default=0)
+    parser.add_argument('--max-connections', type=int, default=1000)
+    asyncio.run(main(parser.parse_args()))
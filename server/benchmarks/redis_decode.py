@@ -0,0 +1,79 @@
+"""
+Redis 대화 내역 조회 시, 메시지 한 건당 역직렬화와 스키마 생성 시간 측정
+
+첨부 파일이 있는 대화 내역 한 페이지를 직렬화 형식별로 기록한 값에서,
+검증하는 스키마 생성과 검증 없는 스키마 생성(trusted)을 비교한다. Redis 연결은 필요하지 않다.
+
+    python -m server.benchmarks.redis_decode --messages 50 --files 3 --repeat 200
+"""
+import argparse
+import time
+import uuid
+from datetime import datetime
+from typing import List
+
+from server.benchmarks import summarize
+from server.core.enums import ChatHistoryType
+from server.core.externals.redis.schemas import (
+    RedisChatHistoriesByRoomS, RedisChatHistoryByRoomS, RedisChatHistoryFileS
+)
+from server.db.databases import settings
+
+
+def page(messages: int, files: int) -> List[RedisChatHistoryByRoomS]:
+    now = datetime.now().astimezone()
+    return [
+        RedisChatHistoryByRoomS(
+            id=i,
+            redis_id=uuid.uuid4().hex,
+            user_profile_id=i % 5 + 1,
+            contents=f'message {i}',
+            type=ChatHistoryType.FILE.name.lower() if files else ChatHistoryType.MESSAGE.name.lower(),
+            files=[
+                RedisChatHistoryFileS(
+                    id=i * files + j, url=f'https://cdn/{i}/{j}.png', uid=uuid.uuid4().hex, filename=f'{j}.png',
+                    filepath=f'chat/{i}/{j}.png', content_type='image/png', use_type='origin', is_active=True,
+                    chat_history_id=i, order=j, variants={'thumbnail': f'https://cdn/{i}/{j}_thumb.png'}
+                ) for j in range(files)
+            ],
+            read_user_ids=list(range(1, 6)),
+            timestamp=now.timestamp() + i,
+            date=now.date().isoformat(),
+            is_active=True
+        ) for i in range(messages)
+    ]
+
+
+def measure(values: list, repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        RedisChatHistoriesByRoomS.to_schema(RedisChatHistoriesByRoomS.decode(values))
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main(args):
+    histories = page(args.messages, args.files)
+    for codec in args.codecs:
+        settings.redis_codec = codec
+        values = [
+            v.decode('utf-8', 'surrogateescape') if isinstance(v, bytes) else v
+            for v in RedisChatHistoriesByRoomS.get_value(histories)
+        ]
+        for trusted in (False, True):
+            RedisChatHistoriesByRoomS.trusted = trusted
+            samples = measure(values, args.repeat)
+            per_message = sum(samples) / len(samples) / args.messages * 1_000_000
+            name = f'{codec}{"+trusted" if trusted else ""}'
+            print(f'{name:>16}: {per_message:.1f}us/message')
+            summarize(name, samples)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=50)
+    parser.add_argument('--files', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--codecs', nargs='+', default=['json', 'orjson', 'msgpack'])
+    main(parser.parse_args())
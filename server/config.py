@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseSettings, AnyHttpUrl, validator
 
@@ -11,16 +11,52 @@ class Settings(BaseSettings):
     db_password: str
     db_host: str
     db_port: int
+    db_replica_host: Optional[str] = None  # 미설정 시, 주 DB 로 조회
+    db_replica_port: Optional[int] = None
+    db_replica_auto_route: bool = False  # 쓰기 트랜잭션 밖의 조회를 자동으로 복제 DB 로 전송
+    db_replica_sticky_seconds: float = 5  # 쓰기 커밋 이후 주 DB 로 조회하는 시간
     backend_cors_origins: List[AnyHttpUrl | str] | str
     debug: bool
     session_secret_key: str
     redis_endpoint: List[str] | str
     redis_database: int
+    redis_sentinel_endpoint: List[str] | str = []  # 설정 시, Sentinel 로 주 노드 탐색
+    redis_sentinel_master: str = 'mymaster'
+    redis_replica_reads: bool = True  # stale_ok 조회를 복제 노드로 전송
+    redis_lock_endpoint: List[str] | str = []  # 설정 시, 서로 독립된 주 노드들로 Redlock 획득
+    redis_max_connections: int = 1000  # 연결 풀 최대 연결 수 (명령용, 구독/블로킹 명령용 연결 풀 각각)
+    redis_pool_timeout: float = 5  # 연결 풀에 사용 가능한 연결이 없을 때 대기 시간 (seconds)
+    redis_auto_pipeline: bool = False  # 동시에 보낸 단일 명령들을 하나의 파이프라인으로 전송
+    redis_auto_pipeline_window: float = 0  # 명령을 모으는 시간 (seconds, 0 인 경우 이벤트 루프 한 차례)
+    redis_codec: str = 'json'  # Redis 값 직렬화 형식 (json, orjson, msgpack), 기존 JSON 값은 형식과 관계없이 조회
+    redis_compress_threshold: int = 0  # 직렬화한 값이 이 크기 이상인 경우 zstd 압축 (bytes, 0 인 경우 압축하지 않음)
+    redis_scan_count: int = 1000  # SCAN 명령 한 번에 조회할 키 수 (COUNT)
+    redis_history_max_count: int = 1000  # 대화방별 Redis 에 유지할 최근 내역 수 (0 인 경우 제한하지 않음)
+    redis_history_max_days: int = 0  # 대화방별 Redis 에 유지할 최근 내역 기간 (days, 0 인 경우 제한하지 않음)
+    redis_history_trim_slack: int = 100  # 유지 범위를 넘은 내역이 이 수보다 많아질 때 한 번에 DB 저장 후 삭제
+    redis_history_idle_seconds: int = 86400  # 이 시간 동안 사용하지 않은 대화방 내역은 Redis 에서 삭제 (0 인 경우 삭제하지 않음)
+    redis_history_max_rooms: int = 0  # 내역을 Redis 에 유지할 최대 대화방 수, 초과 시 가장 오래 사용하지 않은 대화방부터 삭제
+    redis_history_evict_interval: int = 60  # 유휴 대화방 내역 삭제 주기 (seconds)
+    redis_cluster: bool = False  # 설정 시, redis_endpoint 를 클러스터 시작 노드로 사용하고 키에 해시 태그 추가
     aws_access_key: str
     aws_secret_access_key: str
     aws_default_region: str = 'ap-northeast-2'
     aws_storage_bucket_name: str
     aws_cdn_url: str
+    presigned_url_cache_size: int = 10000
+    password_hash_workers: int = 0  # 0 인 경우, CPU 코어 수
+    password_hash_concurrency: int = 0  # 0 인 경우, 프로세스 수 * 2
+    session_cache_size: int = 10000
+    session_cache_ttl: int = 10
+    session_snapshot_ttl: int = 300  # Redis 세션 (유저, 프로필) 유지 시간, 만료 후 DB 에서 활성화 여부 및 권한 재확인 (seconds)
+    crud_cache_size: int = 10000
+    crud_cache_ttl: int = 10
+    media_job_workers: int = 2
+    media_job_max_attempts: int = 3
+    chat_export_batch_size: int = 1000
+    search_ngram_token_size: int = 2  # MySQL ngram_token_size 와 동일하게 설정
+    search_limit: int = 20
+    search_max_limit: int = 100
     debug: bool
 
     @validator('backend_cors_origins', pre=True)
@@ -31,10 +67,10 @@ class Settings(BaseSettings):
             return v
         raise ValueError(v)
 
-    @validator('redis_endpoint', pre=True)
+    @validator('redis_endpoint', 'redis_sentinel_endpoint', 'redis_lock_endpoint', pre=True)
     def validate_redis_endpoint(cls, v: str | List[str]) -> List[str]:
         if isinstance(v, str) and not v.startswith('['):
-            return [i.strip() for i in v.split(',')]
+            return [i.strip() for i in v.split(',') if i.strip()]
         elif isinstance(v, list):
             return v
         raise ValueError(v)
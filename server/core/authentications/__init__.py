@@ -3,6 +3,7 @@ from datetime import datetime, timedelta
 from typing import Generic, Optional, List
 from uuid import UUID
 
+from aioredis import Redis
 from fastapi import HTTPException, Request, Depends, status
 from fastapi.encoders import jsonable_encoder
 from fastapi_sessions.backends.session_backend import SessionModel, BackendError
@@ -14,6 +15,8 @@ from sqlalchemy.orm import joinedload
 
 from server.core.authentications.constants import SESSION_AGE, COOKIE_NAME, SESSION_IDENTIFIER
 from server.core.enums import UserType
+from server.core.externals.redis.schemas import RedisUserSessionS, RedisUserSessionByIdS
+from server.core.utils.cache import TTLCache
 from server.crud.user import UserCRUD, UserSessionCRUD
 from server.db.databases import get_async_session, settings, async_session
 from server.models import UserSession, User
@@ -91,6 +94,13 @@ class SessionDatabaseVerifier(Generic[ID, SessionModel]):
                 raise self.auth_http_exception
             return
 
+        # 동일 요청 내 세션 재조회 방지 (verifier, RoleChecker 등)
+        memo: dict = getattr(request.state, 'user_sessions', None)
+        if memo is None:
+            memo = request.state.user_sessions = {}
+        if session_id in memo:
+            return memo[session_id]
+
         user_session: UserSession = await self.backend.read(session_id, session)
         session_data = UserSessionS.from_orm(user_session)
         if not self.verify_session(session_data):
@@ -101,6 +111,7 @@ class SessionDatabaseVerifier(Generic[ID, SessionModel]):
         if not user_session.user.is_active:
             raise self.auth_http_exception
 
+        memo[session_id] = user_session
         return user_session
 
 
@@ -146,13 +157,63 @@ class DatabaseBackend(Generic[ID, SessionModel], SessionDatabaseBackend[ID, Sess
         await crud.delete(conditions=(UserSession.id == user_session.id,))
 
 
+class RedisBackend(Generic[ID, SessionModel], DatabaseBackend[ID, SessionModel]):
+    """
+    Redis 세션 저장소 (DB 세션의 read-through 캐시)
+    - 프로세스 내부 LRU(짧은 TTL) → Redis(session_snapshot_ttl) → DB 순서로 조회
+    - 유저 비활성화, 권한 및 프로필 변경은 Redis 세션 만료 후 DB 조회 시 반영
+    - 로그아웃 시, 모든 캐시에서 제거
+    """
+
+    def __init__(self, _cookie_params: CookieParameters) -> None:
+        super().__init__(_cookie_params)
+        self.cache = TTLCache(maxsize=settings.session_cache_size, ttl=settings.session_cache_ttl, name='session')
+        self._redis_handler = None
+
+    @property
+    async def redis(self) -> Redis:
+        if self._redis_handler is None:
+            from server.api.common import AsyncRedisHandler
+            self._redis_handler = AsyncRedisHandler()
+        return await self._redis_handler.redis
+
+    async def read(self, session_id: ID, session: AsyncSession):
+        key = str(session_id)
+        session_redis: RedisUserSessionS | None = self.cache.get(key)
+        if session_redis is None:
+            session_redis = await RedisUserSessionByIdS.get(await self.redis, key)
+            if session_redis is None:
+                user_session: UserSession = await super().read(session_id, session)
+                session_redis = RedisUserSessionS.from_model(user_session)
+                expire = min(
+                    settings.session_snapshot_ttl,
+                    int((session_redis.expiry_at - datetime.now().astimezone()).total_seconds())
+                )
+                if expire > 0:
+                    await RedisUserSessionByIdS.setex(await self.redis, key, expire, session_redis)
+            self.cache.set(key, session_redis)
+        return session_redis.to_model()
+
+    async def update(self, session_id: ID, data: SessionModel, session: AsyncSession) -> None:
+        await super().update(session_id, data, session)
+        await self.invalidate(session_id)
+
+    async def delete(self, session_id: ID, session: AsyncSession) -> None:
+        await super().delete(session_id, session)
+        await self.invalidate(session_id)
+
+    async def invalidate(self, session_id: ID):
+        self.cache.delete(str(session_id))
+        await RedisUserSessionByIdS.delete(await self.redis, str(session_id))
+
+
 class BasicVerifier(SessionDatabaseVerifier[UUID, SessionData]):
     def __init__(
         self,
         *,
         identifier: str,
         auto_error: bool,
-        _backend: DatabaseBackend[UUID, SessionData],
+        _backend: SessionDatabaseBackend[UUID, SessionData],
         auth_http_exception: HTTPException,
     ):
         self._identifier = identifier
@@ -189,7 +250,7 @@ cookie = SessionCookie(
     secret_key=settings.session_secret_key,
     cookie_params=cookie_params)
 
-backend = DatabaseBackend[UUID, SessionData](cookie_params)
+backend = RedisBackend[UUID, SessionData](cookie_params)
 
 verifier = BasicVerifier(
     identifier=SESSION_IDENTIFIER,
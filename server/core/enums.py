@@ -110,6 +110,13 @@ class ChatHistoryType(IntValueEnum):
     NOTICE = '안내'
 
 
+class MediaJobStatus(IntValueEnum):
+    PENDING = '대기'
+    UPLOADING = '업로드 중'
+    READY = '완료'
+    FAILED = '실패'
+
+
 class SendMessageType(IntValueEnum):
     UNICAST = '유니캐스트'
     BROADCAST = '브로드캐스트'
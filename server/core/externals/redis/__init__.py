@@ -1,46 +1,501 @@
-import time
-from typing import List
+import asyncio
+import logging
+from typing import List, Optional, Tuple, Dict, Any
+from urllib.parse import urlparse
+from weakref import WeakKeyDictionary
 
 import aioredis
+from aioredis import BlockingConnectionPool
+from aioredis.client import Pipeline, PubSub
+from aioredis.exceptions import RedisError, ReadOnlyError, ConnectionError, TimeoutError
+from aioredis.sentinel import Sentinel, SentinelConnectionPool
+from redis.asyncio import ConnectionPool as ClusterNodePool
+from redis.asyncio.client import PubSub as ClusterNodePubSub
+from redis.asyncio.cluster import RedisCluster, ClusterNode
 
+from server.core.metrics import metrics
 from server.db.databases import settings
 
+logger = logging.getLogger('redis')
+
+FAILOVER_ERRORS = (ReadOnlyError, ConnectionError, TimeoutError)
+
+
+class BlockingSentinelConnectionPool(SentinelConnectionPool, BlockingConnectionPool):
+    """Sentinel 연결 풀 (사용 가능한 연결이 없으면 timeout 동안 대기)"""
+
+
+class FailoverPipeline(Pipeline):
+    """
+    주 노드 전환 감지 파이프라인
+    - 파이프라인은 재실행 시 중복 반영될 수 있으므로, 주 노드만 다시 찾고 오류는 그대로 전달
+    """
+
+    client: Optional['FailoverRedis'] = None
+
+    async def execute(self, raise_on_error: bool = True):
+        try:
+            return await super().execute(raise_on_error=raise_on_error)
+        except FAILOVER_ERRORS:
+            if self.client is not None:
+                await self.client.failover()
+            raise
+
+
+class ReplicaRedis(aioredis.Redis):
+    """
+    복제 노드 조회 클라이언트
+    - 복제 노드 연결 오류 시, 주 노드로 조회
+    """
+
+    endpoint: Optional[str] = None
+    primary: Optional['FailoverRedis'] = None
+
+    async def execute_command(self, *args, **options):
+        try:
+            return await super().execute_command(*args, **options)
+        except (ConnectionError, TimeoutError):
+            if self.primary is None:
+                raise
+            metrics.incr('redis_replica_fallback')
+            return await self.primary.execute_command(*args, **options)
+
+
+class FailoverRedis(aioredis.Redis):
+    """
+    주 노드 전환 시, 주 노드를 다시 찾아 연결 풀을 교체하는 클라이언트
+    - READONLY 오류 시 1회 재시도, 연결 오류 시 명령이 반영됐을 수 있으므로 주 노드가 바뀐 경우에만 재시도
+    - 구독, 블로킹 명령은 명령용 연결 풀을 점유하지 않도록 전용 연결 풀 (dedicated) 사용
+    - replica() 로 조회 전용 복제 노드 클라이언트 반환 (복제 노드가 없으면 주 노드)
+    - auto_pipeline 설정 시, 여러 코루틴이 같은 이벤트 루프 차례(혹은 auto_pipeline_window 동안)에 보낸
+      명령을 하나의 파이프라인으로 묶어 전송 (연결 오류 시 조회 명령만 개별 재시도)
+    """
+
+    # 전용 연결 풀로 보내는 명령 (블로킹)
+    BLOCKING_COMMANDS = {
+        'BLPOP', 'BRPOP', 'BRPOPLPUSH', 'BLMOVE', 'BZPOPMIN', 'BZPOPMAX', 'XREAD', 'XREADGROUP', 'WAIT',
+    }
+    # 파이프라인으로 묶지 않는 명령 (블로킹, 트랜잭션, 구독)
+    AUTO_PIPELINE_EXCLUDE = BLOCKING_COMMANDS | {
+        'WATCH', 'UNWATCH', 'MULTI', 'EXEC', 'DISCARD', 'SUBSCRIBE', 'PSUBSCRIBE', 'MONITOR',
+    }
+    AUTO_PIPELINE_MAX = 1000
+    # 파이프라인 연결 오류 시 개별 재시도하는 명령 (조회 명령, 중복 실행해도 결과가 같음)
+    AUTO_PIPELINE_RETRY = {
+        'GET', 'MGET', 'GETRANGE', 'STRLEN', 'EXISTS', 'TYPE', 'TTL', 'PTTL', 'HGET', 'HMGET', 'HGETALL', 'HLEN',
+        'HEXISTS', 'LRANGE', 'LINDEX', 'LLEN', 'SMEMBERS', 'SISMEMBER', 'SCARD', 'ZRANGE', 'ZREVRANGE',
+        'ZRANGEBYSCORE', 'ZREVRANGEBYSCORE', 'ZSCORE', 'ZRANK', 'ZREVRANK', 'ZCARD', 'ZCOUNT',
+    }
+
+    manager: Optional['AioRedis'] = None
+    master: Optional[str] = None
+    replicas: List[ReplicaRedis] = []
+    dedicated: Optional[aioredis.Redis] = None
+    _replica_index: int = 0
+    auto_pipeline: bool = False
+    auto_pipeline_window: float = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._auto_pipeline_queue: List[Tuple[tuple, dict, asyncio.Future]] = []
+        self._auto_pipeline_task: Optional[asyncio.Task] = None
+
+    def replica(self) -> aioredis.Redis:
+        if not self.replicas:
+            return self
+        self._replica_index = (self._replica_index + 1) % len(self.replicas)
+        return self.replicas[self._replica_index]
+
+    async def failover(self) -> bool:
+        if self.manager is None:
+            return False
+        return await self.manager.failover(self)
+
+    def pubsub(self, **kwargs) -> PubSub:
+        if self.dedicated is None:
+            return super().pubsub(**kwargs)
+        return self.dedicated.pubsub(**kwargs)
+
+    async def execute_command(self, *args, **options):
+        command = str(args[0]).upper()
+        if self.dedicated is not None and self.connection is None and command in self.BLOCKING_COMMANDS:
+            try:
+                return await self.dedicated.execute_command(*args, **options)
+            except FAILOVER_ERRORS:
+                await self.failover()
+                raise
+        if self.auto_pipeline and self.connection is None and command not in self.AUTO_PIPELINE_EXCLUDE:
+            return await self._enqueue(args, options)
+        return await self._execute_command(*args, **options)
+
+    async def _execute_command(self, *args, **options):
+        master = self.master
+        try:
+            return await super().execute_command(*args, **options)
+        except ReadOnlyError:
+            # 복제 노드에서 거부된 명령은 반영되지 않았으므로 재시도
+            if not await self.failover():
+                raise
+        except (ConnectionError, TimeoutError):
+            # 전송 후 연결이 끊긴 명령은 반영됐을 수 있으므로 (PUBLISH, LPUSH, INCR 등), 주 노드가 바뀐 경우에만 재시도
+            if not await self.failover() or self.master == master:
+                raise
+        return await super().execute_command(*args, **options)
+
+    def _enqueue(self, args: tuple, options: dict) -> asyncio.Future:
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._auto_pipeline_queue.append((args, options, future))
+        if self._auto_pipeline_task is None:
+            self._auto_pipeline_task = asyncio.create_task(self._flush())
+        return future
+
+    async def _flush(self):
+        # 태스크가 실행되기 전까지 다른 코루틴이 보낸 명령을 모아서 전송
+        if self.auto_pipeline_window:
+            await asyncio.sleep(self.auto_pipeline_window)
+        queue, self._auto_pipeline_queue, self._auto_pipeline_task = self._auto_pipeline_queue, [], None
+        for start in range(0, len(queue), self.AUTO_PIPELINE_MAX):
+            await self._execute_batch(queue[start:start + self.AUTO_PIPELINE_MAX])
+
+    async def _execute_batch(self, batch: List[Tuple[tuple, dict, asyncio.Future]]):
+        metrics.observe('redis_auto_pipeline_batch', len(batch))
+        pipe = Pipeline(self.connection_pool, self.response_callbacks, transaction=False, shard_hint=None)
+        for args, options, _ in batch:
+            pipe.execute_command(*args, **options)
+        try:
+            results = await pipe.execute(raise_on_error=False)
+        except FAILOVER_ERRORS as e:
+            results = [e] * len(batch)
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if any(isinstance(result, FAILOVER_ERRORS) for result in results):
+            await self.failover()
+        for (args, options, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, FAILOVER_ERRORS):
+                # 반영되지 않은 명령 (READONLY) 과 조회 명령만 개별 재시도, 그 외에는 중복 반영될 수 있으므로 오류 전달
+                if not isinstance(result, ReadOnlyError) and str(args[0]).upper() not in self.AUTO_PIPELINE_RETRY:
+                    future.set_exception(result)
+                    continue
+                try:
+                    future.set_result(await self._execute_command(*args, **options))
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+            elif isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None) -> FailoverPipeline:
+        pipe = FailoverPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+        pipe.client = self
+        return pipe
+
+
+class ShardedPubSub(ClusterNodePubSub):
+    """
+    클러스터 모드 샤드 채널 구독 (SSUBSCRIBE)
+    - 첫 구독 시 채널 슬롯을 담당하는 노드에 연결하므로, 하나의 객체는 같은 슬롯의 채널만 구독
+    """
+
+    PUBLISH_MESSAGE_TYPES = ('message', 'pmessage', 'smessage')
+    UNSUBSCRIBE_MESSAGE_TYPES = ('unsubscribe', 'punsubscribe', 'sunsubscribe')
+
+    def __init__(self, cluster: RedisCluster, **kwargs):
+        self.cluster = cluster
+        super().__init__(self.get_pool(cluster.get_default_node()), **kwargs)
+
+    @classmethod
+    def get_pool(cls, node: ClusterNode) -> ClusterNodePool:
+        return ClusterNodePool(connection_class=node.connection_class, **node.connection_kwargs)
+
+    async def subscribe(self, *args, **kwargs):
+        channels = dict.fromkeys(args)
+        channels.update(kwargs)
+        if self.connection is None and channels:
+            pool, self.connection_pool = self.connection_pool, self.get_pool(
+                self.cluster.get_node_from_key(next(iter(channels)))
+            )
+            await pool.disconnect()
+        ret = await self.execute_command('SSUBSCRIBE', *channels.keys())
+        channels = self._normalize_keys(channels)
+        self.channels.update(channels)
+        self.pending_unsubscribe_channels.difference_update(channels)
+        return ret
+
+    def unsubscribe(self, *args):
+        channels = self._normalize_keys(dict.fromkeys(args)) if args else self.channels
+        self.pending_unsubscribe_channels.update(channels)
+        return self.execute_command('SUNSUBSCRIBE', *args)
+
+    async def aclose(self):
+        await super().aclose()
+        await self.connection_pool.disconnect()
+
 
 class AioRedis:
+    """
+    Redis 연결 관리자
+    - Sentinel 설정 시 Sentinel 로, 미설정 시 각 노드의 ROLE 조회로 주 노드 탐색 (실패 시 지수 백오프로 재시도)
+    - 이벤트 루프 단위로 주 노드 클라이언트를 공유하고, 주 노드 전환 시 연결 풀 교체
+    - replica_reads 설정 시, 탐색된 복제 노드로 조회 전용 클라이언트 생성
+    - cluster 설정 시, endpoint 를 시작 노드로 하는 클러스터 클라이언트 사용 (슬롯 이동/노드 전환은 클라이언트가 처리)
+    """
 
     RETRY_COUNT = 5
     RETRY_DELAY = 0.2
+    RETRY_MAX_DELAY = 3.2
+    PROBE_TIMEOUT = 1
 
-    def get_connections(self):
-        connections = []
-        for _ in range(self.RETRY_COUNT):
-            for ep in self.endpoint:
-                try:
-                    conn = aioredis.Redis.from_url(
-                        ep,
-                        db=self.db,
-                        encoding=self.encoding,
-                        max_connections=self.max_connections,
-                        decode_responses=self.decode_responses
-                    )
-                except:
-                    time.sleep(self.RETRY_DELAY)
-                else:
-                    connections.append(conn)
-            if connections:
-                return connections
-        raise ConnectionError('Failed to connect Redis.')
+    # {event loop: {topology key: client}}
+    _clients: WeakKeyDictionary = WeakKeyDictionary()
+    # {event loop: {lock endpoints: [client]}}
+    _lock_clients: WeakKeyDictionary = WeakKeyDictionary()
+    # {topology key: {'master': str, 'replicas': [str], 'failovers': int}}
+    topologies: Dict[Tuple, Dict[str, Any]] = {}
 
     def __init__(
         self,
         endpoint: List[str] = settings.redis_endpoint,
         db: int = settings.redis_database,
         encoding: str = "utf-8",
-        max_connections: int = 10,
+        encoding_errors: str = 'surrogateescape',  # 압축, MessagePack 등 바이너리 값을 문자열 응답으로 보존
+        max_connections: int = settings.redis_max_connections,
+        pool_timeout: float = settings.redis_pool_timeout,
         decode_responses: bool = True,
+        sentinel_endpoint: List[str] = settings.redis_sentinel_endpoint,
+        sentinel_master: str = settings.redis_sentinel_master,
+        replica_reads: bool = settings.redis_replica_reads,
+        cluster: bool = settings.redis_cluster,
+        lock_endpoint: List[str] = settings.redis_lock_endpoint,
+        auto_pipeline: bool = settings.redis_auto_pipeline,
+        auto_pipeline_window: float = settings.redis_auto_pipeline_window,
     ):
         self.endpoint = endpoint
         self.db = db
         self.encoding = encoding
+        self.encoding_errors = encoding_errors
         self.max_connections = max_connections
+        self.pool_timeout = pool_timeout
         self.decode_responses = decode_responses
+        self.sentinel_endpoint = sentinel_endpoint
+        self.sentinel_master = sentinel_master
+        self.replica_reads = replica_reads
+        self.cluster = cluster
+        self.lock_endpoint = lock_endpoint
+        self.auto_pipeline = auto_pipeline
+        self.auto_pipeline_window = auto_pipeline_window
+        self.sentinel: Optional[Sentinel] = sentinel_endpoint and Sentinel(
+            [self.get_address(ep) for ep in sentinel_endpoint],
+            sentinel_kwargs={'socket_timeout': self.PROBE_TIMEOUT},
+            db=db, encoding=encoding, encoding_errors=encoding_errors, max_connections=max_connections,
+            timeout=pool_timeout, decode_responses=decode_responses
+        ) or None
+        self._lock = asyncio.Lock()
+
+    @property
+    def key(self) -> Tuple:
+        if self.cluster:
+            return 'cluster', tuple(self.endpoint)
+        if self.sentinel:
+            return 'sentinel', self.sentinel_master, tuple(self.sentinel_endpoint), self.db
+        return 'endpoint', tuple(self.endpoint), self.db
+
+    @property
+    def topology(self) -> Dict[str, Any]:
+        return self.topologies.setdefault(self.key, {'master': None, 'replicas': [], 'failovers': 0})
+
+    @classmethod
+    def get_address(cls, endpoint: str) -> Tuple[str, int]:
+        parsed = urlparse(endpoint if '://' in endpoint else f'redis://{endpoint}')
+        return parsed.hostname, parsed.port or 6379
+
+    def create_pool(self, url: str) -> BlockingConnectionPool:
+        return BlockingConnectionPool.from_url(
+            url,
+            db=self.db,
+            encoding=self.encoding,
+            encoding_errors=self.encoding_errors,
+            max_connections=self.max_connections,
+            timeout=self.pool_timeout,
+            decode_responses=self.decode_responses
+        )
+
+    async def get_role(self, endpoint: str) -> Tuple[str, str]:
+        conn = aioredis.Redis.from_url(
+            endpoint, socket_timeout=self.PROBE_TIMEOUT, socket_connect_timeout=self.PROBE_TIMEOUT,
+            decode_responses=True
+        )
+        try:
+            role = await conn.execute_command('ROLE')
+            return endpoint, role[0]
+        finally:
+            await conn.connection_pool.disconnect()
+
+    async def probe(self) -> Tuple[Optional[str], List[str]]:
+        """각 노드의 ROLE 을 동시에 조회해 주 노드와 복제 노드 반환"""
+        results = await asyncio.gather(*[self.get_role(ep) for ep in self.endpoint], return_exceptions=True)
+        master, replicas = None, []
+        for r in results:
+            if isinstance(r, BaseException):
+                logger.warning('Failed to probe Redis role: %r', r)
+                continue
+            endpoint, role = r
+            if role == 'master':
+                master = master or endpoint
+            else:
+                replicas.append(endpoint)
+        return master, replicas
+
+    async def discover(self) -> str:
+        """주 노드 탐색 (지수 백오프로 재시도)"""
+        delay = self.RETRY_DELAY
+        for _ in range(self.RETRY_COUNT):
+            try:
+                if self.sentinel:
+                    host, port = await self.sentinel.discover_master(self.sentinel_master)
+                    master = f'redis://{host}:{port}'
+                    replicas = [
+                        f'redis://{h}:{p}' for h, p in await self.sentinel.discover_slaves(self.sentinel_master)
+                    ]
+                else:
+                    master, replicas = await self.probe()
+            except (RedisError, OSError) as e:
+                logger.warning('Failed to discover Redis master: %r', e)
+            else:
+                if master:
+                    self.update_topology(master, replicas)
+                    return master
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.RETRY_MAX_DELAY)
+        raise ConnectionError('Failed to connect Redis.')
+
+    def update_topology(self, master: str, replicas: List[str]):
+        topology = self.topology
+        if topology['master'] and topology['master'] != master:
+            metrics.gauge('redis_master', 0, endpoint=topology['master'])
+        for replica in topology['replicas']:
+            metrics.gauge('redis_replica', 0, endpoint=replica)
+        topology.update(master=master, replicas=replicas)
+        metrics.gauge('redis_master', 1, endpoint=master)
+        for replica in replicas:
+            metrics.gauge('redis_replica', 1, endpoint=replica)
+
+    async def connect_cluster(self) -> RedisCluster:
+        client = RedisCluster(
+            startup_nodes=[ClusterNode(*self.get_address(ep)) for ep in self.endpoint],
+            encoding=self.encoding,
+            encoding_errors=self.encoding_errors,
+            max_connections=self.max_connections,
+            decode_responses=self.decode_responses
+        )
+        await client.initialize()
+        self.update_topology(
+            ','.join(n.name for n in client.get_primaries()),
+            [n.name for n in client.get_replicas()]
+        )
+        return client
+
+    async def connect(self) -> FailoverRedis | RedisCluster:
+        clients: Dict[Tuple, FailoverRedis | RedisCluster] = self._clients.setdefault(asyncio.get_running_loop(), {})
+        if self.key in clients:
+            return clients[self.key]
+
+        if self.cluster:
+            return clients.setdefault(self.key, await self.connect_cluster())
+        if self.sentinel:
+            client: FailoverRedis = self.sentinel.master_for(
+                self.sentinel_master, redis_class=FailoverRedis, connection_pool_class=BlockingSentinelConnectionPool
+            )
+            client.dedicated = self.sentinel.master_for(
+                self.sentinel_master, connection_pool_class=BlockingSentinelConnectionPool
+            )
+            client.master = await self.discover()
+        else:
+            master: str = self.topology['master'] or await self.discover()
+            client = FailoverRedis(connection_pool=self.create_pool(master))
+            client.dedicated = aioredis.Redis(connection_pool=self.create_pool(master))
+            client.master = master
+        client.manager = self
+        client.auto_pipeline = self.auto_pipeline
+        client.auto_pipeline_window = self.auto_pipeline_window
+        await self.set_replicas(client)
+        return clients.setdefault(self.key, client)
+
+    async def connect_lock_nodes(self) -> List[aioredis.Redis | RedisCluster]:
+        """
+        Redlock 노드 반환
+        - lock_endpoint 미설정 시, 주 노드 (혹은 클러스터) 하나
+        - 설정 시, 서로 독립된 주 노드들 (과반수 획득)
+        """
+        if not self.lock_endpoint:
+            return [await self.connect()]
+        clients: Dict[Tuple, List[aioredis.Redis]] = self._lock_clients.setdefault(asyncio.get_running_loop(), {})
+        key = tuple(self.lock_endpoint)
+        if key not in clients:
+            clients[key] = [aioredis.Redis(connection_pool=self.create_pool(ep)) for ep in self.lock_endpoint]
+        return clients[key]
+
+    async def set_replicas(self, client: FailoverRedis):
+        """
+        복제 노드 조회 클라이언트 갱신
+        - Sentinel 설정 시, Sentinel 연결 풀이 복제 노드를 순환 선택
+        - 주 노드로 승격된 노드의 클라이언트는 제거
+        """
+        if not self.replica_reads:
+            return
+        if self.sentinel:
+            if not client.replicas:
+                replica: ReplicaRedis = self.sentinel.slave_for(
+                    self.sentinel_master, redis_class=ReplicaRedis, connection_pool_class=BlockingSentinelConnectionPool
+                )
+                replica.primary = client
+                client.replicas = [replica]
+            return
+
+        current: Dict[str, ReplicaRedis] = {r.endpoint: r for r in client.replicas}
+        replicas: List[ReplicaRedis] = []
+        for endpoint in self.topology['replicas']:
+            replica: ReplicaRedis = current.pop(endpoint, None) or ReplicaRedis(
+                connection_pool=self.create_pool(endpoint)
+            )
+            replica.endpoint = endpoint
+            replica.primary = client
+            replicas.append(replica)
+        client.replicas = replicas
+        for replica in current.values():
+            await replica.connection_pool.disconnect()
+
+    async def failover(self, client: FailoverRedis) -> bool:
+        """
+        주 노드 재탐색 후, 주 노드가 바뀐 경우 연결 풀 교체
+        - Sentinel 연결 풀은 새 연결 생성 시 주 노드를 다시 조회하므로, 주소만 갱신
+        """
+        async with self._lock:
+            try:
+                master: str = await self.discover()
+            except ConnectionError:
+                return False
+            await self.set_replicas(client)
+            if master == client.master:
+                return True
+
+            logger.warning('Redis master changed: %s -> %s', client.master, master)
+            self.topology['failovers'] += 1
+            metrics.incr('redis_failover')
+            if not self.sentinel:
+                for c in (client, client.dedicated):
+                    pool, c.connection_pool = c.connection_pool, self.create_pool(master)
+                    await pool.disconnect()
+            client.master = master
+            return True
+
+    @classmethod
+    def topology_info(cls) -> List[Dict[str, Any]]:
+        return [{'key': ':'.join(map(str, k)), **v} for k, v in cls.topologies.items()]
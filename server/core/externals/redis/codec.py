@@ -0,0 +1,103 @@
+import json
+from functools import lru_cache
+from typing import Any, Dict, Type
+
+import msgpack
+import orjson
+import zstandard
+from pydantic import BaseModel
+from pydantic.json import pydantic_encoder
+
+# JSON 값은 '{', '[', '"', 숫자 등으로 시작하므로, 제어 문자로 시작하는 값은 다른 형식
+MSGPACK_MARKER = b'\x01'
+ZSTD_MARKER = b'\x02'
+MARKERS = (MSGPACK_MARKER.decode(), ZSTD_MARKER.decode())
+
+
+def to_bytes(data: str | bytes | memoryview) -> bytes:
+    # 연결 풀은 surrogateescape 로 응답을 디코딩하므로, 원래 바이트로 복원
+    if isinstance(data, str):
+        return data.encode('utf-8', 'surrogateescape')
+    return bytes(data)
+
+
+def loads_json(data: str | bytes) -> Any:
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # orjson 이 허용하지 않는 NaN, Infinity 등
+        return json.loads(data)
+
+
+class Codec:
+    """
+    Redis 값 직렬화
+    - dumps 는 설정된 형식으로 기록, loads 는 저장된 값의 표식으로 형식을 구분해 읽음 (기존 JSON 값 호환)
+    - compress_threshold 이상 크기의 값은 zstd 로 압축
+    """
+
+    name: str = ''
+
+    def __init__(self, compress_threshold: int = 0):
+        self.compress_threshold = compress_threshold
+        self._compressor = zstandard.ZstdCompressor() if compress_threshold else None
+
+    def encode(self, value: Any) -> str | bytes:
+        raise NotImplementedError
+
+    def dumps(self, value: Any) -> str | bytes:
+        data = self.encode(value)
+        if self._compressor and len(data) >= self.compress_threshold:
+            data = ZSTD_MARKER + self._compressor.compress(data.encode() if isinstance(data, str) else data)
+        return data
+
+    @classmethod
+    def loads(cls, data: Any) -> Any:
+        if data is None or isinstance(data, int | float):
+            return data
+        if isinstance(data, str) and (not data or data[0] not in MARKERS):
+            return loads_json(data)
+        data = to_bytes(data)
+        if data[:1] == ZSTD_MARKER:
+            return cls.loads(zstandard.ZstdDecompressor().decompress(data[1:]))
+        if data[:1] == MSGPACK_MARKER:
+            return msgpack.unpackb(data[1:])
+        return loads_json(data)
+
+
+class JsonCodec(Codec):
+    # 기존 값과 같은 바이트로 기록 (pydantic .json(), json.dumps)
+    name = 'json'
+
+    def encode(self, value: Any) -> str:
+        if isinstance(value, BaseModel):
+            return value.json()
+        return json.dumps(value, default=pydantic_encoder)
+
+
+class OrjsonCodec(Codec):
+    name = 'orjson'
+
+    def encode(self, value: Any) -> bytes:
+        if isinstance(value, BaseModel):
+            value = value.dict()
+        return orjson.dumps(value, default=pydantic_encoder)
+
+
+class MsgpackCodec(Codec):
+    name = 'msgpack'
+
+    def encode(self, value: Any) -> bytes:
+        if isinstance(value, BaseModel):
+            value = value.dict()
+        return MSGPACK_MARKER + msgpack.packb(value, default=pydantic_encoder)
+
+
+CODECS: Dict[str, Type[Codec]] = {c.name: c for c in (JsonCodec, OrjsonCodec, MsgpackCodec)}
+
+
+@lru_cache()
+def get_codec(name: str, compress_threshold: int = 0) -> Codec:
+    if name not in CODECS:
+        raise ValueError(f'Unknown redis codec: {name}')
+    return CODECS[name](compress_threshold)
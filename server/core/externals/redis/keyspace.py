@@ -0,0 +1,125 @@
+import heapq
+import json
+import re
+from typing import AsyncIterator, Dict, List, Optional, Pattern, Tuple
+
+from aioredis import Redis
+from redis.asyncio.cluster import RedisCluster
+
+from server.core.externals.redis import schemas
+from server.core.externals.redis.mixin import KeyMixin, scan_keys
+
+OTHER_FAMILY = 'other'
+
+
+def get_families() -> List[Tuple[str, Pattern]]:
+    """스키마 키 형식별 (SCAN 패턴, 정규식) 목록 (잠금 키 포함)"""
+    families = []
+    for cls in vars(schemas).values():
+        if not (isinstance(cls, type) and issubclass(cls, KeyMixin) and hasattr(cls, 'format')):
+            continue
+        key_format: str = cls.get_format()
+        count = key_format.count('{}')
+        pattern = re.escape(key_format.format(*['\0'] * count)).replace('\0', '[^:]+')
+        families.append((key_format.format(*['*'] * count), re.compile(f'^{pattern}$')))
+    families.append(('lock:*', re.compile('^lock:')))
+    return families
+
+
+class KeyFamilyStat:
+
+    __slots__ = ('count', 'sampled', 'memory', 'largest')
+
+    def __init__(self):
+        self.count = 0
+        self.sampled = 0
+        self.memory = 0
+        self.largest: List[Tuple[int, str]] = []  # (bytes, key) 최소 힙
+
+    def observe(self, key: str, memory: Optional[int], top: int):
+        if memory is None:  # 순회 중 만료, 삭제된 키
+            return
+        self.sampled += 1
+        self.memory += memory
+        if len(self.largest) < top:
+            heapq.heappush(self.largest, (memory, key))
+        elif memory > self.largest[0][0]:
+            heapq.heapreplace(self.largest, (memory, key))
+
+    @property
+    def estimated_memory(self) -> int:
+        # 표본 평균으로 추정한 전체 메모리 사용량
+        return round(self.memory / self.sampled * self.count) if self.sampled else 0
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'sampled': self.sampled,
+            'memory_bytes': self.memory,
+            'estimated_memory_bytes': self.estimated_memory,
+            'largest': [{'key': k, 'memory_bytes': m} for m, k in sorted(self.largest, reverse=True)],
+        }
+
+
+class KeyspaceReport:
+    """
+    키 종류별 키 수, 메모리 사용량, 큰 키 분석
+    - SCAN 으로 전체 키를 순회하고, sample_rate 비율의 키만 MEMORY USAGE 조회 (키 목록은 보관하지 않음)
+    - 순회 중에는 배치마다 진행 상황을, 순회 후에는 키 종류별 결과를 NDJSON 으로 전송
+    """
+
+    def __init__(
+        self,
+        redis: Redis | RedisCluster,
+        match: Optional[str] = None,
+        count: Optional[int] = None,
+        sample_rate: float = 1.0,
+        samples: int = 5,  # MEMORY USAGE SAMPLES (컬렉션 내부 항목 표본 수)
+        top: int = 10
+    ):
+        assert 0 < sample_rate <= 1, 'sample_rate should be in (0, 1].'
+        self.redis = redis
+        self.match = match
+        self.count = count
+        self.step = round(1 / sample_rate)
+        self.samples = samples
+        self.top = top
+        self.families = get_families()
+        self.stats: Dict[str, KeyFamilyStat] = {}
+
+    def get_family(self, key: str) -> str:
+        return next((name for name, pattern in self.families if pattern.match(key)), OTHER_FAMILY)
+
+    async def memory_usage(self, keys: List[str]) -> List[Optional[int]]:
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.memory_usage(key, samples=self.samples)
+        return await pipe.execute()
+
+    async def analyze(self) -> AsyncIterator[Dict]:
+        scanned = 0
+        async for keys in scan_keys(self.redis, self.match, self.count):
+            sampled: List[Tuple[str, str]] = []
+            for key in keys:
+                family = self.get_family(key)
+                stat = self.stats.setdefault(family, KeyFamilyStat())
+                stat.count += 1
+                # 키 종류별 첫 키는 항상 표본에 포함
+                if scanned % self.step == 0 or stat.count == 1:
+                    sampled.append((key, family))
+                scanned += 1
+            for (key, family), memory in zip(sampled, await self.memory_usage([k for k, _ in sampled])):
+                self.stats[family].observe(key, memory, self.top)
+            yield {'type': 'progress', 'scanned': scanned}
+
+        for family, stat in sorted(self.stats.items(), key=lambda x: x[1].estimated_memory, reverse=True):
+            yield {'type': 'family', 'family': family, **stat.to_dict()}
+        yield {
+            'type': 'summary',
+            'count': sum(s.count for s in self.stats.values()),
+            'estimated_memory_bytes': sum(s.estimated_memory for s in self.stats.values())
+        }
+
+    async def ndjson(self) -> AsyncIterator[bytes]:
+        async for row in self.analyze():
+            yield (json.dumps(row) + '\n').encode()
@@ -1,126 +1,108 @@
 import asyncio
-import threading
-import time
+import logging
+import re
 import uuid
-from types import SimpleNamespace
-from typing import Optional, Awaitable, NoReturn
+from typing import Optional, Sequence, List
 
-from aioredis_cluster import RedisCluster
-from redis.client import Redis
-from redis.exceptions import RedisError, LockError, LockNotOwnedError
+import aioredis.exceptions
+import redis.exceptions
+from aioredis import Redis
+from redis.asyncio.cluster import RedisCluster
 
+from server.core.metrics import metrics
 
-class MultipleRedlockException(Exception):
-    def __init__(self, errors, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.errors = errors
+logger = logging.getLogger('redis')
 
-    def __str__(self):
-        return ' :: '.join([str(f'{e.__class__.__name__}: {e}') for e in self.errors])
-
-    def __repr__(self):
-        return self.__str__()
+LockError = aioredis.exceptions.LockError
+NODE_ERRORS = (aioredis.exceptions.RedisError, redis.exceptions.RedisError, OSError, asyncio.TimeoutError)
 
 
 class Redlock:
+    """
+    비동기 다중 노드 잠금 (Redlock)
+    - 과반수 노드에서 SET NX PX 성공 후 유효 시간이 남아 있는 경우 획득
+    - 획득 시 과반수 노드에 기록되는 단조 증가 fencing token 발급 (token 키는 만료 없이 유지)
+    - 보유 중에는 timeout 의 1/3 주기로 만료 시간 연장 (연장 실패 시 lost, 해제 시 LockError)
+    - 잠금 이름별 대기 시간, 보유 시간, 경합 횟수 기록
+    """
 
     clock_drift_factor = 0.01
-    LUA_UNLOCK_SCRIPT = """
-        if redis.call("GET", KEYS[1]) == ARGV[1] then
-            return redis.call("DEL", KEYS[1])
-        else
-            return 0
+    renew_ratio = 1 / 3
+
+    # 잠금 획득 후 현재 fencing token 반환 (실패 시 nil)
+    LUA_ACQUIRE_SCRIPT = """
+        if redis.call("SET", KEYS[1], ARGV[1], "NX", "PX", ARGV[2]) then
+            return tonumber(redis.call("GET", KEYS[2])) or 0
         end
+        return nil
     """
-
-    def __init__(
-        self,
-        redis,
-        name: str | bytes | memoryview,
-        timeout: int = 1000,  # 1000 milliseconds
-        retry_count: int = 3,
-        retry_delay: float = 0.2  # 0.2 seconds
-    ):
-        self.redis = redis
-        self.name = name
-        self.nodes = self.redis.connection_pool.nodes
-        self.timeout = timeout
-        self.drift = int(self.clock_drift_factor * self.timeout) + 2
-        self.retry_count = retry_count
-        self.retry_delay = retry_delay
-
-    @classmethod
-    def native_str(cls, x):
-        return x if not x or isinstance(x, str) else x.encode('utf-8', 'replace')
-
-    def lock(self):
-        lock_value = str(uuid.uuid4())
-        quorum = len(self.nodes.nodes) // 2 + 1
-
-        for i in range(self.retry_count):
-            n = 0
-            start_time = int(time.time() * 1000)
-            for node in self.nodes.nodes.values():
-                try:
-                    r: Redis = self.nodes.get_redis_link(
-                        host=node['host'],
-                        port=node['port'],
-                        decode_responses=True
-                    )
-                    if r.execute_command('SET', self.name, lock_value, 'NX', 'PX', self.timeout):
-                        n += 1
-                except RedisError:
-                    pass
-
-            elapsed_time = int(time.time() * 1000) - start_time
-            validity = int(self.timeout - elapsed_time - self.drift)
-            if validity > 0 and n >= quorum:
-                return lock_value
-            else:
-                self.unlock(lock_value)
-                time.sleep(self.retry_delay)
-
-        return False
-
-    def unlock(self, value):
-        for node in self.nodes.nodes.values():
-            try:
-                r: Redis = self.nodes.get_redis_link(host=node['host'], port=node['port'], decode_responses=True)
-                r.eval(self.LUA_UNLOCK_SCRIPT, 1, self.name, value)
-            except RedisError:
-                pass
-
-
-class AioRedisClusterLock:
-
-    LUA_RELEASE_SCRIPT = """
-        local token = redis.call('get', KEYS[1])
-        if not token or token ~= ARGV[1] then
+    # 잠금 보유 중인 경우, fencing token 을 더 큰 값으로만 갱신
+    LUA_FENCE_SCRIPT = """
+        if redis.call("GET", KEYS[1]) ~= ARGV[1] then
             return 0
         end
-        redis.call('del', KEYS[1])
+        local token = tonumber(redis.call("GET", KEYS[2])) or 0
+        if token < tonumber(ARGV[2]) then
+            redis.call("SET", KEYS[2], ARGV[2])
+        end
         return 1
     """
+    LUA_EXTEND_SCRIPT = """
+        if redis.call("GET", KEYS[1]) == ARGV[1] then
+            return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+        end
+        return 0
+    """
+    LUA_UNLOCK_SCRIPT = """
+        if redis.call("GET", KEYS[1]) == ARGV[1] then
+            return redis.call("DEL", KEYS[1])
+        end
+        return 0
+    """
 
     def __init__(
         self,
-        redis: RedisCluster,
-        name: str | bytes | memoryview,
-        timeout: int = 5,  # 5 seconds
+        nodes: Sequence[Redis | RedisCluster],
+        name: str,
+        timeout: float = 5,  # 5 seconds
         retry_delay: float = 0.1,  # 0.1 seconds
         blocking: bool = True,
         blocking_timeout: Optional[float] = None,
-        thread_local: bool = True
+        auto_renew: bool = True
     ):
-        self.redis = redis
+        self.nodes = nodes
         self.name = name
+        self.fence_name = self.get_fence_name(name)
         self.timeout = timeout
         self.retry_delay = retry_delay
         self.blocking = blocking
         self.blocking_timeout = blocking_timeout
-        self.thread_local = thread_local
-        self.local = threading.local() if self.thread_local else SimpleNamespace()
-        self.local.token = None
+        self.auto_renew = auto_renew
+        self.quorum = len(nodes) // 2 + 1
+        self.drift = self.clock_drift_factor * timeout + 0.002
+
+        self.value: Optional[str] = None
+        self.fencing_token: Optional[int] = None
+        self.lost = False
+        self._acquired_at: Optional[float] = None
+        self._renew_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def get_fence_name(name: str) -> str:
+        """잠금 키와 같은 해시 슬롯의 fencing token 키 (해시 태그가 없으면 잠금 이름 전체를 해시 태그로 사용)"""
+        start = name.find('{')
+        if start != -1 and name.find('}', start + 1) > start + 1:
+            return f'{name}:fence'
+        return f'{{{name}}}:fence'
+
+    @property
+    def metric_name(self) -> str:
+        # 잠금 이름의 ID 는 제외하고 기록
+        return re.sub(r'\d+', '{}', self.name)
+
+    @property
+    def px(self) -> int:
+        return int(self.timeout * 1000)
 
     async def __aenter__(self):
         if await self.acquire():
@@ -130,57 +112,94 @@ class AioRedisClusterLock:
     async def __aexit__(self, exc_type, exc_value, traceback):
         await self.release()
 
-    async def acquire(
-        self,
-        blocking: Optional[bool] = None,
-        blocking_timeout: Optional[float] = None,
-    ):
-        loop = asyncio.get_event_loop()
-        token = uuid.uuid1().hex.encode()
+    async def _eval(self, node: Redis | RedisCluster, script: str, keys: List[str], *args):
+        try:
+            return await asyncio.wait_for(node.eval(script, len(keys), *keys, *args), self.timeout)
+        except NODE_ERRORS as e:
+            logger.warning('Redlock node error. name=%s, error=%r', self.name, e)
+            return None
+
+    async def _eval_all(self, script: str, keys: List[str], *args) -> List:
+        return await asyncio.gather(*[self._eval(node, script, keys, *args) for node in self.nodes])
+
+    async def try_acquire(self) -> bool:
+        loop = asyncio.get_running_loop()
+        value = uuid.uuid4().hex
+        started = loop.time()
+
+        tokens = [
+            t for t in await self._eval_all(self.LUA_ACQUIRE_SCRIPT, [self.name, self.fence_name], value, self.px)
+            if t is not None
+        ]
+        validity = self.timeout - (loop.time() - started) - self.drift
+        if len(tokens) >= self.quorum and validity > 0:
+            # 과반수 노드가 겹치므로, 이전 보유자의 token 보다 항상 큰 값
+            fencing_token = max(int(t) for t in tokens) + 1
+            fenced = await self._eval_all(
+                self.LUA_FENCE_SCRIPT, [self.name, self.fence_name], value, fencing_token
+            )
+            if sum(1 for f in fenced if f) >= self.quorum:
+                self.value, self.fencing_token, self.lost = value, fencing_token, False
+                return True
+
+        await self._eval_all(self.LUA_UNLOCK_SCRIPT, [self.name], value)
+        return False
 
+    async def acquire(self, blocking: Optional[bool] = None, blocking_timeout: Optional[float] = None) -> bool:
+        loop = asyncio.get_running_loop()
         if blocking is None:
             blocking = self.blocking
         if blocking_timeout is None:
             blocking_timeout = self.blocking_timeout
-        stop_trying_at = None
-        if blocking_timeout is not None:
-            stop_trying_at = loop.time() + blocking_timeout
+        started = loop.time()
+        stop_trying_at = started + blocking_timeout if blocking_timeout is not None else None
 
+        attempts = 0
         while True:
-            if await self.do_acquire(token):
-                self.local.token = token
+            attempts += 1
+            if await self.try_acquire():
+                self._acquired_at = loop.time()
+                metrics.observe('lock_wait', self._acquired_at - started, lock=self.metric_name)
+                if attempts > 1:
+                    metrics.incr('lock_contention', lock=self.metric_name)
+                if self.auto_renew:
+                    self._renew_task = asyncio.create_task(self._renew())
                 return True
 
             if not blocking:
+                metrics.incr('lock_contention', lock=self.metric_name)
                 return False
-
             next_try_at = loop.time() + self.retry_delay
             if stop_trying_at is not None and next_try_at > stop_trying_at:
+                metrics.incr('lock_timeout', lock=self.metric_name)
                 return False
-
             await asyncio.sleep(self.retry_delay)
 
-    async def do_acquire(self, token: str | bytes) -> bool:
-        if self.timeout:
-            timeout = int(self.timeout * 1000)
-        else:
-            timeout = None
-
-        if await self.redis.set(self.name, token, exist=self.redis.SET_IF_NOT_EXIST, pexpire=timeout):
-            return True
+    async def extend(self) -> bool:
+        if self.value is None:
+            return False
+        extended = await self._eval_all(self.LUA_EXTEND_SCRIPT, [self.name], self.value, self.px)
+        return sum(1 for e in extended if e) >= self.quorum
 
-        return False
-
-    def release(self) -> Awaitable[NoReturn]:
-        token = self.local.token
-        if token is None:
+    async def _renew(self):
+        while True:
+            await asyncio.sleep(self.timeout * self.renew_ratio)
+            if not await self.extend():
+                self.lost = True
+                metrics.incr('lock_lost', lock=self.metric_name)
+                logger.warning('Redlock lease lost. name=%s, token=%s', self.name, self.fencing_token)
+                return
+
+    async def release(self):
+        if self.value is None:
             raise LockError('Cannot release an unlocked lock')
-
-        self.local.token = None
-        return self.do_release(token)
-
-    async def do_release(self, token: bytes):
-        if not bool(
-            await self.redis.eval(self.LUA_RELEASE_SCRIPT, keys=[self.name], args=[token])
-        ):
-            raise LockNotOwnedError(f"Cannot release a lock that's no longer owned")
+        if self._renew_task:
+            self._renew_task.cancel()
+            self._renew_task = None
+
+        value, self.value = self.value, None
+        await self._eval_all(self.LUA_UNLOCK_SCRIPT, [self.name], value)
+        metrics.observe('lock_hold', asyncio.get_running_loop().time() - self._acquired_at, lock=self.metric_name)
+        # 보유 중 만료된 경우, 다른 프로세스와 동시에 작업했을 수 있으므로 호출자에게 알림
+        if self.lost:
+            raise LockError(f'Lock lease was lost while held. name={self.name}, token={self.fencing_token}')
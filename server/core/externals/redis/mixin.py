@@ -1,11 +1,16 @@
 import datetime
-import json
-from json import JSONDecodeError
-from typing import Any, TypeVar, Mapping, Sequence, Optional, Awaitable
+from functools import lru_cache
+from typing import Any, TypeVar, Mapping, Sequence, Optional, Awaitable, FrozenSet, Type, List, Tuple, AsyncIterator
 
 from aioredis import Redis
 from aioredis.client import Pipeline
 from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_SINGLETON, ModelField
+from redis.asyncio.cluster import RedisCluster, ClusterPipeline
+
+from server.core.externals.redis.codec import Codec, get_codec
+from server.db.databases import settings
 
 KeyT = bytes | str | memoryview
 EncodedT = bytes | memoryview
@@ -15,39 +20,194 @@ ExpiryT = int | datetime.timedelta
 ZScoreBoundT = float | int
 AnyKeyT = TypeVar('AnyKeyT', bytes, str, memoryview)
 AnyFieldT = TypeVar('AnyFieldT', bytes, str, memoryview)
+PIPELINE_TYPES = (Pipeline, ClusterPipeline)
 
 
 class KeyMixin:
+    # 클러스터 모드에서 같은 해시 슬롯에 둘 키 범위 (ex. 'room:{}' 인 경우, 'room:1:info' -> '{room:1}:info')
+    hash_tag: Optional[str] = None
+
+    @classmethod
+    def get_format(cls) -> str:
+        key_format: str = getattr(cls, 'format')
+        if settings.redis_cluster and cls.hash_tag:
+            key_format = key_format.replace(cls.hash_tag, '{{' + cls.hash_tag + '}}', 1)
+        return key_format
+
     @classmethod
     def get_key(cls, key_param: Optional[Any] = None):
         if not key_param:
-            return getattr(cls, 'format')
+            # 해시 태그의 이스케이프 된 중괄호 복원
+            return cls.get_format().format()
         elif isinstance(key_param, list | tuple):
-            return getattr(cls, 'format').format(*key_param)
-        return getattr(cls, 'format').format(key_param)
+            return cls.get_format().format(*key_param)
+        return cls.get_format().format(key_param)
 
     @classmethod
     def get_lock_key(cls, key_param: Optional[Any] = None):
         return f'lock:{cls.get_key(key_param)}'
 
 
-class ValueMixin:
+def is_structured(field: ModelField) -> bool:
+    return isinstance(field.type_, type) and issubclass(field.type_, BaseModel | dict | list)
+
+
+@lru_cache()
+def get_hash_fields(schema: Type[BaseModel]) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """
+    해시 필드 타입 구분
+    - 문자열 그대로 저장되는 단일 값 필드 (int, str 등은 스키마 검증 시 변환)
+    - 객체 목록 필드 (기존에는 객체마다 JSON 문자열로 저장)
+    """
+    fields = schema.__fields__.items()
+    return (
+        frozenset(n for n, f in fields if f.shape == SHAPE_SINGLETON and not is_structured(f)),
+        frozenset(n for n, f in fields if f.shape != SHAPE_SINGLETON and is_structured(f))
+    )
+
+
+JSON_TYPES = (str, int, float, bool)
+
+
+def is_json_field(field: ModelField) -> bool:
+    if field.sub_fields:
+        return all(is_json_field(f) for f in field.sub_fields) and \
+            (field.key_field is None or is_json_field(field.key_field))
+    if isinstance(field.type_, type) and issubclass(field.type_, BaseModel):
+        return is_constructable(field.type_)
+    return field.type_ in JSON_TYPES
+
+
+@lru_cache()
+def is_constructable(schema: Type[BaseModel]) -> bool:
+    # 모든 필드가 JSON 타입 혹은 하위 스키마인 경우, 역직렬화 값을 변환 없이 사용 가능
+    return all(is_json_field(f) for f in schema.__fields__.values())
+
+
+@lru_cache()
+def get_nested_fields(schema: Type[BaseModel]) -> Tuple[Tuple[str, Type[BaseModel], bool], ...]:
+    return tuple(
+        (f.alias, f.type_, f.shape != SHAPE_SINGLETON) for f in schema.__fields__.values()
+        if isinstance(f.type_, type) and issubclass(f.type_, BaseModel)
+    )
+
+
+def construct(schema: Type[BaseModel], obj: dict) -> BaseModel:
+    """
+    직접 기록한 값으로 검증 없이 스키마 생성 (하위 스키마 포함)
+    - 필수 필드가 없는 경우, 검증 오류를 위해 KeyError
+    """
+    for name, sub, many in get_nested_fields(schema):
+        value = obj.get(name)
+        if value:
+            obj[name] = [construct(sub, v) for v in value] if many else construct(sub, value)
+    for name, field in schema.__fields__.items():
+        if field.required and name not in obj:
+            raise KeyError(name)
+    return schema.construct(**obj)
+
+
+class SchemaView:
+    """
+    저장된 값에서 필요한 필드만 생성하는 조회용 객체
+    - 값은 처음 필드에 접근할 때 한 번만 역직렬화하고, 하위 스키마는 해당 필드에 접근할 때 생성
+    - fields 지정 시, 그 외 필드는 접근 불가
+    - raw 는 저장된 값 그대로이므로, 값으로 삭제하는 명령에 사용
+    """
+
+    __slots__ = ('schema', 'codec', 'raw', 'fields', '_data', '_values')
+
+    def __init__(self, schema: Type[BaseModel], codec: Codec, raw: Any, fields: Optional[Sequence[str]] = None):
+        self.schema = schema
+        self.codec = codec
+        self.raw = raw
+        self.fields = fields
+        self._data: Optional[dict] = None
+        self._values: dict = {}
+
+    def __getattr__(self, name: str):
+        field: Optional[ModelField] = self.schema.__fields__.get(name)
+        if field is None or (self.fields is not None and name not in self.fields):
+            raise AttributeError(f'{self.schema.__name__} view has no field {name!r}')
+        if name not in self._values:
+            if self._data is None:
+                self._data = self.codec.loads(self.raw)
+            if field.alias in self._data:
+                value = self._data[field.alias]
+                if value and isinstance(field.type_, type) and issubclass(field.type_, BaseModel):
+                    value = [construct(field.type_, v) for v in value] if field.shape != SHAPE_SINGLETON \
+                        else construct(field.type_, value)
+            elif field.required:
+                raise AttributeError(f'{self.schema.__name__} value has no field {name!r}')
+            else:
+                value = field.get_default()
+            self._values[name] = value
+        return self._values[name]
+
+    def dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.fields or self.schema.__fields__}
+
+    def to_schema(self) -> BaseModel:
+        return construct(self.schema, self.codec.loads(self.raw))
+
+
+class CodecMixin:
+    # 컬렉션별 직렬화 형식 (미설정 시 redis_codec, redis_compress_threshold 설정)
+    codec: Optional[str] = None
+    compress_threshold: Optional[int] = None
+
+    @classmethod
+    def get_codec(cls) -> Codec:
+        return get_codec(
+            cls.codec or settings.redis_codec,
+            settings.redis_compress_threshold if cls.compress_threshold is None else cls.compress_threshold
+        )
+
+
+class ValueMixin(CodecMixin):
     @classmethod
     def get_value(cls, value: Any, only_encode: bool = False):
         if isinstance(value, EncodableT):
             return value
         elif isinstance(value, list | tuple):
-            iterable = [cls.get_value(v) for v in value]
-            return json.dumps(iterable) if only_encode else iterable
-        elif isinstance(value, getattr(cls, 'schema')):
-            return value.json()
-        return json.dumps(value)
+            if only_encode:
+                return cls.get_codec().dumps(list(value))
+            return [cls.get_value(v) for v in value]
+        return cls.get_codec().dumps(value)
+
+    @classmethod
+    def get_members(cls, values: Sequence[Any]) -> List:
+        # 값으로 삭제하는 명령은 직렬화 형식 변경 이전의 JSON 값도 함께 삭제
+        members = cls.get_value(values)
+        for v in values:
+            if isinstance(v, BaseModel) and (legacy := v.json()) not in members:
+                members.append(legacy)
+        return members
+
+
+class ReadRoutingMixin:
+    """
+    조회 명령 라우팅
+    - stale_ok=True 인 경우, 복제 노드에서 조회 (복제 지연만큼 이전 값일 수 있음)
+    - stale_ok 미지정 시, 클래스의 stale_ok 설정을 따름
+    - 쓰기/잠금 명령과 파이프라인은 항상 주 노드
+    """
+
+    stale_ok: bool = False
+
+    @classmethod
+    def get_reader(cls, redis: Redis, stale_ok: Optional[bool] = None) -> Redis:
+        if stale_ok is None:
+            stale_ok = cls.stale_ok
+        if stale_ok and hasattr(redis, 'replica'):
+            return redis.replica()
+        return redis
 
 
 class TransactionMixin:
     @classmethod
     async def execute(cls, target: Awaitable):
-        return target if isinstance(target, Pipeline) else await target
+        return target if isinstance(target, PIPELINE_TYPES) else await target
 
 
 class DeleteMixin:
@@ -59,36 +219,70 @@ class DeleteMixin:
         return await getattr(cls, 'execute')(redis.delete(*keys))
 
 
-class ConvertFormatMixin:
+class ConvertFormatMixin(CodecMixin):
+    # 직접 기록한 값이므로 검증 없이 스키마 생성 (datetime 등 변환이 필요한 필드가 있는 스키마는 검증)
+    trusted: bool = True
+
     @classmethod
     def decode(cls, value: Any):
+        # 저장된 값 한 단계만 역직렬화 (값 내부의 문자열은 그대로 유지)
         if not value:
             return value
-        elif isinstance(value, list | set):
-            decoded = [cls.decode(v) for v in value]
-            return decoded
+        codec = cls.get_codec()
+        if isinstance(value, list | set):
+            return [codec.loads(v) for v in value]
         elif isinstance(value, dict):
-            decoded = {k: cls.decode(v) for k, v in value.items()}
-            return decoded
-        elif isinstance(value, bytes):
-            return value.decode('utf-8')
-        try:
-            return cls.decode(json.loads(value))
-        except (JSONDecodeError, TypeError):
+            return {k: cls.decode_field(k, v) for k, v in value.items()}
+        return codec.loads(value)
+
+    @classmethod
+    def decode_field(cls, field: str, value: Any):
+        # 해시 필드는 스키마 필드 타입에 따라 역직렬화
+        codec = cls.get_codec()
+        raw_fields, nested_fields = get_hash_fields(getattr(cls, 'schema'))
+        if field in raw_fields:
             return value
+        value = codec.loads(value)
+        if field in nested_fields and value:
+            return [codec.loads(v) if isinstance(v, str) else v for v in value]
+        return value
 
     @classmethod
     def to_schema(cls, target: Any):
         if not target:
             return target
         elif isinstance(target, list):
-            return [getattr(cls, 'schema')(**obj) for obj in target]
+            return [cls.create_schema(obj) for obj in target]
         elif isinstance(target, dict):
-            return getattr(cls, 'schema')(**target)
+            return cls.create_schema(target)
         raise AssertionError('Type should be `list` or `dict`.')
 
+    @classmethod
+    def to_views(cls, values: Any, fields: Optional[Sequence[str]] = None) -> List[SchemaView]:
+        schema: Type[BaseModel] = getattr(cls, 'schema')
+        assert is_constructable(schema), f'{schema.__name__} requires validation.'
+        codec = cls.get_codec()
+        return [SchemaView(schema, codec, v, fields) for v in values or []]
+
+    @classmethod
+    def load(cls, values: Any, fields: Optional[Sequence[str]] = None, lazy: bool = False):
+        # fields 혹은 lazy 지정 시, 필요한 필드만 생성하는 조회용 객체 반환
+        if lazy or fields is not None:
+            return cls.to_views(values, fields)
+        return cls.to_schema(cls.decode(values))
+
+    @classmethod
+    def create_schema(cls, obj: dict):
+        schema: Type[BaseModel] = getattr(cls, 'schema')
+        if cls.trusted and is_constructable(schema):
+            try:
+                return construct(schema, obj)
+            except KeyError:
+                pass
+        return schema(**obj)
+
 
-class SetCollectionMixin(KeyMixin, ValueMixin, TransactionMixin, ConvertFormatMixin, DeleteMixin):
+class SetCollectionMixin(KeyMixin, ValueMixin, ReadRoutingMixin, TransactionMixin, ConvertFormatMixin, DeleteMixin):
     @classmethod
     async def sadd(cls, redis: Redis, key_param: Any | None, *args):
         key = cls.get_key(key_param)
@@ -96,31 +290,37 @@ class SetCollectionMixin(KeyMixin, ValueMixin, TransactionMixin, ConvertFormatMi
         return await cls.execute(redis.sadd(key, *args))
 
     @classmethod
-    async def smembers(cls, redis: Redis, key_param: Any | None):
+    async def smembers(
+        cls,
+        redis: Redis,
+        key_param: Any | None,
+        stale_ok: Optional[bool] = None,
+        fields: Optional[Sequence[str]] = None,
+        lazy: bool = False
+    ):
         key = cls.get_key(key_param)
-        result = await redis.smembers(key)
-        result = cls.decode(result)
-        return cls.to_schema(result) or []
+        result = await cls.get_reader(redis, stale_ok).smembers(key)
+        return cls.load(result, fields, lazy) or []
 
     @classmethod
     async def srem(cls, redis: Redis, key_param: Any | None, *args):
         key = cls.get_key(key_param)
-        args = cls.get_value(args)
+        args = cls.get_members(args)
         return await cls.execute(redis.srem(key, *args))
 
     @classmethod
-    async def scard(cls, redis: Redis, key_param: Any | None):
+    async def scard(cls, redis: Redis, key_param: Any | None, stale_ok: Optional[bool] = None):
         key = cls.get_key(key_param)
-        return await cls.execute(redis.scard(key))
+        return await cls.execute(cls.get_reader(redis, stale_ok).scard(key))
 
     @classmethod
-    async def sismember(cls, redis: Redis, key_param: Any | None, value: Any):
+    async def sismember(cls, redis: Redis, key_param: Any | None, value: Any, stale_ok: Optional[bool] = None):
         key = cls.get_key(key_param)
         value = cls.get_value(value)
-        await redis.sismember(key, value)
+        await cls.get_reader(redis, stale_ok).sismember(key, value)
 
 
-class ListCollectionMixin(KeyMixin, ValueMixin, TransactionMixin, ConvertFormatMixin, DeleteMixin):
+class ListCollectionMixin(KeyMixin, ValueMixin, ReadRoutingMixin, TransactionMixin, ConvertFormatMixin, DeleteMixin):
     @classmethod
     async def lpush(cls, redis: Redis, key_param: Any | None, *args):
         key = cls.get_key(key_param)
@@ -137,7 +337,7 @@ class ListCollectionMixin(KeyMixin, ValueMixin, TransactionMixin, ConvertFormatM
     async def lpop(cls, redis: Redis, key_param: Any | None):
         key = cls.get_key(key_param)
         res = await cls.execute(redis.lpop(key))
-        if not isinstance(res, Pipeline):
+        if not isinstance(res, PIPELINE_TYPES):
             result = cls.decode(await redis.lpop(key))
             return cls.to_schema(result)
         return res
@@ -146,22 +346,42 @@ class ListCollectionMixin(KeyMixin, ValueMixin, TransactionMixin, ConvertFormatM
     async def rpop(cls, redis: Redis, key_param: Any | None):
         key = cls.get_key(key_param)
         res = await cls.execute(redis.rpop(key))
-        if not isinstance(res, Pipeline):
+        if not isinstance(res, PIPELINE_TYPES):
             result = cls.decode(await redis.rpop(key))
             return cls.to_schema(result)
         return res
 
     @classmethod
-    async def lrange(cls, redis: Redis, key_param: Any | None, start: int = 0, stop: int = -1):
+    async def brpoplpush(cls, redis: Redis, key_param: Any | None, dst_key: KeyT, timeout: int = 0):
         key = cls.get_key(key_param)
-        result = await redis.lrange(key, start, stop)
-        result = cls.decode(result)
+        result = cls.decode(await redis.brpoplpush(key, dst_key, timeout))
         return cls.to_schema(result)
 
     @classmethod
-    async def lindex(cls, redis: Redis, key_param: Any | None, index: int):
+    async def rpoplpush(cls, redis: Redis, key_param: Any | None, dst_key: KeyT):
+        key = cls.get_key(key_param)
+        result = cls.decode(await redis.rpoplpush(key, dst_key))
+        return cls.to_schema(result)
+
+    @classmethod
+    async def lrange(
+        cls,
+        redis: Redis,
+        key_param: Any | None,
+        start: int = 0,
+        stop: int = -1,
+        stale_ok: Optional[bool] = None,
+        fields: Optional[Sequence[str]] = None,
+        lazy: bool = False
+    ):
+        key = cls.get_key(key_param)
+        result = await cls.get_reader(redis, stale_ok).lrange(key, start, stop)
+        return cls.load(result, fields, lazy)
+
+    @classmethod
+    async def lindex(cls, redis: Redis, key_param: Any | None, index: int, stale_ok: Optional[bool] = None):
         key = cls.get_key(key_param)
-        return await redis.lindex(key, index)
+        return await cls.get_reader(redis, stale_ok).lindex(key, index)
 
     @classmethod
     async def lset(cls, redis: Redis, key_param: Any | None, index: int, value: Any):
@@ -172,13 +392,17 @@ class ListCollectionMixin(KeyMixin, ValueMixin, TransactionMixin, ConvertFormatM
     @classmethod
     async def lrem(cls, redis: Redis, key_param: Any | None, value: Any, count: int = 0):
         key = cls.get_key(key_param)
-        value = cls.get_value(value)
-        return await cls.execute(redis.lrem(key, count, value))
+        values = cls.get_members((value,))
+        if isinstance(redis, PIPELINE_TYPES):
+            for v in values:
+                redis.lrem(key, count, v)
+            return redis
+        return sum([await redis.lrem(key, count, v) for v in values])
 
     @classmethod
-    async def llen(cls, redis: Redis, key_param: Any | None):
+    async def llen(cls, redis: Redis, key_param: Any | None, stale_ok: Optional[bool] = None):
         key = cls.get_key(key_param)
-        return await redis.llen(key)
+        return await cls.get_reader(redis, stale_ok).llen(key)
 
     @classmethod
     async def ltrim(cls, redis: Redis, key_param: Any | None, start: int, end: int):
@@ -186,7 +410,7 @@ class ListCollectionMixin(KeyMixin, ValueMixin, TransactionMixin, ConvertFormatM
         return await cls.execute(redis.ltrim(key, start, end))
 
 
-class StringCollectionMixin(KeyMixin, ValueMixin, TransactionMixin, ConvertFormatMixin, DeleteMixin):
+class StringCollectionMixin(KeyMixin, ValueMixin, ReadRoutingMixin, TransactionMixin, ConvertFormatMixin, DeleteMixin):
     @classmethod
     async def set(cls, redis: Redis, key_param: Any | None, value: Any, **kwargs):
         key = cls.get_key(key_param)
@@ -206,9 +430,9 @@ class StringCollectionMixin(KeyMixin, ValueMixin, TransactionMixin, ConvertForma
         return await cls.execute(redis.setnx(key, value))
 
     @classmethod
-    async def strlen(cls, redis: Redis, key_param: Any | None):
+    async def strlen(cls, redis: Redis, key_param: Any | None, stale_ok: Optional[bool] = None):
         key = cls.get_key(key_param)
-        return await redis.strlen(key)
+        return await cls.get_reader(redis, stale_ok).strlen(key)
 
     @classmethod
     async def setrange(cls, redis: Redis, key_param: Any | None, offset: int, value: Any):
@@ -217,15 +441,22 @@ class StringCollectionMixin(KeyMixin, ValueMixin, TransactionMixin, ConvertForma
         return await cls.execute(redis.setrange(key, offset, value))
 
     @classmethod
-    async def get(cls, redis: Redis, key_param: Any | None):
+    async def get(cls, redis: Redis, key_param: Any | None, stale_ok: Optional[bool] = None):
         key = cls.get_key(key_param)
-        result = cls.decode(await redis.get(key))
+        result = cls.decode(await cls.get_reader(redis, stale_ok).get(key))
         return cls.to_schema(result)
 
     @classmethod
-    async def getrange(cls, redis: Redis, key_param: Any | None, start: int = 0, end: int = -1):
+    async def getrange(
+        cls,
+        redis: Redis,
+        key_param: Any | None,
+        start: int = 0,
+        end: int = -1,
+        stale_ok: Optional[bool] = None
+    ):
         key = cls.get_key(key_param)
-        result = cls.decode(await redis.getrange(key, start, end))
+        result = cls.decode(await cls.get_reader(redis, stale_ok).getrange(key, start, end))
         return cls.to_schema(result)
 
     @classmethod
@@ -248,9 +479,9 @@ class StringCollectionMixin(KeyMixin, ValueMixin, TransactionMixin, ConvertForma
         return await cls.execute(redis.mset(mapping=mapping))
 
     @classmethod
-    async def mget(cls, redis: Redis, keys: KeyT | Sequence[KeyT], *args):
+    async def mget(cls, redis: Redis, keys: KeyT | Sequence[KeyT], *args, stale_ok: Optional[bool] = None):
         args = cls.get_value(args)
-        result = cls.decode(await redis.mget(keys, *args))
+        result = cls.decode(await cls.get_reader(redis, stale_ok).mget(keys, *args))
         return cls.to_schema(result)
 
     @classmethod
@@ -268,7 +499,7 @@ class StringCollectionMixin(KeyMixin, ValueMixin, TransactionMixin, ConvertForma
         key = cls.get_key(key_param)
         value = cls.get_value(value)
         res = await cls.execute(redis.getset(key, value))
-        if not isinstance(res, Pipeline):
+        if not isinstance(res, PIPELINE_TYPES):
             result = cls.decode(await redis.getset(key, value))
             return cls.to_schema(result)
         return res
@@ -280,7 +511,10 @@ class StringCollectionMixin(KeyMixin, ValueMixin, TransactionMixin, ConvertForma
         return await cls.execute(redis.append(key, value))
 
 
-class HashCollectionMixin(KeyMixin, ValueMixin, TransactionMixin, ConvertFormatMixin, DeleteMixin):
+class HashCollectionMixin(KeyMixin, ValueMixin, ReadRoutingMixin, TransactionMixin, ConvertFormatMixin, DeleteMixin):
+    # 단일 값 필드는 문자열로 저장되므로 검증 시 변환
+    trusted = False
+
     @classmethod
     async def hset(
         cls,
@@ -307,19 +541,28 @@ class HashCollectionMixin(KeyMixin, ValueMixin, TransactionMixin, ConvertFormatM
         return await cls.execute(redis.hset(key, field, value, data))
 
     @classmethod
-    async def hget(cls, redis: Redis, key_param: Any | None, field: AnyFieldT, raw_key=False):
+    async def hget(
+        cls,
+        redis: Redis,
+        key_param: Any | None,
+        field: AnyFieldT,
+        raw_key=False,
+        stale_ok: Optional[bool] = None
+    ):
         key = cls.get_key(key_param) if not raw_key else key_param
-        result = cls.decode(await redis.hget(key, field))
+        result = cls.decode(await cls.get_reader(redis, stale_ok).hget(key, field))
         return cls.to_schema(result)
 
     @classmethod
-    async def hgetall(cls, redis: Redis, key_param: Any | None, raw_key=False):
+    async def hgetall(cls, redis: Redis, key_param: Any | None, raw_key=False, stale_ok: Optional[bool] = None):
         key = cls.get_key(key_param) if not raw_key else key_param
-        result = cls.decode(await redis.hgetall(key))
+        result = cls.decode(await cls.get_reader(redis, stale_ok).hgetall(key))
         return cls.to_schema(result)
 
 
-class SortedSetCollectionMixin(KeyMixin, ValueMixin, TransactionMixin, ConvertFormatMixin, DeleteMixin):
+class SortedSetCollectionMixin(
+    KeyMixin, ValueMixin, ReadRoutingMixin, TransactionMixin, ConvertFormatMixin, DeleteMixin
+):
     @classmethod
     async def zadd(cls, redis: Redis, key_param: Any | None, data: Any, **kwargs):
         key = cls.get_key(key_param)
@@ -338,56 +581,152 @@ class SortedSetCollectionMixin(KeyMixin, ValueMixin, TransactionMixin, ConvertFo
         return await cls.execute(redis.zadd(key, convert_mapping, **kwargs))
 
     @classmethod
-    async def zscore(cls, redis: Redis, key_param: Any | None, value: Any):
+    async def zscore(cls, redis: Redis, key_param: Any | None, value: Any, stale_ok: Optional[bool] = None):
         key = cls.get_key(key_param)
         value = cls.get_value(value)
-        return await redis.zscore(key, value)
+        return await cls.get_reader(redis, stale_ok).zscore(key, value)
 
     @classmethod
-    async def zrank(cls, redis: Redis, key_param: Any | None, value: Any):
+    async def zrank(cls, redis: Redis, key_param: Any | None, value: Any, stale_ok: Optional[bool] = None):
         key = cls.get_key(key_param)
         value = cls.get_value(value)
-        return await redis.zrank(key, value)
+        return await cls.get_reader(redis, stale_ok).zrank(key, value)
 
     @classmethod
-    async def zrange(cls, redis: Redis, key_param: Any | None, start: int = 0, end: int = -1, **kwargs):
+    async def zrange(
+        cls,
+        redis: Redis,
+        key_param: Any | None,
+        start: int = 0,
+        end: int = -1,
+        stale_ok: Optional[bool] = None,
+        fields: Optional[Sequence[str]] = None,
+        lazy: bool = False,
+        **kwargs
+    ):
         key = cls.get_key(key_param)
-        result = cls.decode(await redis.zrange(key, start, end, **kwargs))
-        return cls.to_schema(result)
+        result = await cls.get_reader(redis, stale_ok).zrange(key, start, end, **kwargs)
+        return cls.load(result, fields, lazy)
 
     @classmethod
-    async def zrevrange(cls, redis: Redis, key_param: Any | None, start: int = 0, end: int = -1, **kwargs):
+    async def zrevrange(
+        cls,
+        redis: Redis,
+        key_param: Any | None,
+        start: int = 0,
+        end: int = -1,
+        stale_ok: Optional[bool] = None,
+        fields: Optional[Sequence[str]] = None,
+        lazy: bool = False,
+        **kwargs
+    ):
         key = cls.get_key(key_param)
-        result = cls.decode(await redis.zrevrange(key, start, end, **kwargs))
-        return cls.to_schema(result)
+        result = await cls.get_reader(redis, stale_ok).zrevrange(key, start, end, **kwargs)
+        return cls.load(result, fields, lazy)
 
     @classmethod
-    async def zrangebyscore(cls, redis: Redis, key_param: Any | None, _min: ZScoreBoundT, _max: ZScoreBoundT, **kwargs):
+    async def zrangebyscore(
+        cls,
+        redis: Redis,
+        key_param: Any | None,
+        _min: ZScoreBoundT,
+        _max: ZScoreBoundT,
+        stale_ok: Optional[bool] = None,
+        fields: Optional[Sequence[str]] = None,
+        lazy: bool = False,
+        **kwargs
+    ):
         key = cls.get_key(key_param)
-        result = cls.decode(await redis.zrangebyscore(key, _min, _max, **kwargs))
-        return cls.to_schema(result)
+        result = await cls.get_reader(redis, stale_ok).zrangebyscore(key, _min, _max, **kwargs)
+        return cls.load(result, fields, lazy)
 
     @classmethod
-    async def zcount(cls, redis: Redis, key_param: Any | None, _min: ZScoreBoundT, _max: ZScoreBoundT):
+    async def zcount(
+        cls,
+        redis: Redis,
+        key_param: Any | None,
+        _min: ZScoreBoundT,
+        _max: ZScoreBoundT,
+        stale_ok: Optional[bool] = None
+    ):
         key = cls.get_key(key_param)
-        return await redis.zcount(key, _min, _max)
+        return await cls.get_reader(redis, stale_ok).zcount(key, _min, _max)
 
     @classmethod
     async def zrem(cls, redis: Redis, key_param: Any | None, *values):
         key = cls.get_key(key_param)
-        values = cls.get_value(values)
+        values = cls.get_members(values)
         return await cls.execute(redis.zrem(key, *values))
 
     @classmethod
-    async def zcard(cls, redis: Redis, key_param: Any | None):
+    async def zremrangebyrank(cls, redis: Redis, key_param: Any | None, start: int, end: int):
         key = cls.get_key(key_param)
-        return await redis.zcard(key)
+        return await cls.execute(redis.zremrangebyrank(key, start, end))
+
+    @classmethod
+    async def zcard(cls, redis: Redis, key_param: Any | None, stale_ok: Optional[bool] = None):
+        key = cls.get_key(key_param)
+        return await cls.get_reader(redis, stale_ok).zcard(key)
+
 
+async def scan_keys(
+    redis: Redis | RedisCluster,
+    match: Optional[str] = None,
+    count: Optional[int] = None
+) -> AsyncIterator[List[str]]:
+    """
+    SCAN 으로 전체 키를 순회하며, 명령 한 번에 조회한 키 목록 반환 (KEYS 처럼 Redis 를 오래 점유하지 않음)
+    - 클러스터 모드에서는 모든 주 노드 순회
+    """
+    count = count or settings.redis_scan_count
+    if isinstance(redis, RedisCluster):
+        keys: List[str] = []
+        async for key in redis.scan_iter(match=match, count=count):
+            keys.append(key)
+            if len(keys) >= count:
+                yield keys
+                keys = []
+        if keys:
+            yield keys
+        return
+
+    cursor = None
+    while cursor != 0:
+        cursor, keys = await redis.scan(cursor or 0, match, count)
+        if keys:
+            yield keys
+
+
+class ScanMixin(ReadRoutingMixin):
+    @classmethod
+    def get_match(cls) -> str:
+        assert hasattr(cls, 'format'), 'Should be have format attribute if not match.'
+        key_format: str = getattr(cls, 'get_format')() if hasattr(cls, 'get_format') else getattr(cls, 'format')
+        return key_format.format(*['*'] * key_format.count('{}'))
 
-class ScanMixin:
     @classmethod
-    async def scan(cls, redis: Redis, cursor: int = 0, match: Optional[str] = None, count: Optional[int] = None):
-        if not match:
-            assert hasattr(cls, 'format'), 'Should be have format attribute if not match.'
-            match = getattr(cls, 'format').replace('{}', '*')
-        return await redis.scan(cursor, match, count)
+    async def scan(
+        cls,
+        redis: Redis,
+        cursor: int = 0,
+        match: Optional[str] = None,
+        count: Optional[int] = None,
+        stale_ok: Optional[bool] = None
+    ):
+        match = match or cls.get_match()
+        if isinstance(redis, RedisCluster):
+            # 클러스터 모드에서는 모든 주 노드의 키 조회
+            return 0, [key async for key in redis.scan_iter(match=match, count=count)]
+        return await cls.get_reader(redis, stale_ok).scan(cursor, match, count)
+
+    @classmethod
+    async def scan_batches(
+        cls,
+        redis: Redis,
+        match: Optional[str] = None,
+        count: Optional[int] = None,
+        stale_ok: Optional[bool] = None
+    ) -> AsyncIterator[List[str]]:
+        # 첫 페이지만 조회하는 scan 과 달리 전체 키 순회
+        async for keys in scan_keys(cls.get_reader(redis, stale_ok), match or cls.get_match(), count):
+            yield keys
@@ -1,12 +1,19 @@
+from datetime import datetime
 from typing import List, Optional, Iterable, Dict, Any
 
+from aioredis import Redis
 from pydantic import BaseModel
+from redis.asyncio.cluster import RedisCluster
 
 from server.core.enums import IntValueEnum
 from server.core.externals.redis.mixin import (
-    SortedSetCollectionMixin, SetCollectionMixin, HashCollectionMixin, ScanMixin, KeyMixin
+    SortedSetCollectionMixin, SetCollectionMixin, HashCollectionMixin, ScanMixin, KeyMixin, ListCollectionMixin,
+    StringCollectionMixin
+)
+from server.db.databases import settings
+from server.models import (
+    S3Media, UserProfileImage, ChatHistoryFile, UserProfile, ChatHistory, User, UserSession, ChatRoomReadCursor
 )
-from server.models import S3Media, UserProfileImage, ChatHistoryFile, UserProfile, ChatHistory
 
 
 class RedisFileBaseS(BaseModel):
@@ -20,9 +27,20 @@ class RedisFileBaseS(BaseModel):
     content_type: str
     use_type: str
     is_active: bool
+    variants: Dict[str, str] = {}
 
     _model = None
 
+    @classmethod
+    def get_variant_urls(cls, m: S3Media) -> Dict[str, str]:
+        """이미지 크기 별 URL (최초 요청 시 생성, webp 는 Accept 헤더 기준)"""
+        if not m.content_type.startswith('image/'):
+            return {}
+        return {
+            name: f'{settings.api_v1_prefix}/services/media/{m.id}/variants/{name}'
+            for name in m.variant_sizes
+        }
+
     @classmethod
     async def generate_files_schema(
         cls,
@@ -41,7 +59,8 @@ class RedisFileBaseS(BaseModel):
             for m in iterable:
                 model_to_dict = m.to_dict()
                 model_to_dict.update({
-                    'url': next((u['url'] for u in urls if u['id'] == m.id), None)
+                    'url': next((u['url'] for u in urls if u['id'] == m.id), None),
+                    'variants': cls.get_variant_urls(m)
                 })
 
                 for k, v in cls.__annotations__.items():
@@ -129,6 +148,8 @@ class RedisChatHistoryPatchS(BaseModel):
     user_profile_id: int
     is_active: bool
     read_user_ids: List[int] = []
+    status: Optional[str] = None
+    files: Optional[List[RedisChatHistoryFileS]] = None
 
 
 class RedisChatHistoryByRoomS(BaseModel):
@@ -142,22 +163,21 @@ class RedisChatHistoryByRoomS(BaseModel):
     timestamp: float | int
     date: str
     is_active: bool
+    status: Optional[str] = None
 
     @classmethod
-    async def from_model(cls, model: ChatHistory):
-        assert hasattr(model, 'user_profile_mapping'), 'Must have `user_profile_mapping` attr.'
+    async def from_model(cls, model: ChatHistory, read_cursors: Iterable[ChatRoomReadCursor] = ()):
         assert hasattr(model, 'files'), 'Must have `files` attr.'
         return cls(
             id=model.id,
             redis_id=model.redis_id,
             user_profile_id=model.user_profile_id,
+            contents=model.contents,
             type=model.type.name.lower(),
             files=await RedisChatHistoryFileS.generate_files_schema(
                 model.files, presigned=True
             ),
-            read_user_ids=[
-                m.user_profile_id for m in model.user_profile_mapping if m.is_read
-            ],
+            read_user_ids=model.get_read_user_ids(read_cursors),
             timestamp=model.created.timestamp(),
             date=model.created.date().isoformat(),
             is_active=model.is_active
@@ -199,24 +219,124 @@ class RedisFollowingByUserProfileS(RedisFollowingS):
     ...
 
 
+class RedisSessionProfileS(BaseModel):
+    id: int
+    user_id: int
+    identity_id: str
+    nickname: str
+    status_message: Optional[str] = None
+    is_default: bool
+    is_active: bool
+
+
+class RedisSessionUserS(BaseModel):
+    id: int
+    uid: str
+    name: str
+    mobile: str
+    email: str
+    last_login: Optional[datetime] = None
+    is_superuser: bool
+    is_staff: bool
+    is_active: bool
+    created: datetime
+    updated: datetime
+    profiles: List[RedisSessionProfileS] = []
+
+
+class RedisUserSessionS(BaseModel):
+    id: int
+    user_id: int
+    session_id: str
+    expiry_at: datetime
+    created: datetime
+    updated: datetime
+    user: RedisSessionUserS
+
+    @classmethod
+    def from_model(cls, model: UserSession):
+        assert hasattr(model, 'user') and hasattr(model.user, 'profiles'), 'Must have `user.profiles` attr.'
+        return cls(
+            **model.to_dict(),
+            user=RedisSessionUserS(
+                **{k: v for k, v in model.user.to_dict().items() if k != 'password'},
+                profiles=[RedisSessionProfileS(**p.to_dict()) for p in model.user.profiles]
+            )
+        )
+
+    def to_model(self) -> UserSession:
+        """세션 DB 에 연결되지 않은 모델 생성 (조회 용도로만 사용)"""
+        return UserSession(
+            **self.dict(exclude={'user'}),
+            user=User(
+                **self.user.dict(exclude={'profiles'}),
+                profiles=[UserProfile(**p.dict()) for p in self.user.profiles]
+            )
+        )
+
+
+class RedisDirectRoomS(BaseModel):
+    id: int
+
+
+class RedisMediaJobFileS(BaseModel):
+    key: str  # 업로드 할 파일을 임시 저장한 S3 키
+    filename: str
+    content_type: str
+
+
+class RedisMediaJobS(BaseModel):
+    id: str
+    room_id: int
+    history: RedisChatHistoryByRoomS
+    files: List[RedisMediaJobFileS]
+    attempts: int = 0
+
+
 class RedisInfoByRoomS(HashCollectionMixin, ScanMixin):
     format = 'room:{}:info'
+    hash_tag = 'room:{}'
     schema = RedisChatRoomInfoS
 
 
 class RedisUserProfilesByRoomS(SetCollectionMixin):
     format = 'room:{}:user_profile:{}:user_profiles'
+    hash_tag = 'room:{}'
     schema = RedisUserProfileByRoomS
 
 
 class RedisChatHistoriesByRoomS(SortedSetCollectionMixin):
     format = 'room:{}:chat_histories'
+    hash_tag = 'room:{}'
     schema = RedisChatHistoryByRoomS
     score = 'timestamp'  # schema 내부 필드여야 함
+    # 대화방 목록 등 미리보기에 필요한 필드 (첨부 파일, 읽은 유저 목록 제외)
+    preview_fields = (
+        'id', 'redis_id', 'user_profile_id', 'contents', 'type', 'timestamp', 'date', 'is_active', 'status'
+    )
+
+    @classmethod
+    def get_window_end(cls) -> int:
+        # 최근 내역 유지 범위의 마지막 순위 (ZREVRANGE end)
+        return settings.redis_history_max_count - 1 if settings.redis_history_max_count else -1
+
+    @classmethod
+    def get_cutoff(cls) -> Optional[float]:
+        # 최근 내역 유지 기간 이전 timestamp
+        if settings.redis_history_max_days:
+            return datetime.now().timestamp() - settings.redis_history_max_days * 86400
+        return None
+
+
+class RedisChatRoomsByAccessS(SortedSetCollectionMixin):
+    # 대화 내역이 Redis 에 있는 대화방 ID 와 최근 사용 시각 (유휴 대화방 LRU 삭제)
+    format = 'rooms:last_access'
+    hash_tag = 'rooms:last_access'
 
 
 class RedisChatRoomsByUserProfileS(SortedSetCollectionMixin):
     format = 'user:{}:chat_rooms'
+    hash_tag = 'user:{}'
     schema = RedisChatRoomByUserProfileS
     score = 'timestamp'  # schema 내부 필드여야 함
 
@@ -229,8 +349,39 @@ class RedisChatHistoriesToSyncS(SortedSetCollectionMixin):
 
 class RedisFollowingsByUserProfileS(SetCollectionMixin):
     format = 'user:{}:followings'
+    hash_tag = 'user:{}'
     schema = RedisFollowingByUserProfileS
 
 
+class RedisDirectRoomByMemberKeyS(StringCollectionMixin):
+    format = 'direct_room:{}'
+    schema = RedisDirectRoomS
+
+
+class RedisUserSessionByIdS(StringCollectionMixin):
+    format = 'session:{}'
+    schema = RedisUserSessionS
+
+
+class RedisMediaJobsS(ListCollectionMixin):
+    format = 'queue:media_jobs'
+    hash_tag = 'queue:media_jobs'
+    schema = RedisMediaJobS
+
+
+class RedisMediaJobsInProgressS(ListCollectionMixin):
+    format = 'queue:media_jobs:in_progress'
+    hash_tag = 'queue:media_jobs'
+    schema = RedisMediaJobS
+
+
 class RedisChatRoomPubSubS(KeyMixin):
     format = 'pubsub:room:{}:chat'
+    hash_tag = 'room:{}'
+
+    @classmethod
+    async def publish(cls, redis: Redis | RedisCluster, room_id: int, message: str):
+        # 클러스터 모드에서는 대화방 키와 같은 슬롯의 샤드 채널로 발행
+        if isinstance(redis, RedisCluster):
+            return await redis.spublish(cls.get_key(room_id), message)
+        return await redis.publish(cls.get_key(room_id), message)
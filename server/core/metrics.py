@@ -0,0 +1,99 @@
+import threading
+from collections import defaultdict, deque
+from typing import Dict, Any, Deque
+
+
+class Timing:
+
+    __slots__ = ('count', 'total', 'max', 'samples')
+
+    sample_size = 1024
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: Deque[float] = deque(maxlen=self.sample_size)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.samples.append(value)
+
+    def percentile(self, p: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'avg': self.total / self.count if self.count else 0.0,
+            'max': self.max,
+            'p50': self.percentile(0.5),
+            'p99': self.percentile(0.99),
+        }
+
+
+class Metrics:
+    """
+    워커 프로세스 단위 메트릭 저장소
+    - counter: 누적 값 (ex. 캐시 hit/miss)
+    - gauge: 현재 값 (ex. 대기열 길이)
+    - timing: 소요 시간 분포 (ex. 쿼리 지연 시간)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = {}
+        self._timings: Dict[str, Timing] = defaultdict(Timing)
+
+    @classmethod
+    def get_key(cls, name: str, labels: Dict[str, Any]) -> str:
+        if not labels:
+            return name
+        label_str = ','.join(f'{k}={v}' for k, v in sorted(labels.items()))
+        return f'{name}{{{label_str}}}'
+
+    def incr(self, name: str, amount: float = 1, **labels):
+        with self._lock:
+            self._counters[self.get_key(name, labels)] += amount
+
+    def gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges[self.get_key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        with self._lock:
+            self._timings[self.get_key(name, labels)].observe(value)
+
+    def counter_value(self, name: str, **labels) -> float:
+        return self._counters.get(self.get_key(name, labels), 0)
+
+    def gauge_value(self, name: str, **labels) -> float | None:
+        return self._gauges.get(self.get_key(name, labels))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'gauges': dict(self._gauges),
+                'timings': {k: v.to_dict() for k, v in self._timings.items()},
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timings.clear()
+
+
+def hit_rate(hits: float, misses: float) -> float:
+    total = hits + misses
+    return hits / total if total else 0.0
+
+
+metrics = Metrics()
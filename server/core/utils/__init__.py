@@ -1,7 +1,11 @@
+import asyncio
+import os
 import random
 import re
 import string
-from typing import Iterable
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Optional, Callable
 
 import phonenumbers
 from passlib.context import CryptContext
@@ -11,6 +15,8 @@ from sqlalchemy.types import TypeDecorator
 from sqlalchemy_utils import PhoneNumber, PhoneNumberParseException
 
 from server.core.constants import REGION_CODES
+from server.core.metrics import metrics
+from server.db.databases import settings
 
 
 class IntTypeEnum(TypeDecorator):
@@ -46,6 +52,61 @@ def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 
+class PasswordHasher:
+    """
+    비밀번호 해싱을 이벤트 루프 밖(프로세스 풀)에서 실행
+    - 프로세스 수는 CPU 코어 수 기준
+    - 동시 실행 수 제한 및 대기 중인 요청 수 메트릭 기록
+    """
+
+    _executor: Optional[ProcessPoolExecutor] = None
+    _semaphore: Optional[asyncio.Semaphore] = None
+    _waiting = 0
+
+    max_workers = settings.password_hash_workers or os.cpu_count() or 1
+    concurrency = settings.password_hash_concurrency or max_workers * 2
+
+    @classmethod
+    def get_executor(cls) -> ProcessPoolExecutor:
+        if cls._executor is None:
+            cls._executor = ProcessPoolExecutor(max_workers=cls.max_workers)
+        return cls._executor
+
+    @classmethod
+    def get_semaphore(cls) -> asyncio.Semaphore:
+        if cls._semaphore is None:
+            cls._semaphore = asyncio.Semaphore(cls.concurrency)
+        return cls._semaphore
+
+    @classmethod
+    async def run(cls, func: Callable, *args):
+        started = time.perf_counter()
+        cls._waiting += 1
+        metrics.gauge('password_hash_queue_depth', cls._waiting)
+        try:
+            async with cls.get_semaphore():
+                cls._waiting -= 1
+                metrics.gauge('password_hash_queue_depth', cls._waiting)
+                return await asyncio.get_running_loop().run_in_executor(cls.get_executor(), func, *args)
+        finally:
+            metrics.observe('password_hash', time.perf_counter() - started, func=func.__name__)
+
+    @classmethod
+    def shutdown(cls):
+        if cls._executor is not None:
+            cls._executor.shutdown(wait=False, cancel_futures=True)
+            cls._executor = None
+        cls._semaphore = None
+
+
+async def async_hash_password(password: str) -> str:
+    return await PasswordHasher.run(hash_password, password)
+
+
+async def async_verify_password(plain_password, hashed_password) -> bool:
+    return await PasswordHasher.run(verify_password, plain_password, hashed_password)
+
+
 def validate_region(region):
     if (
         region is not None
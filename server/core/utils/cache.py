@@ -0,0 +1,74 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+from server.core.metrics import metrics, hit_rate
+
+
+class TTLCache:
+    """
+    프로세스 내부에서 사용하는 크기 제한 LRU 캐시
+    - 항목 별 만료 시간(TTL) 지원
+    - name 지정 시, hit/miss 메트릭 기록
+    """
+
+    _missing = object()
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60, name: Optional[str] = None):
+        assert maxsize > 0, 'maxsize must be positive.'
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._data: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key: Hashable):
+        return self.get(key, self._missing, record=False) is not self._missing
+
+    def _record(self, result: str):
+        if self.name:
+            metrics.incr('cache', cache=self.name, result=result)
+
+    def get(self, key: Hashable, default: Any = None, record: bool = True):
+        item = self._data.get(key)
+        if item is not None:
+            expire_at, value = item
+            if expire_at > time.monotonic():
+                self._data.move_to_end(key)
+                if record:
+                    self._record('hit')
+                return value
+            del self._data[key]
+        if record:
+            self._record('miss')
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self._record('eviction')
+
+    def delete(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def info(self):
+        hits = metrics.counter_value('cache', cache=self.name, result='hit') if self.name else 0
+        misses = metrics.counter_value('cache', cache=self.name, result='miss') if self.name else 0
+        return {
+            'name': self.name,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hit_rate(hits, misses),
+        }
@@ -1,28 +1,143 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Hashable
 
 from fastapi import HTTPException
-from sqlalchemy import update, select, insert, delete
+from sqlalchemy import update, select, insert, delete, event, inspect
+from sqlalchemy.engine import Result, FrozenResult
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import MultipleResultsFound
+from sqlalchemy.orm import sessionmaker, Session, ORMExecuteState
 from sqlalchemy.sql.elements import BooleanClauseList, BinaryExpression
 from starlette import status
 
+from server.core.utils.cache import TTLCache
+from server.db.databases import get_replica_session
+
 
 class CRUDBase:
     model = None
+    # 조회 결과 캐시 (사용 시 하위 클래스에서 지정, 모델 및 cache_invalidated_by 모델 변경 시 초기화)
+    # 프로세스 내부 캐시로 다른 프로세스의 변경은 TTL 동안 반영되지 않으므로, 권한 확인에 쓰는 모델(대화방 참여, 세션)은 사용하지 않음
+    cache: Optional[TTLCache] = None
+    cache_invalidated_by: tuple = ()
+
+    _caches: List[Tuple[type, TTLCache]] = []
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.__dict__.get('cache') is not None:
+            for model in (cls.model, *cls.cache_invalidated_by):
+                CRUDBase._caches.append((model, cls.cache))
+
+    @classmethod
+    def cache_info(cls) -> List[Dict[str, Any]]:
+        return [c.info() for c in dict.fromkeys(c for _, c in cls._caches)]
+
+    @classmethod
+    def invalidate(cls, *models: type):
+        """변경된 모델(하위 모델 포함)에 해당하는 조회 결과 캐시 초기화 (미지정 시 전체)"""
+        for model, cache in cls._caches:
+            if not models or any(issubclass(m, model) for m in models):
+                cache.clear()
 
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def get(self, conditions: tuple, options: Optional[list] = None):
+    async def execute_read(self, stmt, read_only: Optional[bool] = None) -> Tuple[Result, bool]:
+        """
+        조회 쿼리 실행 (복제 DB 로 보낸 경우, 결과와 함께 True 반환)
+        - 복제 DB 결과는 세션 종료 전에 버퍼링
+        """
+        replica_session_maker: Optional[sessionmaker] = get_replica_session(self.session, read_only)
+        if replica_session_maker is None:
+            return await self.session.execute(stmt), False
+        async with replica_session_maker() as session:
+            frozen: FrozenResult = (await session.execute(stmt)).freeze()
+        return frozen(), True
+
+    async def attach(self, instances: list, read_only: Optional[bool] = None) -> list:
+        """자동 라우팅으로 복제 DB 에서 조회한 객체는, 변경 후 커밋할 수 있도록 주 DB 세션에 연결"""
+        if read_only:
+            return instances
+        return [await self.session.merge(i, load=False) for i in instances]
+
+    @classmethod
+    def get_cache_key(cls, stmt) -> Optional[Hashable]:
+        """조회문 구조와 바인딩 값으로 캐시 키 생성 (캐시 미사용 CRUD 는 None)"""
+        if cls.cache is None:
+            return None
+        cache_key = stmt._generate_cache_key()
+        if cache_key is None:
+            return None
+        return cache_key.key, tuple(
+            tuple(v) if isinstance(v, list) else v
+            for v in (b.effective_value for b in cache_key.bindparams)
+        )
+
+    async def fetch(self, stmt, scalars: bool = True, read_only: Optional[bool] = None, use_cache: bool = True) -> list:
+        """
+        조회 결과 목록 반환
+        - 캐시 사용 CRUD 는, 세션과 분리된 복사본을 캐시하고 조회 시 현재 세션에 연결
+        """
+        key: Optional[Hashable] = self.get_cache_key(stmt) if use_cache else None
+        if key is not None:
+            cached: Optional[list] = self.cache.get(key)
+            # 세션에서 변경 중인 객체는 캐시 된 값으로 덮어쓰지 않도록 DB 조회
+            if cached is not None and not (scalars and self.has_modified(cached)):
+                return [await self.attach_cached(i) for i in cached] if scalars else cached
+
+        results, from_replica = await self.execute_read(stmt, read_only)
+        if not scalars:
+            rows = list(results)
+            if key is not None:
+                self.cache.set(key, rows)
+            return rows
+
+        instances = results.scalars().all()
+        if from_replica:
+            instances = await self.attach(instances, read_only)
+        # 세션에서 변경 중인 객체가 포함된 결과는 캐시하지 않음
+        if key is not None and not any(self.session.is_modified(i) for i in instances):
+            self.cache.set(key, self.detached_copies(instances))
+        return instances
+
+    @staticmethod
+    def detached_copies(instances: list) -> list:
+        """세션과 분리된 복사본 생성 (load=False 병합은 쿼리를 실행하지 않음)"""
+        with Session() as scratch:
+            return [scratch.merge(i, load=False) for i in instances]
+
+    def has_modified(self, instances: list) -> bool:
+        """캐시 된 복사본 중 현재 세션에서 변경 중인 객체가 있는지 확인"""
+        identity_map = self.session.sync_session.identity_map
+        return any(
+            (existing := identity_map.get(inspect(i).key)) is not None and self.session.is_modified(existing)
+            for i in instances
+        )
+
+    async def attach_cached(self, instance):
+        """
+        캐시 된 복사본을 현재 세션에 연결
+        - 이미 세션에 있는 객체에도 병합해, 캐시 된 조회문의 eager loading 속성(옵션)을 채움
+        """
+        return await self.session.merge(instance, load=False)
+
+    async def get(
+        self,
+        conditions: tuple,
+        options: Optional[list] = None,
+        read_only: Optional[bool] = None,
+        use_cache: bool = True
+    ):
         stmt = select(self.model).where(*conditions)
         if options:
             for option in options:
                 stmt = stmt.options(option)
-        results = await self.session.execute(stmt)
-        instance = results.scalars().one_or_none()
-        if instance is None:
+        instances = await self.fetch(stmt, read_only=read_only, use_cache=use_cache)
+        if not instances:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Not found {self.model.__name__}.")
-        return instance
+        if len(instances) > 1:
+            raise MultipleResultsFound("Multiple rows were found when one or none was required")
+        return instances[0]
 
     async def list(
         self,
@@ -35,7 +150,9 @@ class CRUDBase:
         with_only_columns: Optional[tuple] = None,
         group_by: Optional[tuple] = None,
         having: Optional[BooleanClauseList | BinaryExpression] = None,
-        options: Optional[list] = None
+        options: Optional[list] = None,
+        read_only: Optional[bool] = None,
+        use_cache: bool = True
     ):
         assert offset >= 0
         assert limit >= 0
@@ -64,10 +181,9 @@ class CRUDBase:
                 stmt = stmt.options(o)
         if with_only_columns:
             stmt = stmt.with_only_columns(*with_only_columns)
-            return [row for row in await self.session.execute(stmt)]
+            return await self.fetch(stmt, scalars=False, read_only=read_only, use_cache=use_cache)
 
-        results = await self.session.execute(stmt)
-        return results.scalars().all()
+        return await self.fetch(stmt, read_only=read_only, use_cache=use_cache)
 
     async def create(self, **kwargs):
         instance = self.model(**kwargs)
@@ -94,3 +210,33 @@ class CRUDBase:
     async def delete(self, conditions: tuple):
         stmt = delete(self.model).where(*conditions)
         await self.session.execute(stmt)
+
+
+# 쓰기 발생 시 캐시 초기화 (커밋 전에 다른 세션이 다시 캐시할 수 있으므로, 커밋 이후에도 한 번 더 초기화)
+@event.listens_for(Session, 'do_orm_execute')
+def invalidate_on_execute(orm_execute_state: ORMExecuteState):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            orm_execute_state.session.info.setdefault('cache_models', set()).add(mapper.class_)
+            CRUDBase.invalidate(mapper.class_)
+
+
+@event.listens_for(Session, 'after_flush')
+def invalidate_on_flush(session: Session, flush_context):
+    models = {type(o) for o in (*session.new, *session.dirty, *session.deleted)}
+    if models:
+        session.info.setdefault('cache_models', set()).update(models)
+        CRUDBase.invalidate(*models)
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_on_commit(session: Session):
+    models = session.info.pop('cache_models', None)
+    if models:
+        CRUDBase.invalidate(*models)
+
+
+@event.listens_for(Session, 'after_rollback')
+def invalidate_on_rollback(session: Session):
+    session.info.pop('cache_models', None)
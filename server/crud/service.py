@@ -1,5 +1,11 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.mysql import insert
+
 from server.crud import CRUDBase
-from server.models import ChatRoom, ChatRoomUserAssociation, ChatHistory, ChatHistoryFile, ChatHistoryUserAssociation
+from server.models import ChatRoom, ChatRoomUserAssociation, ChatHistory, ChatHistoryFile, ChatRoomReadCursor
 
 
 class ChatRoomCRUD(CRUDBase):
@@ -18,5 +24,27 @@ class ChatHistoryFileCRUD(CRUDBase):
     model = ChatHistoryFile
 
 
-class ChatHistoryUserAssociationCRUD(CRUDBase):
-    model = ChatHistoryUserAssociation
+class ChatRoomReadCursorCRUD(CRUDBase):
+    model = ChatRoomReadCursor
+
+    async def upsert(self, room_id: int, user_profile_id: int, last_read_at: datetime, last_read_id: Optional[int] = None):
+        """읽음 위치 생성 혹은 갱신 (이전 위치로 되돌아가지 않음)"""
+        stmt = insert(self.model).values(
+            room_id=room_id,
+            user_profile_id=user_profile_id,
+            last_read_at=last_read_at,
+            last_read_id=last_read_id
+        )
+        # MySQL 은 앞선 할당 결과를 이어서 사용하므로, last_read_id 를 먼저 갱신
+        stmt = stmt.on_duplicate_key_update([
+            (
+                'last_read_id',
+                func.if_(
+                    stmt.inserted.last_read_at >= self.model.last_read_at,
+                    func.coalesce(stmt.inserted.last_read_id, self.model.last_read_id),
+                    self.model.last_read_id
+                )
+            ),
+            ('last_read_at', func.greatest(self.model.last_read_at, stmt.inserted.last_read_at)),
+        ])
+        await self.session.execute(stmt)
@@ -1,15 +1,33 @@
-from server.core.utils import hash_password
+from sqlalchemy import Column
+from sqlalchemy.sql.elements import ColumnElement
+
+from server.core.utils import async_hash_password
+from server.core.utils.cache import TTLCache
 from server.crud import CRUDBase
+from server.db.databases import settings
 from server.models.user import User, UserSession, UserProfile, UserProfileImage, UserRelationship
 
 
+def nickname_search_condition(column: Column, term: str) -> ColumnElement:
+    """
+    닉네임 검색 조건
+    - ngram FULLTEXT 인덱스의 구문 검색으로 접두어/중간 일치 처리
+    - 토큰 크기보다 짧은 검색어는 인덱스로 찾을 수 없으므로, 접두어 일치로 대체
+    """
+    term = term.replace('"', '').strip()
+    if len(term) < settings.search_ngram_token_size:
+        escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return column.like(f'{escaped}%')
+    return column.match(f'"{term}"')
+
+
 class UserCRUD(CRUDBase):
     model = User
 
     async def create(self, **kwargs):
         kwargs.update({
             'uid': kwargs['email'],
-            'password': hash_password(kwargs['password'])
+            'password': await async_hash_password(kwargs['password'])
         })
         user = User(**kwargs)
         self.session.add(user)
@@ -22,6 +40,8 @@ class UserSessionCRUD(CRUDBase):
 
 class UserProfileCRUD(CRUDBase):
     model = UserProfile
+    cache = TTLCache(settings.crud_cache_size, settings.crud_cache_ttl, name='crud_user_profile')
+    cache_invalidated_by = (UserProfileImage, UserRelationship)
 
 
 class UserProfileImageCRUD(CRUDBase):
@@ -1,9 +1,13 @@
-from typing import AsyncGenerator
+import time
+from contextvars import ContextVar
+from typing import AsyncGenerator, Optional, Dict
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncEngine
+from sqlalchemy.orm import sessionmaker, declarative_base, Session, ORMExecuteState
 
 from server.config import get_settings
+from server.core.metrics import metrics
 
 settings = get_settings()
 
@@ -14,6 +18,13 @@ DATABASE_URL = "mysql+asyncmy://{username}:{password}@{host}:{port}/{db_name}".f
     port=settings.db_port,
     db_name=settings.db_name
 )
+REPLICA_DATABASE_URL = settings.db_replica_host and "mysql+asyncmy://{username}:{password}@{host}:{port}/{db_name}".format(
+    username=settings.db_username,
+    password=settings.db_password,
+    host=settings.db_replica_host,
+    port=settings.db_replica_port or settings.db_port,
+    db_name=settings.db_name
+)
 
 engine = create_async_engine(
     DATABASE_URL,
@@ -21,10 +32,97 @@ engine = create_async_engine(
     pool_recycle=3600,
     isolation_level="READ COMMITTED"
 )
+replica_engine = REPLICA_DATABASE_URL and create_async_engine(
+    REPLICA_DATABASE_URL,
+    echo=True, future=True,
+    pool_recycle=3600,
+    isolation_level="READ COMMITTED"
+)
+
+
+def observe_engine(async_engine: AsyncEngine, name: str):
+    """엔진별 쿼리 지연 시간 기록"""
+
+    @event.listens_for(async_engine.sync_engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context.query_started = time.perf_counter()
+
+    @event.listens_for(async_engine.sync_engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        metrics.observe('db_query_duration', time.perf_counter() - context.query_started, engine=name)
+
+
+observe_engine(engine, 'primary')
+if replica_engine:
+    observe_engine(replica_engine, 'replica')
+
+
+# 쓰기 여부 추적 (복제 DB 라우팅 및 커밋 이후 주 DB 고정에 사용)
+# 쓰기 커밋 이후 주 DB 로 조회할 수 있도록, 요청 간 마지막 쓰기 시각을 전달하는 쿠키
+LAST_WRITE_COOKIE = 'last_write'
+# 요청 단위 마지막 쓰기 커밋 시각 (요청 시작 시 쿠키 값으로 설정하고, 커밋 시 갱신)
+last_write_context: ContextVar[Optional[Dict[str, float]]] = ContextVar('last_write', default=None)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def track_write_execute(orm_execute_state: ORMExecuteState):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['has_writes'] = True
+
+
+@event.listens_for(Session, 'after_flush')
+def track_write_flush(session: Session, flush_context):
+    session.info['has_writes'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def track_write_commit(session: Session):
+    if session.info.pop('has_writes', False):
+        session.info['last_write_at'] = time.time()
+        request_writes: Optional[Dict[str, float]] = last_write_context.get()
+        if request_writes is not None:
+            request_writes['last_write_at'] = time.time()
+
+
+@event.listens_for(Session, 'after_rollback')
+def track_write_rollback(session: Session):
+    session.info.pop('has_writes', None)
+
+
+def get_replica_session(session: AsyncSession, read_only: Optional[bool] = None) -> Optional[sessionmaker]:
+    """
+    조회 쿼리를 보낼 복제 DB 세션 생성기 반환 (None 인 경우, 주 DB 세션으로 조회)
+    - read_only=False 이거나 복제 DB 미설정 시, 주 DB
+    - 쓰기 커밋 직후에는 자신의 쓰기 결과를 읽을 수 있도록 주 DB (같은 세션 혹은 쿠키로 전달 받은 이전 요청의 쓰기)
+    - read_only=None 인 경우, 자동 라우팅 설정 시 쓰기 트랜잭션 밖의 조회만 복제 DB
+    """
+    info = session.sync_session.info
+    replica_session_maker: Optional[sessionmaker] = info.get('replica_session')
+    if read_only is False or replica_session_maker is None:
+        return None
+    request_writes: Dict[str, float] = last_write_context.get() or {}
+    last_write_at: float = max(info.get('last_write_at', 0), request_writes.get('last_write_at', 0))
+    if time.time() - last_write_at < info.get('replica_sticky_seconds', 0):
+        return None
+    if read_only is None:
+        if not info.get('replica_auto_route'):
+            return None
+        if info.get('has_writes') or session.new or session.dirty or session.deleted:
+            return None
+    return replica_session_maker
+
 
 Base = declarative_base()
+replica_session = replica_engine and sessionmaker(bind=replica_engine, class_=AsyncSession, expire_on_commit=False)
 # sessionmaker : 엔진의 연결 풀을 요청하고, 새로운 세션 객체와 연결하여, 새로운 세션 객체를 초기화하는 자동화 기능을 수행함
-async_session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+async_session = sessionmaker(
+    bind=engine, class_=AsyncSession, expire_on_commit=False,
+    info={
+        'replica_session': replica_session,
+        'replica_auto_route': settings.db_replica_auto_route,
+        'replica_sticky_seconds': settings.db_replica_sticky_seconds,
+    }
+)
 
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
@@ -1,5 +1,5 @@
 import logging
-from typing import List
+import math
 
 import uvicorn
 from fastapi import FastAPI, Request
@@ -10,10 +10,13 @@ from starlette.staticfiles import StaticFiles
 
 from server.api.common import get_async_redis_handler
 from server.api.v1 import api_router
+from server.api.websocket.chat.media import MediaJobWorker
+from server.api.websocket.chat.retention import ChatHistoryEvictionWorker
 from server.core.exceptions import ClassifiableException
+from server.core.utils import PasswordHasher
 from server.core.externals.redis.schemas import RedisInfoByRoomS
 from server.core.responses import WebsocketJSONResponse
-from server.db.databases import settings, engine, Base
+from server.db.databases import settings, engine, Base, LAST_WRITE_COOKIE, last_write_context
 
 app = FastAPI(default_response_class=WebsocketJSONResponse)
 
@@ -26,6 +29,32 @@ if settings.backend_cors_origins:
         allow_headers=["*"],
     )
 
+
+@app.middleware('http')
+async def replica_sticky_middleware(request: Request, call_next):
+    """
+    쓰기 커밋 시각을 쿠키로 전달
+    - 다음 요청의 조회도 복제 DB 지연 시간(db_replica_sticky_seconds) 동안 주 DB 로 조회
+    """
+    try:
+        last_write_at = float(request.cookies.get(LAST_WRITE_COOKIE, 0))
+    except ValueError:
+        last_write_at = 0
+    request_writes = {'last_write_at': last_write_at}
+    token = last_write_context.set(request_writes)
+    try:
+        response = await call_next(request)
+    finally:
+        last_write_context.reset(token)
+
+    if request_writes['last_write_at'] > last_write_at:
+        response.set_cookie(
+            LAST_WRITE_COOKIE, str(request_writes['last_write_at']),
+            max_age=math.ceil(settings.db_replica_sticky_seconds), httponly=True
+        )
+    return response
+
+
 app.include_router(api_router, prefix=settings.api_v1_prefix)
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -34,9 +63,9 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 async def init_chat_room_redis():
     redis_handler_gen = anext(get_async_redis_handler())
     redis_handler = await redis_handler_gen
-    room_keys: List[str] = (await RedisInfoByRoomS.scan(await redis_handler.redis))[1]
-    if room_keys:
-        await RedisInfoByRoomS.delete(await redis_handler.redis, *room_keys, raw_key=True)
+    redis = await redis_handler.redis
+    async for room_keys in RedisInfoByRoomS.scan_batches(redis):
+        await RedisInfoByRoomS.delete(redis, *room_keys, raw_key=True)
 
 
 @app.on_event("startup")
@@ -52,9 +81,19 @@ async def on_startup():
 
     await init_chat_room_redis()
 
+    # 파일 업로드 작업 워커
+    app.state.media_job_workers = MediaJobWorker.start()
+
+    # 유휴 대화방 대화 내역 Redis 삭제 작업
+    app.state.chat_history_eviction_worker = ChatHistoryEvictionWorker.start()
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    for task in app.state.media_job_workers:
+        task.cancel()
+    app.state.chat_history_eviction_worker.cancel()
+    PasswordHasher.shutdown()
     await init_chat_room_redis()
 
 
@@ -1,8 +1,10 @@
 import asyncio
 import functools
+import hashlib
 import os
 import uuid
 import warnings
+from datetime import datetime, timedelta
 from io import IOBase, BytesIO
 from typing import List, Optional, Iterable, Dict, Any
 from urllib.parse import quote_plus
@@ -12,11 +14,12 @@ from PIL import Image
 from botocore.config import Config
 from botocore.exceptions import ClientError
 from pdf2image import convert_from_bytes
-from sqlalchemy import BigInteger, Column, String, DateTime, func, ForeignKey, Boolean, inspect
+from sqlalchemy import BigInteger, Column, String, DateTime, func, ForeignKey, Boolean, inspect, select, exists, Index
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import relationship, backref
 from starlette.datastructures import UploadFile
 
+from server.core.utils.cache import TTLCache
 from server.db.databases import Base, settings
 from server.schemas.base import WebSocketFileS
 
@@ -49,13 +52,32 @@ class ConvertMixin(object):
 
 class S3Media(TimestampMixin, ConvertMixin, Base):
     __tablename__ = "s3_media"
+    __table_args__ = (
+        Index('ix_s3_media_bucket_name_filepath', 'bucket_name', 'filepath'),
+    )
 
     _file: Optional[IOBase | UploadFile | Image.Image] = None
+    _reused = False  # 동일한 내용의 S3 객체를 재사용하는 경우, 업로드 생략
     thumbnail_size = 300
     chunk_size = 1024 * 1024 * 10
     bucket_cdn_mapper = {
         settings.aws_storage_bucket_name: settings.aws_cdn_url
     }
+    presigned_url_expiration = 7 * 24 * 60 * 60  # 7일
+    presigned_url_margin = 24 * 60 * 60  # 만료 1일 전 재서명
+    presigned_post_expiration = 60 * 60  # 1시간
+    presigned_post_max_size = 1024 * 1024 * 100  # 100MB
+    presigned_url_cache = TTLCache(
+        maxsize=settings.presigned_url_cache_size,
+        ttl=presigned_url_expiration - presigned_url_margin,
+        name='presigned_url'
+    )
+    variant_sizes = {
+        'avatar': 64,
+        'list': 128,
+        'preview': 512,
+    }
+    variant_cache = TTLCache(maxsize=settings.presigned_url_cache_size, ttl=24 * 60 * 60, name='image_variant')
 
     id = Column(BigInteger, primary_key=True, index=True)
     uid = Column(String(32), nullable=False, unique=True)
@@ -65,15 +87,16 @@ class S3Media(TimestampMixin, ConvertMixin, Base):
     filename = Column(String(45), nullable=False)
     filepath = Column(String(250), nullable=False)
     content_type = Column(String(45), nullable=False)
+    content_hash = Column(String(64), nullable=True, index=True)
     use_type = Column(String(50), nullable=True)
     is_active = Column(Boolean, default=True, nullable=False)
 
     origin = relationship('S3Media', remote_side=[uid], backref=backref('thumbnail', uselist=False))
 
+    # 하위 모델 조회 시 해당 테이블만 조인 (기본 모델 조회는 공통 컬럼만 사용)
     __mapper_args__ = {
         'polymorphic_identity': 's3_media',
         'polymorphic_on': use_type,
-        'with_polymorphic': '*'
     }
 
     def get_file(
@@ -85,9 +108,11 @@ class S3Media(TimestampMixin, ConvertMixin, Base):
             s3_session = boto3.Session(aws_access_key_id=aws_access_key_id, aws_secret_access_key=aws_secret_access_key)
             s3 = s3_session.resource('s3')
             obj = s3.Object(self.bucket_name, self.filepath)
-            with BytesIO() as f:
-                while contents := obj.get()['Body'].read(self.chunk_size):
-                    f.write(contents)
+            body = obj.get()['Body']
+            f = BytesIO()
+            while contents := body.read(self.chunk_size):
+                f.write(contents)
+            f.seek(0)
             self._file = f
         return self._file
 
@@ -139,57 +164,108 @@ class S3Media(TimestampMixin, ConvertMixin, Base):
         *media: 'S3Media',
         aws_access_key_id: str = settings.aws_access_key,
         aws_secret_access_key: str = settings.aws_secret_access_key,
-        expiration=7 * 24 * 60 * 60  # 7일
+        expiration=presigned_url_expiration
     ) -> List[Dict[str, Any]]:
         if not media:
             return []
 
-        s3 = cls.get_s3_client(aws_access_key_id, aws_secret_access_key)
+        # 캐시에 없는 객체만 서명 (만료 전 여유 시간이 남아 있는 URL 만 캐시에 유지)
+        urls: Dict[tuple, str] = {}
+        misses: List[tuple] = []
+        for m in media:
+            key = (m.bucket_name, m.filepath, expiration)
+            if key in urls or key in misses:
+                continue
+            url = cls.presigned_url_cache.get(key)
+            if url is None:
+                misses.append(key)
+            else:
+                urls[key] = url
 
-        async def _generate(attr):
-            media_id = attr.pop('id')
-            return {
-                'id': media_id,
-                'url': s3.generate_presigned_url('get_object', **attr)
-            }
-
-        async def _kwargs():
-            for m in media:
-                yield {
-                    'id': m.id,
-                    'Params': {
-                        'Bucket': m.bucket_name,
-                        'Key': m.filepath
-                    },
-                    'ExpiresIn': expiration
-                }
+        if misses:
+            s3 = cls.get_s3_client(aws_access_key_id, aws_secret_access_key)
 
-        done, _ = await asyncio.wait([_generate(attr) async for attr in _kwargs()])
-        return [r.result() for r in done]
+            def _generate():
+                return [
+                    s3.generate_presigned_url(
+                        'get_object',
+                        Params={'Bucket': bucket_name, 'Key': filepath},
+                        ExpiresIn=expires_in
+                    ) for bucket_name, filepath, expires_in in misses
+                ]
+
+            signed = await asyncio.get_running_loop().run_in_executor(None, _generate)
+            for key, url in zip(misses, signed):
+                urls[key] = url
+                cls.presigned_url_cache.set(key, url, ttl=expiration - cls.presigned_url_margin)
+
+        return [
+            {
+                'id': m.id,
+                'url': urls[(m.bucket_name, m.filepath, expiration)]
+            } for m in media
+        ]
 
     @classmethod
     async def is_exists(
         cls, session: AsyncSession, filepath: str,
         bucket_name: str = settings.aws_storage_bucket_name, **kwargs
     ) -> bool:
-        from server.crud.base import S3MediaCRUD
-        from fastapi import HTTPException
-        try:
-            await S3MediaCRUD(session).get(
-                conditions=(
-                    S3Media.filepath == filepath,
-                    S3Media.bucket_name == bucket_name))
-        except HTTPException:
-            return False
-        return True
+        return await session.scalar(
+            select(exists().where(
+                S3Media.bucket_name == bucket_name,
+                S3Media.filepath == filepath
+            ))
+        )
 
     @classmethod
-    async def new(
-        cls, session: AsyncSession, file: UploadFile | WebSocketFileS, root: str = None,
-        uploaded_by_id: int = None, upload=False, thumbnail=False, **kwargs
-    ):
-        uid = uuid.uuid4().hex
+    async def file_to_hash(cls, file: UploadFile | WebSocketFileS | IOBase) -> str:
+        """파일 내용을 청크 단위로 읽어 SHA-256 해시 생성"""
+        sha256 = hashlib.sha256()
+        if isinstance(file, UploadFile):
+            await file.seek(0)
+            while contents := await file.read(cls.chunk_size):
+                sha256.update(contents)
+            await file.seek(0)
+        else:
+            io: IOBase = file if isinstance(file, IOBase) else file.content
+            io.seek(0)
+            while contents := io.read(cls.chunk_size):
+                sha256.update(contents)
+            io.seek(0)
+        return sha256.hexdigest()
+
+    @classmethod
+    async def get_by_content_hash(
+        cls, session: AsyncSession, content_hash: str,
+        bucket_name: str = settings.aws_storage_bucket_name
+    ) -> Optional['S3Media']:
+        """동일한 내용으로 업로드 된 원본 파일 조회"""
+        results = await session.execute(
+            select(S3Media)
+            .where(
+                S3Media.content_hash == content_hash,
+                S3Media.bucket_name == bucket_name,
+                S3Media.origin_uid.is_(None),
+                S3Media.is_active == 1
+            )
+            .order_by(S3Media.id)
+            .limit(1)
+        )
+        return results.scalars().first()
 
+    @classmethod
+    async def get_thumbnail(cls, session: AsyncSession, origin: 'S3Media') -> Optional['S3Media']:
+        results = await session.execute(
+            select(S3Media)
+            .where(S3Media.origin_uid == origin.uid, S3Media.is_active == 1)
+            .order_by(S3Media.id)
+            .limit(1)
+        )
+        return results.scalars().first()
+
+    @classmethod
+    def generate_root(cls, uid: str, root: str = None, uploaded_by_id: int = None) -> str:
         root = 'media/' + root.lstrip('/') if root else ''
         if not root.endswith('/'):
             root += '/'
@@ -199,88 +275,295 @@ class S3Media(TimestampMixin, ConvertMixin, Base):
         else:
             path_prefix = 'anonymous'
 
-        root = os.path.join(root, f'{path_prefix}/{uid}/')
+        return os.path.join(root, f'{path_prefix}/{uid}/')
+
+    @classmethod
+    async def new(
+        cls, session: AsyncSession, file: UploadFile | WebSocketFileS, root: str = None,
+        uploaded_by_id: int = None, upload=False, thumbnail=False, **kwargs
+    ):
+        uid = uuid.uuid4().hex
+        root = cls.generate_root(uid, root, uploaded_by_id)
 
         filename = file.filename
-        filepath = f'{root}{filename}'
-        if await cls.is_exists(session, filepath, **kwargs):
-            raise FileExistsError(f'이미 파일이 존재합니다. {filepath}')
         content_type = file.content_type
+        content_hash = await cls.file_to_hash(file)
+
+        # 동일한 내용의 파일이 이미 업로드 되어 있다면, 해당 S3 객체 재사용
+        duplicated: S3Media | None = await cls.get_by_content_hash(
+            session, content_hash, kwargs.get('bucket_name', settings.aws_storage_bucket_name)
+        )
+        if duplicated:
+            filepath = duplicated.filepath
+        else:
+            filepath = f'{root}{filename}'
+            if await cls.is_exists(session, filepath, **kwargs):
+                raise FileExistsError(f'이미 파일이 존재합니다. {filepath}')
 
         instance = cls(
             uid=uid,
             filename=filename,
             filepath=filepath,
             content_type=content_type,
+            content_hash=content_hash,
             uploaded_by_id=uploaded_by_id,
             **kwargs
         )
         instance._file = file if isinstance(file, UploadFile) else file.content
+        instance._reused = duplicated is not None
         if upload:
             await instance.upload()
 
         if thumbnail:
-            if content_type.startswith('image/'):
-                im_origin = Image.open(await cls.file_to_io(instance))
-                w, h = im_origin.size
-                if max(w, h) <= cls.thumbnail_size:
-                    return instance, None
+            if duplicated:
+                duplicated_thumbnail: S3Media | None = await cls.get_thumbnail(session, duplicated)
+                if duplicated_thumbnail:
+                    thumbnail = cls(
+                        uid=uuid.uuid4().hex,
+                        origin_uid=instance.uid,
+                        filename=duplicated_thumbnail.filename,
+                        filepath=duplicated_thumbnail.filepath,
+                        content_type=duplicated_thumbnail.content_type,
+                        uploaded_by_id=uploaded_by_id,
+                        **kwargs
+                    )
+                    thumbnail._reused = True
+                    return instance, thumbnail
+
+            return instance, await instance.new_thumbnail(root, upload=upload, **kwargs)
+
+        return instance, None
+
+    @staticmethod
+    def rotate_by_exif(im: Image.Image) -> Image.Image:
+        try:
+            # exif 추출 및 rotation 정보 적용
+            if hasattr(im, '_getexif'):
+                _exif = im._getexif()
+                if _exif and 0x0112 in _exif:
+                    _o = _exif.get(0x0112)
+                    angle = {3: 180, 6: 270, 8: 90}.get(_o, 0)
+                    if angle != 0:
+                        im = im.rotate(angle, expand=True)
+        except:
+            pass
+        return im
+
+    def get_variant_filepath(self, name: str, webp=False) -> str:
+        root, filename = os.path.split(self.filepath)
+        stem, ext = os.path.splitext(filename)
+        return f'{root}/variants/{name}/{stem}{".webp" if webp else ext}'
+
+    def generate_variant(
+        self, name: str, webp=False,
+        aws_access_key_id: str = settings.aws_access_key,
+        aws_secret_access_key: str = settings.aws_secret_access_key
+    ) -> 'S3Media':
+        """
+        이미지 변형본 조회
+        - S3 에 없는 경우, 원본 이미지를 리사이즈 하여 업로드 (최초 요청 시에만 생성)
+        """
+        assert name in self.variant_sizes, f'Invalid variant name: {name}'
+        assert self.content_type.startswith('image/'), f'Not an image type: {self.content_type}'
+
+        variant = self.__class__(
+            id=self.id,
+            uid=self.uid,
+            bucket_name=self.bucket_name,
+            filename=self.filename,
+            filepath=self.get_variant_filepath(name, webp),
+            content_type='image/webp' if webp else self.content_type,
+        )
+        key = (variant.bucket_name, variant.filepath)
+        if self.variant_cache.get(key) or variant.file_exists(aws_access_key_id, aws_secret_access_key):
+            self.variant_cache.set(key, True)
+            return variant
 
+        size = self.variant_sizes[name]
+        try:
+            im = self.rotate_by_exif(Image.open(self.get_file(aws_access_key_id, aws_secret_access_key)))
+            im.thumbnail((size, size), Image.ANTIALIAS)
+            image_format = variant.content_type.split('/')[-1].upper()
+            if image_format == 'JPEG' and im.mode not in ('RGB', 'L'):
+                im = im.convert('RGB')
+
+            b = BytesIO()
+            im.save(b, format=image_format)
+            b.seek(0)
+            self.get_s3_client(aws_access_key_id, aws_secret_access_key).upload_fileobj(**{
+                'Fileobj': b,
+                'Bucket': variant.bucket_name,
+                'Key': variant.filepath,
+                'ExtraArgs': {'ContentType': variant.content_type},
+            })
+            b.close()
+        finally:
+            self.close()
+
+        self.variant_cache.set(key, True)
+        return variant
+
+    async def get_variant_url(self, name: str, webp=False) -> str:
+        variant: S3Media = await asyncio.get_running_loop().run_in_executor(
+            None, self.generate_variant, name, webp
+        )
+        urls: List[Dict[str, Any]] = await self.asynchronous_presigned_url(variant)
+        return urls[0]['url']
+
+    async def new_thumbnail(self, root: str, upload=False, **kwargs) -> Optional['S3Media']:
+        """원본 파일로부터 썸네일 생성 (원본 파일이 메모리에 없는 경우, S3 에서 다운로드)"""
+        cls = self.__class__
+        filename = self.filename
+        content_type = self.content_type
+
+        if content_type.startswith('image/'):
+            im_origin = Image.open(await cls.file_to_io(self))
+            w, h = im_origin.size
+            if max(w, h) <= cls.thumbnail_size:
+                return None
+
+            thumbnail = cls(
+                uid=uuid.uuid4().hex,
+                origin_uid=self.uid,
+                filename=filename,
+                filepath=f'{root}thumbnail/{filename}',
+                content_type=content_type,
+                uploaded_by_id=self.uploaded_by_id,
+                **kwargs
+            )
+            im = cls.rotate_by_exif(im_origin)
+            im.thumbnail((cls.thumbnail_size, cls.thumbnail_size), Image.ANTIALIAS)
+
+            thumbnail._file = im
+            if upload:
+                await thumbnail.upload()
+
+            return thumbnail
+
+        elif content_type == 'application/pdf':
+            for im in convert_from_bytes((await cls.file_to_io(self)).getvalue()):
                 thumbnail = cls(
                     uid=uuid.uuid4().hex,
-                    origin_uid=instance.uid,
+                    origin_uid=self.uid,
                     filename=filename,
                     filepath=f'{root}thumbnail/{filename}',
                     content_type=content_type,
-                    uploaded_by_id=uploaded_by_id,
-                    **kwargs
-                )
-                im = im_origin
-
-                try:
-                    # exif 추출 및 rotation 정보 썸네일에 적용
-                    if hasattr(im, '_getexif'):
-                        _exif = im._getexif()
-                        if _exif and 0x0112 in _exif:
-                            _o = _exif.get(0x0112)
-                            angle = {3: 180, 6: 270, 8: 90}.get(_o, 0)
-                            if angle != 0:
-                                im = im.rotate(angle, expand=True)
-                except:
-                    pass
-
-                im.thumbnail((cls.thumbnail_size, cls.thumbnail_size), Image.ANTIALIAS)
-
+                    uploaded_by_id=self.uploaded_by_id,
+                    **kwargs)
+                w, h = im.size
+                if max(w, h) > cls.thumbnail_size:
+                    im.thumbnail((cls.thumbnail_size, cls.thumbnail_size), Image.ANTIALIAS)
                 thumbnail._file = im
                 if upload:
                     await thumbnail.upload()
+                return thumbnail  # 첫 장만 썸네일로 저장
+            else:
+                return None
 
-                return instance, thumbnail
+        warnings.warn(f'{self.filename} is not a compressible type: {content_type}')
+        return None
 
-            elif content_type == 'application/pdf':
-                for im in convert_from_bytes(await cls.file_to_io(instance)):
-                    thumbnail = cls(
-                        uid=uuid.uuid4().hex,
-                        origin_uid=instance.uid,
-                        filename=filename,
-                        filepath=f'{root}thumbnail/{filename}',
-                        content_type=content_type,
-                        uploaded_by_id=uploaded_by_id,
-                        **kwargs)
-                    w, h = im.size
-                    if max(w, h) > cls.thumbnail_size:
-                        im.thumbnail((cls.thumbnail_size, cls.thumbnail_size), Image.ANTIALIAS)
-                    thumbnail._file = im
-                    if upload:
-                        await thumbnail.upload()
-                    return instance, thumbnail  # 첫 장만 썸네일로 저장
-                else:
-                    return instance, None
+    @classmethod
+    async def new_presigned(
+        cls, session: AsyncSession, filename: str, content_type: str, root: str = None,
+        uploaded_by_id: int = None, **kwargs
+    ):
+        """
+        클라이언트가 S3 에 직접 업로드 할 객체 생성
+        - 업로드 확인 전까지 비활성화 상태로 저장
+        """
+        uid = uuid.uuid4().hex
+        root = cls.generate_root(uid, root, uploaded_by_id)
+        filepath = f'{root}{filename}'
+        if await cls.is_exists(session, filepath, **kwargs):
+            raise FileExistsError(f'이미 파일이 존재합니다. {filepath}')
 
-            else:
-                warnings.warn(f'{instance.filename} is not a compressible type: {file.content_type}')
+        kwargs['is_active'] = False
+        return cls(
+            uid=uid,
+            filename=filename,
+            filepath=filepath,
+            content_type=content_type,
+            uploaded_by_id=uploaded_by_id,
+            **kwargs
+        )
 
-        return instance, None
+    def presigned_post(
+        self,
+        max_size: int = presigned_post_max_size,
+        aws_access_key_id: str = settings.aws_access_key,
+        aws_secret_access_key: str = settings.aws_secret_access_key,
+        expiration=presigned_post_expiration
+    ) -> Dict[str, Any]:
+        s3 = self.get_s3_client(aws_access_key_id, aws_secret_access_key)
+        return s3.generate_presigned_post(
+            Bucket=self.bucket_name,
+            Key=self.filepath,
+            Fields={'Content-Type': self.content_type},
+            Conditions=[
+                {'Content-Type': self.content_type},
+                ['content-length-range', 1, max_size]
+            ],
+            ExpiresIn=expiration
+        )
+
+    async def confirm_upload(
+        self,
+        thumbnail=False,
+        aws_access_key_id: str = settings.aws_access_key,
+        aws_secret_access_key: str = settings.aws_secret_access_key,
+        **kwargs
+    ) -> Optional['S3Media']:
+        """
+        클라이언트 직접 업로드 완료 확인
+        - S3 객체 존재 여부 확인 후 내용 해시 저장 및 활성화
+        - thumbnail=True 인 경우, 썸네일 생성 및 업로드
+        """
+        if self.is_active:
+            return None
+
+        loop = asyncio.get_running_loop()
+        exists: bool = await loop.run_in_executor(None, self.file_exists, aws_access_key_id, aws_secret_access_key)
+        if not exists:
+            raise FileNotFoundError(f'업로드 된 파일이 존재하지 않습니다. {self.filepath}')
+
+        try:
+            file: IOBase = await loop.run_in_executor(None, self.get_file, aws_access_key_id, aws_secret_access_key)
+            self.content_hash = await self.file_to_hash(file)
+            self.is_active = True
+            if not thumbnail:
+                return None
+            root = self.filepath[:-len(self.filename)]
+            return await self.new_thumbnail(root, upload=True, bucket_name=self.bucket_name, **kwargs)
+        finally:
+            self.close()
+
+    @classmethod
+    async def delete_expired_presigned(
+        cls, session: AsyncSession, *conditions,
+        aws_access_key_id: str = settings.aws_access_key,
+        aws_secret_access_key: str = settings.aws_secret_access_key
+    ) -> int:
+        """
+        업로드 확인 되지 않은 채 업로드 URL 이 만료된 객체 삭제
+        - 업로드 된 S3 객체가 있는 경우 함께 삭제
+        """
+        expired_at: datetime = datetime.now().astimezone() - timedelta(seconds=cls.presigned_post_expiration)
+        results = await session.execute(
+            select(cls).where(cls.is_active == 0, cls.created < expired_at, *conditions)
+        )
+        media: List[S3Media] = results.scalars().all()
+        if not media:
+            return 0
+
+        s3 = cls.get_s3_client(aws_access_key_id, aws_secret_access_key)
+        loop = asyncio.get_running_loop()
+        for m in media:
+            await loop.run_in_executor(
+                None, functools.partial(s3.delete_object, Bucket=m.bucket_name, Key=m.filepath)
+            )
+            await session.delete(m)
+        return len(media)
 
     @classmethod
     async def file_to_io(
@@ -324,6 +607,9 @@ class S3Media(TimestampMixin, ConvertMixin, Base):
         aws_access_key_id: str = settings.aws_access_key,
         aws_secret_access_key: str = settings.aws_secret_access_key
     ):
+        if self._reused and not file:
+            return
+
         s3 = self.get_s3_client(aws_access_key_id, aws_secret_access_key)
 
         if file:
@@ -360,6 +646,9 @@ class S3Media(TimestampMixin, ConvertMixin, Base):
         try:
             async def _upload_kwargs():
                 for m in media:
+                    if m._reused:
+                        continue
+
                     b = await cls.file_to_io(m, aws_access_key_id, aws_secret_access_key)
 
                     if b is None:
@@ -374,7 +663,9 @@ class S3Media(TimestampMixin, ConvertMixin, Base):
                         'Key': m.filepath,
                         'ExtraArgs': {'ContentType': m.content_type},
                     }
-            await asyncio.wait([_upload(attr) async for attr in _upload_kwargs()])
+            uploads = [_upload(attr) async for attr in _upload_kwargs()]
+            if uploads:
+                await asyncio.wait(uploads)
         finally:
             for io in io_list:
                 io.close()
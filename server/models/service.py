@@ -1,7 +1,9 @@
+import hashlib
 import uuid
+from typing import Iterable, List
 
 from sqlalchemy import Column, BigInteger, String, ForeignKey, Text, Boolean, Integer, UniqueConstraint, \
-    PrimaryKeyConstraint
+    PrimaryKeyConstraint, Index, DateTime
 from sqlalchemy.orm import relationship
 
 from server.core.enums import ChatRoomType, ChatHistoryType
@@ -16,12 +18,18 @@ class ChatRoom(TimestampMixin, ConvertMixin, Base):
     id = Column(BigInteger, primary_key=True, index=True)
     name = Column(String(30), nullable=True)
     type = Column(IntTypeEnum(enum_class=ChatRoomType), nullable=False)
+    member_key = Column(String(64), nullable=True, unique=True, index=True)  # 1:1 혹은 나와의 대화방 구성원 키
     is_active = Column(Boolean, default=True, nullable=False)
 
     user_profiles = relationship(
         "ChatRoomUserAssociation", back_populates="room", cascade="all, delete", passive_deletes=True)
     chat_histories = relationship("ChatHistory", back_populates="room")
 
+    @classmethod
+    def generate_member_key(cls, profile_ids: Iterable[int]) -> str:
+        """정렬 된 구성원 프로필 id 해시"""
+        return hashlib.sha256(','.join(map(str, sorted(set(profile_ids)))).encode()).hexdigest()
+
 
 class ChatRoomUserAssociation(TimestampMixin, ConvertMixin, Base):
     __tablename__ = "chat_room_user_association"
@@ -40,10 +48,15 @@ class ChatRoomUserAssociation(TimestampMixin, ConvertMixin, Base):
 
 class ChatHistory(TimestampMixin, ConvertMixin, Base):
     __tablename__ = "chat_histories"
+    __table_args__ = (
+        # 대화방별 최신순 페이지 조회 및 대화방 내 redis_id 조회
+        Index('ix_chat_histories_room_id_created_id', 'room_id', 'created', 'id'),
+        Index('ix_chat_histories_room_id_redis_id', 'room_id', 'redis_id'),
+    )
 
     id = Column(BigInteger, primary_key=True, index=True)
     redis_id = Column(String(32), nullable=False, unique=True, index=True)
-    room_id = Column(BigInteger, ForeignKey("chat_rooms.id"), index=True, nullable=False)
+    room_id = Column(BigInteger, ForeignKey("chat_rooms.id"), nullable=False)
     user_profile_id = Column(BigInteger, ForeignKey("user_profiles.id", ondelete="CASCADE"))
     contents = Column(Text, nullable=True)
     type = Column(IntTypeEnum(enum_class=ChatHistoryType), nullable=False)
@@ -52,9 +65,14 @@ class ChatHistory(TimestampMixin, ConvertMixin, Base):
     room = relationship("ChatRoom", back_populates="chat_histories")
     user_profile = relationship("UserProfile", back_populates="chat_histories")
     files = relationship("ChatHistoryFile", back_populates="chat_history")
-    user_profile_mapping = relationship(
-        "ChatHistoryUserAssociation",
-        back_populates="history", cascade="all, delete", passive_deletes=True)
+
+    # 대화방 읽음 위치 기준으로, 해당 내역을 읽은 유저 프로필 ID 추출
+    def get_read_user_ids(self, read_cursors: Iterable['ChatRoomReadCursor']) -> List[int]:
+        read_user_ids = {self.user_profile_id} if self.user_profile_id else set()
+        for c in read_cursors:
+            if c.room_id == self.room_id and c.last_read_at >= self.created:
+                read_user_ids.add(c.user_profile_id)
+        return sorted(read_user_ids)
 
 
 class ChatHistoryFile(S3Media):
@@ -68,26 +86,19 @@ class ChatHistoryFile(S3Media):
     chat_history = relationship("ChatHistory", back_populates="files")
 
     __mapper_args__ = {
-        "polymorphic_load": "selectin",
         "polymorphic_identity": "chat_history"
     }
 
 
-# 채팅 내역을 읽을 유저들 간의 관계
-class ChatHistoryUserAssociation(ConvertMixin, Base):
-    __tablename__ = "chat_history_user_association"
+# 대화방 구성원별 마지막으로 읽은 채팅 내역 위치
+class ChatRoomReadCursor(ConvertMixin, Base):
+    __tablename__ = "chat_room_read_cursors"
     __table_args__ = (
-        UniqueConstraint(
-            'history_id',
-            'user_profile_id',
-            name='unique association for both history_id and user_profile_id.'
-        ),
+        UniqueConstraint('room_id', 'user_profile_id', name='unique read cursor for both room_id and user_profile_id.'),
     )
 
     id = Column(BigInteger, primary_key=True)
-    history_id = Column(BigInteger, ForeignKey("chat_histories.id", ondelete="CASCADE"), index=True, nullable=False)
+    room_id = Column(BigInteger, ForeignKey("chat_rooms.id", ondelete="CASCADE"), nullable=False)
     user_profile_id = Column(BigInteger, ForeignKey("user_profiles.id", ondelete="CASCADE"), index=True, nullable=False)
-    is_read = Column(Boolean, default=True, nullable=False)
-
-    history = relationship("ChatHistory", back_populates="user_profile_mapping")
-    user_profile = relationship("UserProfile", back_populates="chat_history_mapping")
+    last_read_at = Column(DateTime(timezone=True), nullable=False)
+    last_read_id = Column(BigInteger, nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, BigInteger, Text, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, String, Boolean, DateTime, BigInteger, Text, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 
 from server.core.enums import RelationshipType, ProfileImageType
@@ -27,6 +27,12 @@ class User(TimestampMixin, ConvertMixin, Base):
 
 class UserProfile(TimestampMixin, ConvertMixin, Base):
     __tablename__ = "user_profiles"
+    __table_args__ = (
+        Index(
+            'ft_user_profiles_nickname', 'nickname',
+            mysql_prefix='FULLTEXT', mysql_with_parser='ngram'
+        ),
+    )
 
     id = Column(BigInteger, primary_key=True, index=True)
     user_id = Column(BigInteger, ForeignKey("users.id"), nullable=False)
@@ -37,8 +43,10 @@ class UserProfile(TimestampMixin, ConvertMixin, Base):
     is_active = Column(Boolean, default=True, nullable=False)
 
     user = relationship("User", back_populates="profiles")
+    # 업로드 확인 전 (is_active=False) 이미지는 제외
     images = relationship(
         "UserProfileImage",
+        primaryjoin="and_(UserProfile.id == UserProfileImage.user_profile_id, UserProfileImage.is_active == True)",
         back_populates="profile", cascade="all, delete-orphan")
     rooms = relationship(
         "ChatRoomUserAssociation",
@@ -46,9 +54,6 @@ class UserProfile(TimestampMixin, ConvertMixin, Base):
     chat_histories = relationship(
         "ChatHistory",
         back_populates="user_profile", cascade="all, delete", passive_deletes=True)
-    chat_history_mapping = relationship(
-        "ChatHistoryUserAssociation",
-        back_populates="user_profile", cascade="all, delete", passive_deletes=True)
 
     # 상대방에게 보여지는 자신의 닉네임 추출
     def get_nickname_by_other(self, other_profile_id: int):
@@ -67,6 +72,10 @@ class UserRelationship(ConvertMixin, Base):
     __tablename__ = "user_relationships"
     __table_args__ = (
         UniqueConstraint('my_profile_id', 'other_profile_id', name='unique relationship for both profile ids'),
+        Index(
+            'ft_user_relationships_other_profile_nickname', 'other_profile_nickname',
+            mysql_prefix='FULLTEXT', mysql_with_parser='ngram'
+        ),
     )
 
     id = Column(BigInteger, primary_key=True, index=True)
@@ -93,7 +102,6 @@ class UserProfileImage(S3Media):
     profile = relationship("UserProfile", back_populates="images")
 
     __mapper_args__ = {
-        "polymorphic_load": "selectin",
         "polymorphic_identity": "user_profile_image"
     }
 
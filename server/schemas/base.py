@@ -1,5 +1,6 @@
 from datetime import datetime
 from io import BytesIO
+from typing import Dict
 
 from pydantic import BaseModel
 
@@ -25,6 +26,17 @@ class S3MediaS(S3MediaBaseS):
         orm_mode = True
 
 
+class S3MediaPresignedCreateS(BaseModel):
+    filename: str
+    content_type: str
+
+
+class S3MediaPresignedPostS(BaseModel):
+    id: int
+    url: str
+    fields: Dict[str, str]
+
+
 class WebSocketFileS(BaseModel):
     content: BytesIO
     content_type: str
@@ -3,6 +3,7 @@ from typing import Optional, List
 from pydantic import BaseModel, validator, root_validator
 
 from server.core.enums import ChatType, ChatRoomType
+from server.schemas.base import S3MediaPresignedCreateS, S3MediaPresignedPostS
 
 
 class ChatRoomCreateParamS(BaseModel):
@@ -20,6 +21,20 @@ class ChatRoomCreateParamS(BaseModel):
         return value
 
 
+class ChatFilePresignedCreateS(BaseModel):
+    user_profile_id: int
+    files: List[S3MediaPresignedCreateS]
+
+
+class ChatFilePresignedS(BaseModel):
+    chat_history_id: int
+    files: List[S3MediaPresignedPostS]
+
+
+class ChatFileConfirmS(BaseModel):
+    user_profile_id: int
+
+
 class ChatReceiveFileS(BaseModel):
     content: str
     content_type: str
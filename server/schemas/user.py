@@ -9,7 +9,7 @@ from server.core.enums import ProfileImageType, RelationshipType, FollowType, Re
 from server.core.exceptions import ClassifiableException
 from server.core.utils import get_formatted_phone, get_phone
 from server.schemas import ConvertMixinS
-from server.schemas.base import S3MediaBaseS
+from server.schemas.base import S3MediaBaseS, S3MediaPresignedCreateS
 
 
 class UserBase(BaseModel):
@@ -108,6 +108,16 @@ class UserProfileImageUploadS(BaseModel):
     is_default: bool
 
 
+class UserProfileImagePresignedCreateS(S3MediaPresignedCreateS):
+    user_profile_id: int
+    image_type: str
+    is_default: bool
+
+
+class UserProfileImageConfirmS(BaseModel):
+    user_profile_id: int
+
+
 class UserProfileBaseS(BaseModel):
     user_id: int
     identity_id: str
@@ -15,6 +15,7 @@ from sqlalchemy.orm import sessionmaker, selectinload
 from server.api.common import AsyncRedisHandler, get_async_redis_handler
 from server.core.enums import ChatRoomType, ChatHistoryType
 from server.core.utils import generate_random_string
+from server.crud import CRUDBase
 from server.crud.service import ChatRoomCRUD, ChatHistoryCRUD
 from server.crud.user import UserCRUD
 from server.db.databases import Base, settings, get_async_session
@@ -72,6 +73,7 @@ async def db_setup():
             yield
         finally:
             await conn.run_sync(Base.metadata.drop_all)
+            CRUDBase.invalidate()
 
 
 @pytest.fixture(scope='function')
@@ -0,0 +1,82 @@
+from server.core.utils import cache
+from server.core.utils.cache import TTLCache
+from server.models import S3Media
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_캐시만료(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, 'monotonic', clock)
+
+    ttl_cache = TTLCache(maxsize=10, ttl=10)
+    ttl_cache.set('default', 1)
+    ttl_cache.set('short', 2, ttl=5)
+    ttl_cache.set('ignored', 3, ttl=0)
+    assert 'ignored' not in ttl_cache
+
+    clock.now += 5
+    assert ttl_cache.get('default') == 1
+    assert ttl_cache.get('short') is None
+    assert len(ttl_cache) == 1
+
+    clock.now += 5
+    assert ttl_cache.get('default') is None
+    assert len(ttl_cache) == 0
+
+
+def test_캐시크기제한():
+    ttl_cache = TTLCache(maxsize=2, ttl=60)
+    ttl_cache.set('a', 1)
+    ttl_cache.set('b', 2)
+
+    # 최근 조회한 항목은 유지하고, 가장 오래 사용하지 않은 항목부터 삭제
+    assert ttl_cache.get('a') == 1
+    ttl_cache.set('c', 3)
+    assert 'b' not in ttl_cache
+    assert ttl_cache.get('a') == 1
+    assert ttl_cache.get('c') == 3
+    assert len(ttl_cache) == 2
+
+
+async def test_presigned_url_캐시(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, 'monotonic', clock)
+    monkeypatch.setattr(S3Media, 'presigned_url_cache', TTLCache(maxsize=10, ttl=60))
+
+    signed = []
+
+    class S3Client:
+        def generate_presigned_url(self, method, Params, ExpiresIn):
+            signed.append(Params['Key'])
+            return f"https://s3/{Params['Key']}?v={len(signed)}"
+
+    monkeypatch.setattr(S3Media, 'get_s3_client', classmethod(lambda cls, *args: S3Client()))
+
+    media = [
+        S3Media(id=1, bucket_name='bucket', filepath='a.png'),
+        S3Media(id=2, bucket_name='bucket', filepath='b.png'),
+        S3Media(id=3, bucket_name='bucket', filepath='a.png'),
+    ]
+    first = await S3Media.asynchronous_presigned_url(*media)
+    assert [u['id'] for u in first] == [1, 2, 3]
+    assert first[0]['url'] == first[2]['url']
+    assert signed == ['a.png', 'b.png']
+
+    # 만료 여유 시간 전에는 캐시된 URL 반환
+    clock.now += S3Media.presigned_url_expiration - S3Media.presigned_url_margin - 1
+    assert await S3Media.asynchronous_presigned_url(*media) == first
+    assert len(signed) == 2
+
+    # 이후에는 다시 서명
+    clock.now += 1
+    second = await S3Media.asynchronous_presigned_url(*media[:1])
+    assert second[0]['url'] != first[0]['url']
+    assert signed == ['a.png', 'b.png', 'a.png']
@@ -1,15 +1,22 @@
 import base64
+import hashlib
 import mimetypes
 import os
 import random
 from typing import List
 
+from PIL import Image
+from starlette import status
+
 from server.api.websocket.chat.decorator import ChatHandlerDecorator
-from server.core.enums import ChatType
+from server.api.websocket.chat.file import FileHandler
+from server.api.websocket.chat.media import MediaJobWorker
+from server.core.enums import ChatType, ChatHistoryType, MediaJobStatus
 from server.core.externals.redis.schemas import RedisChatHistoryByRoomS, \
-    RedisChatHistoryFileS
-from server.crud.service import ChatRoomUserAssociationCRUD, ChatRoomCRUD
-from server.models import User, ChatRoom, UserProfile
+    RedisChatHistoryFileS, RedisMediaJobS, RedisMediaJobsInProgressS
+from server.crud.service import ChatRoomUserAssociationCRUD, ChatRoomCRUD, ChatHistoryCRUD
+from server.db.databases import settings
+from server.models import User, ChatRoom, UserProfile, ChatHistory, ChatHistoryFile
 from server.schemas.chat import ChatReceiveFormS, ChatReceiveDataS, ChatReceiveFileS
 from server.tests.conftest import create_test_user_db, create_test_room_db
 
@@ -71,8 +78,237 @@ async def test_파일전송(db_setup, db_session, redis_handler, s3_client, s3_b
         room_redis=room_redis
     )
 
+    assert history.status == MediaJobStatus.PENDING.name.lower()
+    assert len(history.files) == 0
+
+    # 워커에서 업로드 처리
+    worker = MediaJobWorker(redis_handler)
+    job: RedisMediaJobS = await worker.fetch(timeout=1)
+    history: RedisChatHistoryByRoomS = await worker.process(job)
+
+    assert history.status == MediaJobStatus.READY.name.lower()
     assert len(history.files) > 0
     assert isinstance(history.files[0], RedisChatHistoryFileS)
     assert history.files[0].content_type == content_type
     assert history.files[0].filename == filename
     assert history.is_active is True
+
+
+async def test_중복파일전송(db_setup, db_session, redis_handler, s3_client, s3_bucket):
+    crud_room = ChatRoomCRUD(db_session)
+    crud_room_user_mapping = ChatRoomUserAssociationCRUD(db_session)
+
+    user: User = await create_test_user_db(db_session)
+    room: ChatRoom = await create_test_room_db(db_session)
+    user_profile: UserProfile = user.profiles[0]
+    await crud_room_user_mapping.bulk_create([dict(room_id=room.id, user_profile_id=user_profile.id)])
+    await db_session.commit()
+
+    user_profiles_redis, _ = await redis_handler.sync_user_profiles_in_room(
+        room.id, user_profile.id, crud_room_user_mapping, raise_exception=True
+    )
+    room_redis, _ = await redis_handler.sync_room(room.id, crud_room)
+
+    with open('./static/images/potato.png', 'rb') as f:
+        filename = os.path.basename(f.name)
+        content_type, _ = mimetypes.guess_type(filename)
+        content = base64.b64encode(f.read())
+
+    worker = MediaJobWorker(redis_handler)
+    histories: List[RedisChatHistoryByRoomS] = []
+    for _ in range(2):
+        receive = ChatReceiveFormS(
+            type=ChatType.FILE.name.lower(),
+            data=ChatReceiveDataS(
+                files=[ChatReceiveFileS(content=content, content_type=content_type, filename=filename)]
+            ))
+        await ChatHandlerDecorator(receive, db_session).execute(
+            redis_handler=redis_handler,
+            user_profile_id=user_profile.id,
+            user_profiles_redis=user_profiles_redis,
+            room_id=room.id,
+            room_redis=room_redis
+        )
+        histories.append(await worker.process(await worker.fetch(timeout=1)))
+
+    first, second = histories[0].files[0], histories[1].files[0]
+    assert first.id != second.id
+    assert first.filepath == second.filepath
+    assert len(s3_client.list_objects_v2(Bucket=settings.aws_storage_bucket_name)['Contents']) == 1
+
+
+async def test_파일전송작업복구(db_setup, db_session, redis_handler, s3_client, s3_bucket):
+    crud_room = ChatRoomCRUD(db_session)
+    crud_room_user_mapping = ChatRoomUserAssociationCRUD(db_session)
+
+    user: User = await create_test_user_db(db_session)
+    room: ChatRoom = await create_test_room_db(db_session)
+    user_profile: UserProfile = user.profiles[0]
+    await crud_room_user_mapping.bulk_create([dict(room_id=room.id, user_profile_id=user_profile.id)])
+    await db_session.commit()
+
+    user_profiles_redis, _ = await redis_handler.sync_user_profiles_in_room(
+        room.id, user_profile.id, crud_room_user_mapping, raise_exception=True
+    )
+    room_redis, _ = await redis_handler.sync_room(room.id, crud_room)
+
+    with open('./static/images/potato.png', 'rb') as f:
+        filename = os.path.basename(f.name)
+        content_type, _ = mimetypes.guess_type(filename)
+        content = f.read()
+
+    receive = ChatReceiveFormS(
+        type=ChatType.FILE.name.lower(),
+        data=ChatReceiveDataS(
+            files=[ChatReceiveFileS(content=base64.b64encode(content), content_type=content_type, filename=filename)]
+        ))
+    await ChatHandlerDecorator(receive, db_session).execute(
+        redis_handler=redis_handler,
+        user_profile_id=user_profile.id,
+        user_profiles_redis=user_profiles_redis,
+        room_id=room.id,
+        room_redis=room_redis
+    )
+
+    def list_keys() -> List[str]:
+        return [o['Key'] for o in s3_client.list_objects_v2(Bucket=settings.aws_storage_bucket_name)['Contents']]
+
+    # 작업에는 파일 내용 대신 S3 임시 저장 키만 저장
+    worker = MediaJobWorker(redis_handler)
+    job: RedisMediaJobS = await worker.fetch(timeout=1)
+    assert [f.key for f in job.files] == [f'{MediaJobWorker.staging_root}{job.id}/0/{filename}']
+    assert list_keys() == [job.files[0].key]
+
+    # 처리 중 종료된 작업은 대기 큐로 이동
+    assert await MediaJobWorker.recover() == 1
+    assert await RedisMediaJobsInProgressS.llen(await redis_handler.redis, None) == 0
+    recovered: RedisMediaJobS = await worker.fetch(timeout=1)
+    assert recovered.id == job.id
+
+    history: RedisChatHistoryByRoomS = await worker.process(recovered)
+    assert history.status == MediaJobStatus.READY.name.lower()
+    assert not any(k.startswith(MediaJobWorker.staging_root) for k in list_keys())
+
+    # 다시 처리되는 작업은 저장된 파일 재사용
+    replayed: RedisChatHistoryByRoomS = await worker.process(job)
+    assert [f.id for f in replayed.files] == [f.id for f in history.files]
+
+
+async def test_파일직접업로드(db_setup, db_session, redis_handler, s3_client, s3_bucket):
+    crud_room_user_mapping = ChatRoomUserAssociationCRUD(db_session)
+
+    user: User = await create_test_user_db(db_session)
+    room: ChatRoom = await create_test_room_db(db_session)
+    user_profile: UserProfile = user.profiles[0]
+    await crud_room_user_mapping.bulk_create([dict(room_id=room.id, user_profile_id=user_profile.id)])
+
+    chat_history_db: ChatHistory = await ChatHistoryCRUD(db_session).create(
+        redis_id='presigned', room_id=room.id, user_profile_id=user_profile.id,
+        type=ChatHistoryType.FILE, is_active=False
+    )
+    await db_session.flush()
+    await db_session.refresh(chat_history_db)
+
+    with open('./static/images/potato.png', 'rb') as f:
+        filename = os.path.basename(f.name)
+        content_type, _ = mimetypes.guess_type(filename)
+        content = f.read()
+
+    chat_file_db: ChatHistoryFile = await ChatHistoryFile.new_presigned(
+        db_session, filename, content_type, root='chat_upload/', uploaded_by_id=user_profile.id,
+        bucket_name=settings.aws_storage_bucket_name, chat_history_id=chat_history_db.id, order=1
+    )
+    db_session.add(chat_file_db)
+    await db_session.commit()
+    assert chat_file_db.is_active is False
+
+    # 클라이언트 업로드
+    post = chat_file_db.presigned_post()
+    assert post['fields']['key'] == chat_file_db.filepath
+    s3_client.put_object(
+        Bucket=settings.aws_storage_bucket_name, Key=chat_file_db.filepath, Body=content, ContentType=content_type
+    )
+
+    history: RedisChatHistoryByRoomS = await FileHandler.confirm_presigned(
+        redis_handler, db_session, room.id, chat_history_db.id, user_profile.id
+    )
+
+    assert history.is_active is True
+    assert [f.filename for f in history.files] == [filename, filename]
+    assert history.files[0].content_type == content_type
+    await db_session.refresh(chat_file_db)
+    assert chat_file_db.is_active is True
+    assert chat_file_db.content_hash == hashlib.sha256(content).hexdigest()
+    # 원본, 썸네일
+    root = chat_file_db.filepath[:-len(filename)]
+    keys = [o['Key'] for o in s3_client.list_objects_v2(Bucket=settings.aws_storage_bucket_name)['Contents']]
+    assert sorted(keys) == sorted([chat_file_db.filepath, f'{root}thumbnail/{filename}'])
+
+
+async def test_이미지변형(s3_client, s3_bucket):
+    with open('./static/images/potato.png', 'rb') as f:
+        filename = os.path.basename(f.name)
+        content_type, _ = mimetypes.guess_type(filename)
+        content = f.read()
+
+    chat_file = ChatHistoryFile(
+        id=1, uid='variant', filename=filename, filepath=f'media/chat_upload/1/variant/{filename}',
+        content_type=content_type, bucket_name=settings.aws_storage_bucket_name
+    )
+    s3_client.put_object(
+        Bucket=chat_file.bucket_name, Key=chat_file.filepath, Body=content, ContentType=content_type
+    )
+
+    for webp in (False, True):
+        variant: ChatHistoryFile = chat_file.generate_variant('avatar', webp=webp)
+        obj = s3_client.get_object(Bucket=variant.bucket_name, Key=variant.filepath)
+        im = Image.open(obj['Body'])
+        assert max(im.size) <= ChatHistoryFile.variant_sizes['avatar']
+        assert obj['ContentType'] == ('image/webp' if webp else content_type)
+
+    # 생성된 변형본 재사용
+    assert chat_file.generate_variant('avatar', webp=True).filepath == variant.filepath
+    assert len(s3_client.list_objects_v2(Bucket=settings.aws_storage_bucket_name)['Contents']) == 3
+
+
+async def test_이미지변형권한(db_setup, db_session, redis_handler, client, s3_client, s3_bucket):
+    member: User = await create_test_user_db(
+        db_session, email='test_member@test.com', name='member', mobile='01033333333', password='test'
+    )
+    await create_test_user_db(
+        db_session, email='test_other@test.com', name='other', mobile='01044444444', password='test'
+    )
+    room: ChatRoom = await create_test_room_db(db_session)
+    await ChatRoomUserAssociationCRUD(db_session).bulk_create([
+        dict(room_id=room.id, user_profile_id=member.profiles[0].id)
+    ])
+    chat_history_db: ChatHistory = await ChatHistoryCRUD(db_session).create(
+        redis_id='variant', room_id=room.id, user_profile_id=member.profiles[0].id, type=ChatHistoryType.FILE
+    )
+    await db_session.flush()
+
+    with open('./static/images/potato.png', 'rb') as f:
+        filename = os.path.basename(f.name)
+        content_type, _ = mimetypes.guess_type(filename)
+        chat_file_db: ChatHistoryFile = await ChatHistoryFile.new_presigned(
+            db_session, filename, content_type, root='chat_upload/', uploaded_by_id=member.profiles[0].id,
+            bucket_name=settings.aws_storage_bucket_name, chat_history_id=chat_history_db.id, order=1
+        )
+        s3_client.put_object(
+            Bucket=chat_file_db.bucket_name, Key=chat_file_db.filepath, Body=f.read(), ContentType=content_type
+        )
+    chat_file_db.is_active = True
+    db_session.add(chat_file_db)
+    await db_session.commit()
+
+    url = f'/services/media/{chat_file_db.id}/variants/avatar'
+
+    # 대화방에 참여하지 않은 유저는 조회 불가
+    response = await client.post('/users/login', json={'uid': 'test_other@test.com', 'password': 'test'})
+    assert response.status_code == status.HTTP_200_OK
+    assert (await client.get(url)).status_code == status.HTTP_404_NOT_FOUND
+    assert (await client.get('/services/metrics')).status_code == status.HTTP_403_FORBIDDEN
+
+    response = await client.post('/users/login', json={'uid': 'test_member@test.com', 'password': 'test'})
+    assert response.status_code == status.HTTP_200_OK
+    assert (await client.get(url)).status_code == status.HTTP_307_TEMPORARY_REDIRECT
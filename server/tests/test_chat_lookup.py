@@ -1,18 +1,27 @@
+import io
+import json
 import logging
 import uuid
+import zipfile
 from datetime import datetime, timedelta
 from typing import List
 
 from sqlalchemy.orm import selectinload, joinedload
 
+from server.api.export import ChatHistoryExporter
+from server.api.websocket.chat.retention import ChatHistoryEvictionWorker
 from server.api.websocket.chat.decorator import ChatHandlerDecorator
 from server.core.enums import ChatType, ChatHistoryType
-from server.core.externals.redis.schemas import RedisChatHistoryByRoomS, RedisChatHistoriesByRoomS
-from server.crud.service import ChatRoomCRUD, ChatHistoryCRUD
+from server.core.externals.redis.schemas import (
+    RedisChatHistoryByRoomS, RedisChatHistoriesByRoomS, RedisChatRoomsByAccessS, RedisChatRoomInfoS,
+    RedisChatRoomByUserProfileS
+)
+from server.crud.service import ChatRoomCRUD, ChatHistoryCRUD, ChatRoomReadCursorCRUD
 from server.crud.user import UserProfileCRUD
-from server.models import ChatRoom, UserProfile, ChatHistory
+from server.db.databases import settings
+from server.models import ChatRoom, UserProfile, ChatHistory, ChatRoomReadCursor
 from server.schemas.chat import ChatReceiveFormS, ChatReceiveDataS
-from server.tests.conftest import create_test_user_db, create_test_room_db
+from server.tests.conftest import create_test_user_db, create_test_room_db, test_async_session
 
 logger = logging.getLogger('test')
 
@@ -62,7 +71,6 @@ async def test_메시지조회(db_setup, db_session, redis_handler):
     histories_db: List[ChatHistory] = await crud_chat_history.list(
         order_by=(ChatHistory.created.asc(),),
         options=[
-            selectinload(ChatHistory.user_profile_mapping),
             selectinload(ChatHistory.files),
             joinedload(ChatHistory.user_profile)
             .selectinload(UserProfile.images),
@@ -115,3 +123,192 @@ async def test_메시지조회(db_setup, db_session, redis_handler):
         assert h.date == histories_origin[i].date
         assert h.timestamp == histories_origin[i].timestamp
         assert h.contents == histories_origin[i].contents
+
+    # 첫 페이지 조회 시, 가장 최근 내역까지 읽음 위치 갱신
+    read_cursor: ChatRoomReadCursor = await ChatRoomReadCursorCRUD(db_session).get(
+        conditions=(
+            ChatRoomReadCursor.room_id == room.id,
+            ChatRoomReadCursor.user_profile_id == user_profile.id
+        )
+    )
+    assert read_cursor.last_read_id == histories_db[-1].id
+
+
+async def test_대화내보내기(db_setup, db_session, redis_handler, monkeypatch):
+    now = datetime.now().astimezone()
+    monkeypatch.setattr(ChatHistoryExporter, 'batch_size', 7)
+
+    await create_test_user_db(db_session)
+    await create_test_room_db(db_session)
+    await db_session.commit()
+
+    crud_chat_history = ChatHistoryCRUD(db_session)
+    await crud_chat_history.bulk_create([
+        dict(
+            redis_id=uuid.uuid4().hex,
+            user_profile_id=1,
+            room_id=1,
+            contents=f'message_{i}',
+            type=ChatHistoryType.MESSAGE,
+            created=now + timedelta(seconds=i),
+        ) for i in range(30)
+    ])
+    histories_db: List[ChatHistory] = await crud_chat_history.list(
+        conditions=(ChatHistory.room_id == 1,),
+        order_by=(ChatHistory.created.asc(),),
+        options=[selectinload(ChatHistory.files)]
+    )
+
+    # 최근 10건은 DB 와 Redis 모두, 이후 5건은 Redis 에만 존재
+    histories_redis = [
+        await RedisChatHistoryByRoomS.from_model(m) for m in histories_db[-10:]
+    ] + [
+        RedisChatHistoryByRoomS(
+            redis_id=uuid.uuid4().hex,
+            user_profile_id=1,
+            contents=f'message_{i}',
+            type=ChatHistoryType.MESSAGE.name.lower(),
+            timestamp=(now + timedelta(seconds=i)).timestamp(),
+            date=now.date().isoformat(),
+            is_active=True
+        ) for i in range(30, 35)
+    ]
+    await RedisChatHistoriesByRoomS.zadd(await redis_handler.redis, 1, histories_redis)
+
+    exporter = ChatHistoryExporter(redis_handler, db_session, 1)
+    lines = b''.join([chunk async for chunk in exporter.ndjson()]).decode().splitlines()
+    assert [json.loads(line)['contents'] for line in lines] == [f'message_{i}' for i in range(35)]
+
+    archive = zipfile.ZipFile(io.BytesIO(b''.join([chunk async for chunk in exporter.zip()])))
+    assert archive.read('room_1/histories.ndjson').decode().splitlines() == lines
+    assert json.loads(archive.read('room_1/manifest.json'))['count'] == 35
+
+
+async def test_대화내역유지범위(db_setup, db_session, redis_handler, monkeypatch):
+    monkeypatch.setattr(settings, 'redis_history_max_count', 5)
+    monkeypatch.setattr(settings, 'redis_history_trim_slack', 2)
+    monkeypatch.setattr('server.api.common.async_session', test_async_session)
+    now = datetime.now().astimezone()
+
+    await create_test_user_db(db_session)
+    await create_test_room_db(db_session)
+    await db_session.commit()
+
+    redis = await redis_handler.redis
+    crud_chat_history = ChatHistoryCRUD(db_session)
+
+    # Redis 에만 기록되는 메시지 추가 시, 유지 범위를 넘은 내역이 slack 보다 많아지면 모아서 DB 저장 후 삭제
+    for i in range(8):
+        if i == 7:
+            assert await RedisChatHistoriesByRoomS.zcard(redis, 1) == 7
+        await redis_handler.add_histories_by_room(1, RedisChatHistoryByRoomS(
+            redis_id=uuid.uuid4().hex,
+            user_profile_id=1,
+            contents=f'message_{i}',
+            type=ChatHistoryType.MESSAGE.name.lower(),
+            timestamp=(now + timedelta(seconds=i)).timestamp(),
+            date=now.date().isoformat(),
+            is_active=True
+        ), db_session)
+
+    histories_redis: List[RedisChatHistoryByRoomS] = await RedisChatHistoriesByRoomS.zrange(redis, 1)
+    assert [h.contents for h in histories_redis] == [f'message_{i}' for i in range(3, 8)]
+    histories_db: List[ChatHistory] = await crud_chat_history.list(
+        conditions=(ChatHistory.room_id == 1,), order_by=(ChatHistory.created.asc(),), use_cache=False
+    )
+    assert [h.contents for h in histories_db] == [f'message_{i}' for i in range(3)]
+
+    # 유휴 대화방은 남은 내역의 DB 저장 확인 후 Redis 에서 삭제
+    last_access: float = await RedisChatRoomsByAccessS.zscore(redis, None, 1)
+    assert await redis_handler.evict_histories_by_room(1, last_access) is True
+    assert await RedisChatHistoriesByRoomS.zcard(redis, 1) == 0
+    assert await RedisChatRoomsByAccessS.zscore(redis, None, 1) is None
+    assert len(await crud_chat_history.list(conditions=(ChatHistory.room_id == 1,), use_cache=False)) == 8
+
+    # 다시 조회 시, DB 에서 최근 내역을 복원하고 이전 내역은 DB 에서 이어서 조회
+    receive = ChatReceiveFormS(
+        type=ChatType.LOOKUP.name.lower(),
+        data=ChatReceiveDataS(offset=0, limit=10)
+    )
+    histories: List[RedisChatHistoryByRoomS] = await ChatHandlerDecorator(receive, db_session).execute(
+        redis_handler=redis_handler,
+        user_profile_id=1,
+        room_id=1,
+        room_redis=RedisChatRoomInfoS(id=1, type='public'),
+        room_by_profile_redis=RedisChatRoomByUserProfileS(id=1, unread_msg_cnt=0, timestamp=now.timestamp())
+    )
+    assert [h.contents for h in histories] == [f'message_{i}' for i in range(8)]
+    assert await RedisChatHistoriesByRoomS.zcard(redis, 1) == 5
+    assert await RedisChatRoomsByAccessS.zscore(redis, None, 1) is not None
+
+
+async def test_메시지조회초단위경계(db_setup, db_session, redis_handler):
+    now = datetime.now().astimezone().replace(microsecond=0)
+
+    await create_test_user_db(db_session)
+    await create_test_room_db(db_session)
+    await db_session.commit()
+
+    # 같은 초에 저장된 내역 (DB 생성 시각은 초 단위)
+    crud_chat_history = ChatHistoryCRUD(db_session)
+    await crud_chat_history.bulk_create([
+        dict(
+            redis_id=uuid.uuid4().hex,
+            user_profile_id=1,
+            room_id=1,
+            contents=f'message_{i}',
+            type=ChatHistoryType.MESSAGE,
+            created=now,
+        ) for i in range(3)
+    ])
+    histories_db: List[ChatHistory] = await crud_chat_history.list(
+        conditions=(ChatHistory.room_id == 1,),
+        order_by=(ChatHistory.id.asc(),),
+        options=[selectinload(ChatHistory.files)]
+    )
+
+    # 이후 2건은 Redis 에도 존재 (Redis 는 초 단위 이하 시각 유지), DB 에 저장되지 않은 내역이 가장 오래된 내역
+    unsaved = RedisChatHistoryByRoomS(
+        redis_id=uuid.uuid4().hex,
+        user_profile_id=1,
+        contents='unsaved',
+        type=ChatHistoryType.MESSAGE.name.lower(),
+        timestamp=now.timestamp() + 0.05,
+        date=now.date().isoformat(),
+        is_active=True
+    )
+    redis = await redis_handler.redis
+    await RedisChatHistoriesByRoomS.zadd(redis, 1, [unsaved] + [
+        (await RedisChatHistoryByRoomS.from_model(m)).copy(update={'timestamp': now.timestamp() + 0.1 * (i + 1)})
+        for i, m in enumerate(histories_db[1:])
+    ])
+
+    async def lookup() -> List[str]:
+        receive = ChatReceiveFormS(
+            type=ChatType.LOOKUP.name.lower(),
+            data=ChatReceiveDataS(offset=0, limit=10)
+        )
+        histories: List[RedisChatHistoryByRoomS] = await ChatHandlerDecorator(receive, db_session).execute(
+            redis_handler=redis_handler,
+            user_profile_id=1,
+            room_id=1,
+            room_redis=RedisChatRoomInfoS(id=1, type='public'),
+            room_by_profile_redis=RedisChatRoomByUserProfileS(id=1, unread_msg_cnt=0, timestamp=now.timestamp())
+        )
+        return [h.contents for h in histories]
+
+    # Redis 에 있는 내역은 DB 에서 다시 조회하지 않음
+    assert await lookup() == ['message_0', 'unsaved', 'message_1', 'message_2']
+
+    # 가장 오래된 내역이 DB 에 저장된 경우, (생성 시각, ID) 이전 내역만 조회
+    await RedisChatHistoriesByRoomS.zrem(redis, 1, unsaved)
+    assert await lookup() == ['message_0', 'message_1', 'message_2']
+
+
+async def test_대화내역삭제단일실행(redis_handler):
+    worker = ChatHistoryEvictionWorker(redis_handler)
+
+    # 다른 프로세스가 삭제 중인 (잠금을 보유한) 동안은 생략
+    async with await redis_handler.lock(key=RedisChatRoomsByAccessS.get_lock_key()):
+        assert await worker.evict_exclusive() is None
+    assert await worker.evict_exclusive() == 0
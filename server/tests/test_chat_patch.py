@@ -25,7 +25,6 @@ async def test_메시지업데이트(db_setup, db_session, redis_handler):
 
     histories: List[ChatHistory] = await crud_chat_history.list(
         options=[
-            selectinload(ChatHistory.user_profile_mapping),
             selectinload(ChatHistory.files)
         ]
     )
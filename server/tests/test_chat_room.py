@@ -0,0 +1,60 @@
+from starlette import status
+
+from server.api.v1.chat import get_direct_room
+from server.core.enums import ChatRoomType
+from server.core.externals.redis.schemas import RedisDirectRoomByMemberKeyS
+from server.crud.service import ChatRoomCRUD
+from server.models import ChatRoom, User
+from server.tests.conftest import create_test_user_db
+
+
+async def test_1대1대화방조회(db_setup, db_session, redis_handler):
+    crud_room = ChatRoomCRUD(db_session)
+
+    user1: User = await create_test_user_db(db_session, email='test1@test.com', mobile='01011111111')
+    user2: User = await create_test_user_db(db_session, email='test2@test.com', mobile='01022222222')
+    profile_ids = {user1.profiles[0].id, user2.profiles[0].id}
+
+    # 구성원 순서와 무관하게 동일한 키
+    member_key: str = ChatRoom.generate_member_key(profile_ids)
+    assert member_key == ChatRoom.generate_member_key(reversed(sorted(profile_ids)))
+
+    assert await get_direct_room(member_key, crud_room, redis_handler) is None
+
+    room: ChatRoom = await crud_room.create(type=ChatRoomType.PRIVATE, member_key=member_key)
+    await db_session.commit()
+
+    found: ChatRoom = await get_direct_room(member_key, crud_room, redis_handler)
+    assert found.id == room.id
+    assert (await RedisDirectRoomByMemberKeyS.get(await redis_handler.redis, member_key)).id == room.id
+
+    # 비활성화 된 방은 조회되지 않으며, Redis 키도 제거
+    room.is_active = False
+    await db_session.commit()
+    assert await get_direct_room(member_key, crud_room, redis_handler) is None
+    assert await RedisDirectRoomByMemberKeyS.get(await redis_handler.redis, member_key) is None
+
+
+async def test_1대1대화방생성충돌(db_setup, db_session, redis_handler, client):
+    crud_room = ChatRoomCRUD(db_session)
+
+    user1: User = await create_test_user_db(
+        db_session, email='test1@test.com', mobile='01011111111', password='test_direct'
+    )
+    user2: User = await create_test_user_db(db_session, email='test2@test.com', mobile='01022222222')
+    profile_ids = {user1.profiles[0].id, user2.profiles[0].id}
+
+    # 같은 구성원 키의 비활성화 된 방이 있어 새로 생성할 수 없는 경우
+    await crud_room.create(
+        type=ChatRoomType.PRIVATE, member_key=ChatRoom.generate_member_key(profile_ids), is_active=False
+    )
+    await db_session.commit()
+
+    response = await client.post('/users/login', json={'uid': 'test1@test.com', 'password': 'test_direct'})
+    assert response.status_code == status.HTTP_200_OK
+    response = await client.post('/chats/rooms/create', json={
+        'user_profile_id': user1.profiles[0].id,
+        'target_profile_ids': [user2.profiles[0].id],
+        'type': ChatRoomType.PRIVATE.value
+    })
+    assert response.status_code == status.HTTP_409_CONFLICT
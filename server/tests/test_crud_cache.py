@@ -0,0 +1,101 @@
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import configure_mappers, sessionmaker, selectinload
+
+from server.core.metrics import metrics
+from server.crud import CRUDBase
+from server.crud.service import ChatRoomUserAssociationCRUD
+from server.crud.user import UserProfileCRUD, UserSessionCRUD
+from server.db.databases import Base
+from server.models import UserProfile, UserRelationship
+
+
+@pytest.fixture
+async def sqlite_session(tmp_path):
+    engine = create_async_engine(f'sqlite+aiosqlite:///{tmp_path}/cache.db', future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[UserProfile.__table__, UserRelationship.__table__])
+    try:
+        yield sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    finally:
+        CRUDBase.invalidate()
+        await engine.dispose()
+
+
+async def test_조회캐시(sqlite_session):
+    conditions = (UserProfile.id == 1, UserProfile.is_active == 1)
+
+    async with sqlite_session() as session:
+        session.add(UserProfile(id=1, user_id=1, identity_id='cache', nickname='first'))
+        await session.commit()
+
+    async with sqlite_session() as session:
+        crud = UserProfileCRUD(session)
+        hits = metrics.counter_value('cache', cache=crud.cache.name, result='hit')
+
+        profile: UserProfile = await crud.get(conditions=conditions)
+        profile: UserProfile = await crud.get(conditions=conditions)
+        assert metrics.counter_value('cache', cache=crud.cache.name, result='hit') == hits + 1
+        assert profile in session
+        assert profile.nickname == 'first'
+
+        # CRUD 업데이트 시 캐시 초기화
+        await crud.update(conditions=(UserProfile.id == 1,), nickname='second')
+        await session.commit()
+        assert len(crud.cache) == 0
+
+    async with sqlite_session() as session:
+        crud = UserProfileCRUD(session)
+        profile: UserProfile = await crud.get(conditions=conditions)
+        assert profile.nickname == 'second'
+
+        # ORM flush 시 캐시 초기화
+        profile.nickname = 'third'
+        await session.commit()
+        assert len(crud.cache) == 0
+        profile: UserProfile = await crud.get(conditions=conditions, use_cache=False)
+        assert profile.nickname == 'third'
+
+
+async def test_조회캐시옵션(sqlite_session):
+    configure_mappers()
+    conditions = (UserProfile.id == 1,)
+    options = [selectinload(UserProfile.followers)]
+
+    async with sqlite_session() as session:
+        session.add_all([
+            UserProfile(id=1, user_id=1, identity_id='cache', nickname='me'),
+            UserProfile(id=2, user_id=2, identity_id='other', nickname='other'),
+            UserRelationship(id=1, my_profile_id=2, other_profile_id=1, other_profile_nickname='friend'),
+        ])
+        await session.commit()
+
+    async with sqlite_session() as session:
+        await UserProfileCRUD(session).get(conditions=conditions, options=options)
+
+    async with sqlite_session() as session:
+        crud = UserProfileCRUD(session)
+        hits = metrics.counter_value('cache', cache=crud.cache.name, result='hit')
+
+        # 옵션 없이 조회한 객체가 세션에 있는 상태에서, 옵션을 지정한 조회가 캐시에서 반환된 경우
+        plain: UserProfile = await crud.get(conditions=conditions)
+        profile: UserProfile = await crud.get(conditions=conditions, options=options)
+        assert profile is plain
+        assert metrics.counter_value('cache', cache=crud.cache.name, result='hit') == hits + 1
+
+        # 캐시 된 eager loading 속성이 세션의 객체에 채워져, 지연 로딩 없이 사용 가능
+        assert 'followers' not in inspect(profile).unloaded
+        assert profile.get_nickname_by_other(2) == 'friend'
+        assert profile not in session.dirty
+
+        # 세션에서 변경 중인 객체는 캐시 된 값으로 덮어쓰지 않음
+        profile.nickname = 'changed'
+        profile = await crud.get(conditions=conditions, options=options)
+        assert profile.nickname == 'changed'
+
+
+def test_권한조회캐시제외():
+    # 다른 프로세스의 나가기, 로그아웃이 반영되도록 권한 확인에 쓰는 CRUD 는 캐시하지 않음
+    assert ChatRoomUserAssociationCRUD.cache is None
+    assert UserSessionCRUD.cache is None
@@ -0,0 +1,79 @@
+import time
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from server.core.enums import ChatRoomType
+from server.core.metrics import metrics
+from server.crud.service import ChatRoomCRUD
+from server.db.databases import Base, observe_engine, last_write_context
+from server.models import ChatRoom
+
+
+@pytest.fixture
+async def routing_sessions(tmp_path):
+    # 주 DB 와 복제 DB 대신 각각의 SQLite 사용 (동일 id 의 이름으로 조회 대상 구분)
+    engines = {}
+    for name in ('primary', 'replica'):
+        engines[name] = create_async_engine(f'sqlite+aiosqlite:///{tmp_path / name}.db', future=True)
+        observe_engine(engines[name], f'test_{name}')
+        async with engines[name].begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=[ChatRoom.__table__])
+        async with AsyncSession(engines[name]) as session:
+            session.add(ChatRoom(id=1, name=name, type=ChatRoomType.PUBLIC))
+            await session.commit()
+
+    replica_session = sessionmaker(bind=engines['replica'], class_=AsyncSession, expire_on_commit=False)
+    primary_session = sessionmaker(
+        bind=engines['primary'], class_=AsyncSession, expire_on_commit=False,
+        info={'replica_session': replica_session, 'replica_auto_route': True, 'replica_sticky_seconds': 60}
+    )
+    yield primary_session
+    for e in engines.values():
+        await e.dispose()
+
+
+async def test_복제DB라우팅(routing_sessions):
+    async with routing_sessions() as session:
+        crud_room = ChatRoomCRUD(session)
+
+        room: ChatRoom = await crud_room.get(conditions=(ChatRoom.id == 1,), read_only=True)
+        assert room.name == 'replica'
+        room: ChatRoom = await crud_room.get(conditions=(ChatRoom.id == 1,), read_only=False)
+        assert room.name == 'primary'
+
+        # 자동 라우팅 조회 객체는 주 DB 세션에 연결되어, 변경 후 주 DB 에 커밋
+        session.expunge_all()
+        room: ChatRoom = await crud_room.get(conditions=(ChatRoom.id == 1,))
+        assert room.name == 'replica'
+        assert room in session
+        room.is_active = False
+
+        # 쓰기 트랜잭션 안의 조회는 주 DB
+        rooms = await crud_room.list(conditions=(ChatRoom.id == 1,))
+        assert rooms[0].is_active is False
+        await session.commit()
+
+        # 커밋 직후에는 자신의 쓰기 결과를 읽을 수 있도록 주 DB
+        rooms = await crud_room.list(conditions=(ChatRoom.id == 1,), with_only_columns=(ChatRoom.name,))
+        assert rooms[0].name == 'primary'
+        session.expunge_all()
+        rooms = await crud_room.list(conditions=(ChatRoom.id == 1,), read_only=True)
+        assert rooms[0].name == 'primary'
+        assert rooms[0].is_active is False
+
+    # 이전 요청의 쓰기 커밋 시각이 전달된 경우, 새 세션도 주 DB 로 조회
+    token = last_write_context.set({'last_write_at': time.time()})
+    try:
+        async with routing_sessions() as session:
+            room: ChatRoom = await ChatRoomCRUD(session).get(conditions=(ChatRoom.id == 1,), read_only=True)
+            assert room.name == 'primary'
+    finally:
+        last_write_context.reset(token)
+    async with routing_sessions() as session:
+        room: ChatRoom = await ChatRoomCRUD(session).get(conditions=(ChatRoom.id == 1,), read_only=True)
+        assert room.name == 'replica'
+
+    assert metrics.snapshot()['timings']['db_query_duration{engine=test_replica}']['count'] > 0
+    assert metrics.snapshot()['timings']['db_query_duration{engine=test_primary}']['count'] > 0
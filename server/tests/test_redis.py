@@ -0,0 +1,407 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime
+
+import aioredis
+import pytest
+from pydantic import ValidationError
+from redis.crc import key_slot
+
+from server.core.enums import ChatHistoryType
+from server.core.externals.redis import AioRedis, FailoverRedis, ReplicaRedis
+from server.core.externals.redis.keyspace import KeyspaceReport
+from server.core.externals.redis.lock import Redlock
+from server.core.externals.redis.schemas import (
+    RedisChatHistoryByRoomS, RedisChatHistoriesByRoomS, RedisInfoByRoomS, RedisUserProfilesByRoomS,
+    RedisChatRoomPubSubS, RedisChatRoomsByUserProfileS, RedisFollowingsByUserProfileS, RedisMediaJobsS,
+    RedisMediaJobsInProgressS, RedisUserImageFileS, RedisChatHistoryFileS, RedisUserSessionByIdS, RedisChatRoomInfoS,
+    RedisChatRoomsByAccessS
+)
+from server.core.metrics import metrics
+from server.db.databases import settings
+from server.tests.conftest import redis_endpoint
+
+
+async def test_주노드재탐색(redis_handler):
+    redis: FailoverRedis = await redis_handler.redis
+    manager: AioRedis = redis.manager
+    failovers = metrics.counter_value('redis_failover')
+
+    # 주 노드가 바뀐 상황 (연결할 수 없는 노드를 주 노드로 사용)
+    redis.master = 'redis://localhost:1'
+    redis.connection_pool = manager.create_pool(redis.master)
+
+    # 연결 오류 시, 주 노드 재탐색 후 재시도
+    await redis.set('failover', '1')
+    assert await redis.get('failover') == '1'
+    assert redis.master == redis_endpoint[0]
+    assert manager.topology['master'] == redis_endpoint[0]
+    assert metrics.counter_value('redis_failover') == failovers + 1
+
+
+async def test_연결오류재시도제한(redis_handler):
+    redis: FailoverRedis = await redis_handler.redis
+    manager: AioRedis = redis.manager
+    pool = redis.connection_pool
+
+    # 주 노드가 바뀌지 않은 연결 오류는 명령이 반영됐을 수 있으므로 재시도하지 않음
+    redis.connection_pool = manager.create_pool('redis://localhost:1')
+    try:
+        with pytest.raises(aioredis.ConnectionError):
+            await redis.incr('retry')
+    finally:
+        await redis.connection_pool.disconnect()
+        redis.connection_pool = pool
+    assert redis.master == redis_endpoint[0]
+    assert await redis.get('retry') is None
+
+
+async def test_전용연결(redis_handler):
+    redis: FailoverRedis = await redis_handler.redis
+    assert isinstance(redis.connection_pool, aioredis.BlockingConnectionPool)
+    assert redis.connection_pool.max_connections == settings.redis_max_connections
+
+    # 구독, 블로킹 명령은 명령용 연결 풀과 별도의 연결 풀 사용
+    pubsub = redis.pubsub()
+    assert pubsub.connection_pool is redis.dedicated.connection_pool
+    assert pubsub.connection_pool is not redis.connection_pool
+    await pubsub.subscribe('dedicated')
+    await redis.lpush('dedicated', '1')
+    assert await redis.brpoplpush('dedicated', 'dedicated:in_progress', timeout=1) == '1'
+    assert await redis.publish('dedicated', '1') == 1
+    await pubsub.reset()
+
+
+async def test_복제노드조회(redis_handler):
+    redis: FailoverRedis = await redis_handler.redis
+    manager: AioRedis = redis.manager
+    now = datetime.now().astimezone()
+
+    await RedisChatHistoriesByRoomS.zadd(redis, 1, RedisChatHistoryByRoomS(
+        redis_id=uuid.uuid4().hex,
+        user_profile_id=1,
+        contents='replica',
+        type=ChatHistoryType.MESSAGE.name.lower(),
+        timestamp=now.timestamp(),
+        date=now.date().isoformat(),
+        is_active=True
+    ))
+
+    # 연결할 수 없는 복제 노드인 경우, 주 노드로 조회
+    replica = ReplicaRedis(connection_pool=manager.create_pool('redis://localhost:1'))
+    replica.primary = redis
+    redis.replicas = [replica]
+    fallbacks = metrics.counter_value('redis_replica_fallback')
+    try:
+        histories = await RedisChatHistoriesByRoomS.zrange(redis, 1, stale_ok=True)
+        assert histories[0].contents == 'replica'
+        assert metrics.counter_value('redis_replica_fallback') == fallbacks + 1
+
+        # stale_ok 미지정 시, 주 노드로 조회
+        histories = await RedisChatHistoriesByRoomS.zrange(redis, 1)
+        assert histories[0].contents == 'replica'
+        assert metrics.counter_value('redis_replica_fallback') == fallbacks + 1
+    finally:
+        redis.replicas = []
+
+
+async def test_대화방복제노드조회(redis_handler):
+    redis: FailoverRedis = await redis_handler.redis
+    await RedisInfoByRoomS.hset(redis, 1, data=RedisChatRoomInfoS(id=1, type='public'))
+
+    # 같은 서버의 다른 DB 를 복제 노드로 사용 (복제 지연으로 이전 값이 남은 상황)
+    replica = ReplicaRedis(connection_pool=redis.manager.create_pool(f'{redis_endpoint[0]}/1'))
+    replica.primary = redis
+    await RedisInfoByRoomS.hset(replica, 1, data=RedisChatRoomInfoS(id=1, type='private'))
+    redis.replicas = [replica]
+    try:
+        # stale_ok 인 경우만 복제 노드에서 조회
+        room, _ = await redis_handler.sync_room(1, lock=False, stale_ok=True)
+        assert room.type == 'private'
+        room, _ = await redis_handler.sync_room(1, lock=False)
+        assert room.type == 'public'
+    finally:
+        redis.replicas = []
+        await replica.flushdb()
+        await replica.connection_pool.disconnect()
+
+
+async def test_자동파이프라인(redis_handler):
+    redis: FailoverRedis = await redis_handler.redis
+    batches = metrics.snapshot()['timings'].get('redis_auto_pipeline_batch', {}).get('count', 0)
+
+    redis.auto_pipeline = True
+    try:
+        # 동시에 보낸 명령은 하나의 파이프라인으로 전송
+        await asyncio.gather(*[redis.sadd('auto_pipeline', i) for i in range(100)])
+        results = await asyncio.gather(
+            *[redis.smembers('auto_pipeline') for _ in range(10)],
+            redis.incr('auto_pipeline'),
+            return_exceptions=True
+        )
+        assert all(len(r) == 100 for r in results[:10])
+        # 명령 오류는 해당 명령에만 전달
+        assert isinstance(results[10], aioredis.ResponseError)
+        assert metrics.snapshot()['timings']['redis_auto_pipeline_batch']['count'] == batches + 2
+
+        # 연결 오류 시 조회 명령만 개별 재시도, 그 외 명령은 중복 반영될 수 있으므로 오류 전달
+        redis.master = 'redis://localhost:1'
+        redis.connection_pool = redis.manager.create_pool(redis.master)
+        results = await asyncio.gather(
+            redis.incr('auto_pipeline_retry'), redis.smembers('auto_pipeline'), return_exceptions=True
+        )
+        assert isinstance(results[0], aioredis.ConnectionError)
+        assert len(results[1]) == 100
+        assert redis.master == redis_endpoint[0]
+        assert await redis.get('auto_pipeline_retry') is None
+    finally:
+        redis.auto_pipeline = False
+
+
+def test_클러스터키(monkeypatch):
+    monkeypatch.setattr(settings, 'redis_cluster', True)
+
+    # 대화방 단위 키는 같은 해시 슬롯
+    room_keys = [
+        RedisInfoByRoomS.get_key(1),
+        RedisUserProfilesByRoomS.get_key((1, 2)),
+        RedisChatHistoriesByRoomS.get_key(1),
+        RedisChatHistoriesByRoomS.get_lock_key(1),
+        RedisChatRoomPubSubS.get_key(1),
+    ]
+    assert room_keys[0] == '{room:1}:info'
+    assert room_keys[1] == '{room:1}:user_profile:2:user_profiles'
+    assert len({key_slot(k.encode()) for k in room_keys}) == 1
+
+    # 유저 단위 키, 작업 대기열 키도 각각 같은 해시 슬롯
+    assert key_slot(RedisChatRoomsByUserProfileS.get_key(1).encode()) == \
+        key_slot(RedisFollowingsByUserProfileS.get_key(1).encode())
+    assert key_slot(RedisMediaJobsS.get_key().encode()) == key_slot(RedisMediaJobsInProgressS.get_key().encode())
+    assert RedisMediaJobsS.get_key() == '{queue:media_jobs}'
+
+    # 유휴 대화방 삭제 잠금 키와 fencing token 키도 같은 해시 슬롯
+    lock_key: str = RedisChatRoomsByAccessS.get_lock_key()
+    assert lock_key == 'lock:{rooms:last_access}'
+    assert key_slot(lock_key.encode()) == key_slot(Redlock.get_fence_name(lock_key).encode())
+
+    monkeypatch.setattr(settings, 'redis_cluster', False)
+    assert RedisInfoByRoomS.get_key(1) == 'room:1:info'
+
+
+def test_값직렬화(monkeypatch):
+    now = datetime.now().astimezone()
+    history = RedisChatHistoryByRoomS(
+        redis_id=uuid.uuid4().hex,
+        user_profile_id=1,
+        contents='[1, 2]',
+        type=ChatHistoryType.MESSAGE.name.lower(),
+        timestamp=now.timestamp(),
+        date=now.date().isoformat(),
+        is_active=True
+    )
+
+    # 기존 JSON 값은 같은 형식으로 기록, 값 내부의 문자열은 역직렬화하지 않음
+    legacy = history.json()
+    assert RedisChatHistoriesByRoomS.get_value(history) == legacy
+    assert RedisChatHistoriesByRoomS.to_schema(RedisChatHistoriesByRoomS.decode([legacy])) == [history]
+
+    # 해시는 스키마 필드 타입에 따라 역직렬화 (기존 객체 목록 필드는 객체마다 JSON 문자열)
+    file = RedisUserImageFileS(
+        id=1, url='url', uid='uid', filename='a.png', filepath='a.png', content_type='image/png', use_type='origin',
+        is_active=True, user_profile_id=1, type='profile', is_default=True
+    )
+    info = RedisInfoByRoomS.to_schema(RedisInfoByRoomS.decode({
+        'id': '1', 'type': '1', 'user_profile_ids': '[1, 2]', 'user_profile_files': json.dumps([file.json()])
+    }))
+    assert info.type == '1' and info.user_profile_ids == [1, 2]
+    assert info.user_profile_files == [file]
+
+    for codec in ('orjson', 'msgpack'):
+        monkeypatch.setattr(settings, 'redis_codec', codec)
+        monkeypatch.setattr(settings, 'redis_compress_threshold', 100)
+        value = RedisChatHistoriesByRoomS.get_value(history)
+        # 연결 풀의 surrogateescape 디코딩 결과로 조회
+        response = value.decode('utf-8', 'surrogateescape')
+        assert RedisChatHistoriesByRoomS.to_schema(RedisChatHistoriesByRoomS.decode([response, legacy])) == \
+            [history, history]
+        # 값으로 삭제 시 기존 JSON 값도 포함
+        assert RedisChatHistoriesByRoomS.get_members([history]) == [value, legacy]
+
+
+async def test_센티널값직렬화(redis_handler, monkeypatch):
+    # Sentinel 이 테스트 Redis 를 주 노드로 반환하는 상황
+    host, port = AioRedis.get_address(redis_endpoint[0])
+    manager = AioRedis(endpoint=redis_endpoint, sentinel_endpoint=['redis://localhost:1'])
+
+    async def discover_master(service_name):
+        return host, port
+
+    async def discover_slaves(service_name):
+        return []
+
+    monkeypatch.setattr(manager.sentinel, 'discover_master', discover_master)
+    monkeypatch.setattr(manager.sentinel, 'discover_slaves', discover_slaves)
+    monkeypatch.setattr(settings, 'redis_codec', 'msgpack')
+    monkeypatch.setattr(settings, 'redis_compress_threshold', 10)
+
+    now = datetime.now().astimezone()
+    history = RedisChatHistoryByRoomS(
+        redis_id=uuid.uuid4().hex,
+        user_profile_id=1,
+        contents='sentinel' * 10,
+        type=ChatHistoryType.MESSAGE.name.lower(),
+        timestamp=now.timestamp(),
+        date=now.date().isoformat(),
+        is_active=True
+    )
+    redis: FailoverRedis = await manager.connect()
+    try:
+        # 압축된 바이너리 값을 주 노드, 복제 노드 연결 풀 모두 같은 값으로 조회
+        await RedisChatHistoriesByRoomS.zadd(redis, 1, history)
+        assert await RedisChatHistoriesByRoomS.zrange(redis, 1) == [history]
+        assert await RedisChatHistoriesByRoomS.zrange(redis, 1, stale_ok=True) == [history]
+        assert await RedisChatHistoriesByRoomS.zrem(redis, 1, history) == 1
+    finally:
+        manager._clients[asyncio.get_running_loop()].pop(manager.key)
+        for client in (redis, redis.dedicated, *redis.replicas):
+            await client.connection_pool.disconnect()
+
+
+def test_스키마생성():
+    now = datetime.now().astimezone()
+    file = RedisChatHistoryFileS(
+        id=1, url='url', uid='uid', filename='a.png', filepath='a.png', content_type='image/png', use_type='origin',
+        is_active=True, chat_history_id=1, order=0
+    )
+    history = RedisChatHistoryByRoomS(
+        redis_id=uuid.uuid4().hex,
+        user_profile_id=1,
+        type=ChatHistoryType.FILE.name.lower(),
+        files=[file],
+        timestamp=now.timestamp(),
+        date=now.date().isoformat(),
+        is_active=True
+    )
+
+    # 직접 기록한 값은 검증 없이 생성 (하위 스키마 포함)
+    histories = RedisChatHistoriesByRoomS.to_schema(RedisChatHistoriesByRoomS.decode([history.json()]))
+    assert histories == [history]
+    assert isinstance(histories[0].files[0], RedisChatHistoryFileS)
+    assert histories[0].read_user_ids == [] and histories[0].read_user_ids is not history.read_user_ids
+
+    # 필수 필드가 없는 값은 검증 오류
+    with pytest.raises(ValidationError):
+        RedisChatHistoriesByRoomS.to_schema([{'redis_id': 'a'}])
+
+    # 변환이 필요한 필드가 있는 스키마는 검증
+    session = RedisUserSessionByIdS.to_schema({
+        'id': 1, 'user_id': 1, 'session_id': 'a', 'expiry_at': now.isoformat(), 'created': now.isoformat(),
+        'updated': now.isoformat(), 'user': {
+            'id': 1, 'uid': 'a', 'name': 'a', 'mobile': 'a', 'email': 'a', 'is_superuser': False, 'is_staff': False,
+            'is_active': True, 'created': now.isoformat(), 'updated': now.isoformat()
+        }
+    })
+    assert session.expiry_at == now
+
+
+def test_부분조회():
+    now = datetime.now().astimezone()
+    history = RedisChatHistoryByRoomS(
+        redis_id=uuid.uuid4().hex,
+        user_profile_id=1,
+        contents='preview',
+        type=ChatHistoryType.FILE.name.lower(),
+        files=[RedisChatHistoryFileS(
+            id=1, url='url', uid='uid', filename='a.png', filepath='a.png', content_type='image/png',
+            use_type='origin', is_active=True, chat_history_id=1, order=0
+        )],
+        read_user_ids=[1, 2],
+        timestamp=now.timestamp(),
+        date=now.date().isoformat(),
+        is_active=True
+    )
+    raw = RedisChatHistoriesByRoomS.get_value(history)
+
+    # 지정한 필드만 생성
+    view = RedisChatHistoriesByRoomS.load([raw], fields=RedisChatHistoriesByRoomS.preview_fields)[0]
+    assert view.contents == 'preview' and view.timestamp == history.timestamp
+    with pytest.raises(AttributeError):
+        _ = view.files
+    assert RedisChatHistoryByRoomS(**view.dict()) == history.copy(update={'files': [], 'read_user_ids': []})
+
+    # 필드 접근 시 생성, 전체 스키마와 저장된 값 그대로 사용 가능
+    view = RedisChatHistoriesByRoomS.load([raw], lazy=True)[0]
+    assert view.read_user_ids == [1, 2]
+    assert view.files[0].url == 'url'
+    assert view.to_schema() == history
+    assert view.raw == raw
+
+
+async def test_키공간분석(redis_handler):
+    redis: FailoverRedis = await redis_handler.redis
+    for i in range(25):
+        await RedisInfoByRoomS.hset(redis, i, data=RedisChatRoomInfoS(id=i, type='public'))
+    await redis.set('other', '1')
+
+    # 첫 페이지만이 아닌 전체 키 순회
+    batches = [keys async for keys in RedisInfoByRoomS.scan_batches(redis, count=10)]
+    assert len(batches) > 1
+    assert sorted(k for keys in batches for k in keys) == sorted(RedisInfoByRoomS.get_key(i) for i in range(25))
+
+    rows = [json.loads(line) async for line in KeyspaceReport(redis, count=10, sample_rate=0.5, top=3).ndjson()]
+    families = {r['family']: r for r in rows if r['type'] == 'family'}
+    assert rows[0]['type'] == 'progress'
+    assert families['room:*:info']['count'] == 25
+    assert 0 < families['room:*:info']['sampled'] < 25
+    assert len(families['room:*:info']['largest']) == 3
+    assert families['other']['count'] == 1
+    assert rows[-1]['count'] == 26
+    assert rows[-1]['estimated_memory_bytes'] == sum(f['estimated_memory_bytes'] for f in families.values())
+
+
+async def test_레드락(redis_handler):
+    # 같은 서버의 서로 다른 DB 를 독립된 노드로 사용 (1개 노드는 연결 불가)
+    nodes = [
+        aioredis.Redis.from_url(redis_endpoint[0], db=1, decode_responses=True),
+        aioredis.Redis.from_url(redis_endpoint[0], db=2, decode_responses=True),
+        aioredis.Redis.from_url('redis://localhost:1', decode_responses=True),
+    ]
+
+    # 과반수 노드에서 획득, 획득할 때마다 fencing token 증가
+    tokens = []
+    for _ in range(2):
+        async with Redlock(nodes, name='lock:test', timeout=0.3) as lock:
+            tokens.append(lock.fencing_token)
+            assert not await Redlock(nodes, name='lock:test').acquire(blocking=False)
+    assert tokens[1] > tokens[0]
+
+    # 보유 중에는 만료 시간 연장
+    async with Redlock(nodes, name='lock:test', timeout=0.3) as lock:
+        await asyncio.sleep(1)
+        assert not lock.lost
+        assert await nodes[0].get('lock:test') == lock.value
+    assert await nodes[0].get('lock:test') is None
+
+    # fencing token 은 만료 없이 유지되어, 잠금을 오래 사용하지 않아도 감소하지 않음
+    assert int(await nodes[0].get(Redlock.get_fence_name('lock:test'))) == tokens[1] + 1
+    assert await nodes[0].ttl(Redlock.get_fence_name('lock:test')) == -1
+
+    # 보유 중 만료된 경우 해제 시 오류
+    with pytest.raises(aioredis.exceptions.LockError):
+        async with Redlock(nodes, name='lock:test', timeout=0.3) as lock:
+            await asyncio.gather(*[node.delete('lock:test') for node in nodes[:2]])
+            await asyncio.sleep(0.2)
+            assert lock.lost
+    assert not await nodes[0].exists('lock:test')
+
+    assert metrics.counter_value('lock_contention', lock='lock:test') >= 2
+    assert metrics.snapshot()['timings']['lock_hold{lock=lock:test}']['count'] == 4
+
+
+def test_레드락키():
+    # fencing token 키는 잠금 키와 같은 해시 슬롯 (클러스터 모드에서 한 번의 스크립트로 실행)
+    for name in ('lock:test', 'lock:{room:1}:chat_histories'):
+        assert key_slot(name.encode()) == key_slot(Redlock.get_fence_name(name).encode())
+    assert Redlock.get_fence_name('lock:test') == '{lock:test}:fence'
+    assert Redlock.get_fence_name('lock:{room:1}:chat_histories') == 'lock:{room:1}:chat_histories:fence'
@@ -1,5 +1,17 @@
+import hashlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import selectinload
 from starlette import status
 
+from server.core.authentications import backend
+from server.core.enums import ProfileImageType
+from server.core.externals.redis.schemas import RedisUserSessionByIdS
+from server.db.databases import settings
+from server.models import S3Media, UserProfile, UserProfileImage
+from server.tests.conftest import create_test_user_db
+
 
 async def test_회원가입(db_setup, redis_handler, client):
     email = 'test_signup@test.com'
@@ -11,3 +23,119 @@ async def test_회원가입(db_setup, redis_handler, client):
     })
     assert response.status_code == status.HTTP_201_CREATED
     assert response.json()['data']['uid'] == email
+
+
+async def test_로그인세션(db_setup, redis_handler, client):
+    email = 'test_session@test.com'
+    password = 'test_session'
+    await client.post('/users/signup', json={
+        'name': 'test_session',
+        'mobile': '01022222222',
+        'email': email,
+        'password': password
+    })
+
+    backend._redis_handler = redis_handler
+    try:
+        response = await client.post('/users/login', json={'uid': email, 'password': password})
+        assert response.status_code == status.HTTP_200_OK
+
+        response = await client.get('/users/whoami')
+        assert response.status_code == status.HTTP_200_OK
+        session_id: str = response.json()['data']['session_id']
+        assert await RedisUserSessionByIdS.get(await redis_handler.redis, session_id) is not None
+        assert session_id in backend.cache
+        # 비활성화, 권한 변경이 반영되도록 Redis 세션은 짧게 유지
+        redis = await redis_handler.redis
+        assert 0 < await redis.ttl(RedisUserSessionByIdS.get_key(session_id)) <= settings.session_snapshot_ttl
+
+        # 로그아웃 시, 캐시 된 세션 제거
+        response = await client.post('/users/logout')
+        assert response.status_code == status.HTTP_200_OK
+        assert await RedisUserSessionByIdS.get(await redis_handler.redis, session_id) is None
+        assert session_id not in backend.cache
+    finally:
+        backend._redis_handler = None
+
+
+async def test_닉네임검색(db_setup, db_session, redis_handler, client):
+    for i, name in enumerate(['search_abcd', 'xbcdx', 'other']):
+        await create_test_user_db(
+            db_session, email=f'test_search{i}@test.com', name=name, mobile=f'0109999000{i}', password='test_search'
+        )
+    # FULLTEXT 인덱스는 커밋 이후 반영
+    await db_session.commit()
+
+    response = await client.post('/users/login', json={'uid': 'test_search0@test.com', 'password': 'test_search'})
+    assert response.status_code == status.HTTP_200_OK
+
+    # 중간 일치
+    response = await client.get('/users/profiles', params={'nickname': 'bcd'})
+    assert response.status_code == status.HTTP_200_OK
+    assert {p['nickname'] for p in response.json()['data']} == {'search_abcd', 'xbcdx'}
+
+    # 토큰 크기 이상의 검색어는 ngram 구문 검색 (MATCH) 및 페이지네이션
+    response = await client.get('/users/profiles', params={'nickname': 'se', 'limit': 1})
+    assert [p['nickname'] for p in response.json()['data']] == ['search_abcd']
+    response = await client.get('/users/profiles', params={'nickname': 'bcd', 'offset': 1, 'limit': 1})
+    assert [p['nickname'] for p in response.json()['data']] == ['xbcdx']
+
+    # 토큰 크기보다 짧은 검색어는 접두어 일치 (LIKE)
+    response = await client.get('/users/profiles', params={'nickname': 'x'})
+    assert [p['nickname'] for p in response.json()['data']] == ['xbcdx']
+
+
+async def test_프로필이미지직접업로드(db_setup, db_session, s3_client, s3_bucket):
+    user = await create_test_user_db(db_session)
+    user_profile: UserProfile = user.profiles[0]
+
+    images = []
+    for filename in ('confirmed.png', 'expired.png'):
+        image: UserProfileImage = await UserProfileImage.new_presigned(
+            db_session, filename, 'image/png', root='user_profile/', uploaded_by_id=user_profile.id,
+            user_profile_id=user_profile.id, type=ProfileImageType.PROFILE, is_default=True,
+            bucket_name=settings.aws_storage_bucket_name
+        )
+        db_session.add(image)
+        images.append(image)
+    await db_session.commit()
+    confirmed, expired = images
+
+    async def get_images():
+        result = await db_session.execute(
+            select(UserProfile)
+            .where(UserProfile.id == user_profile.id)
+            .options(selectinload(UserProfile.images))
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().one().images
+
+    # 업로드 확인 전 이미지는 프로필 이미지에서 제외
+    assert await get_images() == []
+
+    content = b'profile image'
+    s3_client.put_object(Bucket=settings.aws_storage_bucket_name, Key=confirmed.filepath, Body=content)
+    await confirmed.confirm_upload()
+    await db_session.commit()
+    assert confirmed.content_hash == hashlib.sha256(content).hexdigest()
+    assert [im.id for im in await get_images()] == [confirmed.id]
+
+    # 업로드 URL 이 만료된 미확인 이미지만 삭제
+    s3_client.put_object(Bucket=settings.aws_storage_bucket_name, Key=expired.filepath, Body=content)
+    await db_session.execute(
+        update(S3Media)
+        .where(S3Media.id == expired.id)
+        .values(created=datetime.now().astimezone() - timedelta(seconds=S3Media.presigned_post_expiration + 1))
+    )
+    await db_session.commit()
+    assert await UserProfileImage.delete_expired_presigned(
+        db_session, UserProfileImage.user_profile_id == user_profile.id
+    ) == 1
+    await db_session.commit()
+
+    result = await db_session.execute(
+        select(UserProfileImage.id).where(UserProfileImage.user_profile_id == user_profile.id)
+    )
+    assert result.scalars().all() == [confirmed.id]
+    keys = [o['Key'] for o in s3_client.list_objects_v2(Bucket=settings.aws_storage_bucket_name)['Contents']]
+    assert keys == [confirmed.filepath]